@@ -2,25 +2,1126 @@ import os
 import re
 import shlex
 import time
+import atexit
+import shutil
+import tempfile
+import queue
+import statistics
+import contextlib
+import threading
 import subprocess
-from typing import List, Dict, Optional, Tuple
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Callable, List, Dict, Optional, Tuple
+
+from src.capture_metrics import CaptureMetrics
+
+
+class GPhoto2Session:
+    """
+    Sesión persistente 'gphoto2 --shell' ligada a un puerto.
+
+    Mantiene abierta la sesión USB/PTP con la cámara entre comandos, evitando
+    abrir un proceso nuevo por cada captura. Si el proceso muere o deja de
+    responder se cierra y se vuelve a lanzar en el siguiente comando.
+    """
+    PROMPT_RX = re.compile(r"gphoto2: \{[^}]*\} [^\n]*> $")
+    ERROR_MARK = "*** Error"
+    # Capturas a la tarjeta: en SDRAM cada foto se reporta como /capt0000.jpg y pisa a la anterior
+    CAPTURE_TARGET = "capturetarget=1"
+
+    def __init__(self, camera_port: str, env: Dict[str, str]):
+        self.camera_port = camera_port
+        self.env = env
+        self.proc: Optional[subprocess.Popen] = None
+        self.staging_dir: Optional[str] = None
+        self._buffer = ""
+        self._file_ready_at: Optional[float] = None  # momento en que la cámara reportó la foto
+        self._eof = False  # el shell actual cerró su salida (murió o está por morir)
+        self._cond = threading.Condition()
+        self._lock = threading.Lock()  # un comando a la vez por cámara
+        # Último valor conocido por config: {config: {índice, etiqueta}}. Se vacía al reabrir la sesión
+        self.config_values: Dict[str, set] = {}
+        self.config_choices: Dict[str, Dict[str, str]] = {}
+        self.config_loaded = False
+
+    # ---------- Ciclo de vida ----------
+    def is_alive(self) -> bool:
+        return self.proc is not None and self.proc.poll() is None
+
+    def start(self, timeout: float = 10.0) -> None:
+        self.close()
+        # Directorio propio: el shell guarda las descargas en su cwd
+        self.staging_dir = tempfile.mkdtemp(prefix="gphoto2_session_")
+        self._buffer = ""
+        self._eof = False
+        self.config_values = {}
+        self.config_choices = {}
+        self.config_loaded = False
+        try:
+            self.proc = subprocess.Popen(
+                ["gphoto2", "--port", self.camera_port, "--shell"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                cwd=self.staging_dir,
+                env={**os.environ, **self.env}
+            )
+        except OSError as e:
+            self.close()
+            raise RuntimeError(f"No se pudo abrir gphoto2 --shell: {e}")
+        threading.Thread(target=self._reader, args=(self.proc,), daemon=True).start()
+        self._wait_prompt(timeout)
+        out = self._send(f"set-config {self.CAPTURE_TARGET}", timeout)
+        if self.failed(out):
+            # Cuerpos sin capturetarget: las rutas repetidas se descargan en el acto (ver capture_deferred)
+            print(f"[GPhoto2Session] No se pudo fijar {self.CAPTURE_TARGET} en {self.camera_port}")
+        print(f"[GPhoto2Session] Sesión abierta en {self.camera_port}")
+
+    def close(self) -> None:
+        proc, self.proc = self.proc, None
+        if proc is not None and proc.poll() is None:
+            try:
+                proc.stdin.write(b"exit\n")
+                proc.stdin.flush()
+                proc.wait(timeout=3)
+            except Exception:
+                proc.kill()
+        if self.staging_dir:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            self.staging_dir = None
+
+    def kill(self) -> None:
+        # Corta el shell aunque esté en medio de un comando; el comando falla y close() limpia
+        proc = self.proc
+        if proc is not None and proc.poll() is None:
+            with contextlib.suppress(OSError):
+                proc.kill()
+
+    # ---------- E/S con el shell ----------
+    def _reader(self, proc: subprocess.Popen) -> None:
+        fd = proc.stdout.fileno()
+        while True:
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                chunk = b""
+            with self._cond:
+                if chunk:
+                    self._buffer += chunk.decode(errors="replace")
+                    if self._file_ready_at is None and "New file is in location" in self._buffer:
+                        self._file_ready_at = time.monotonic()
+                elif proc is self.proc:
+                    # poll() puede no ver aún la salida del proceso: sin esto se esperaría todo el timeout
+                    self._eof = True
+                self._cond.notify_all()
+            if not chunk:
+                return
+
+    def _wait_prompt(self, timeout: float) -> str:
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while not self.PROMPT_RX.search(self._buffer):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise subprocess.TimeoutExpired(f"gphoto2 --shell ({self.camera_port})", timeout)
+                if self._eof or not self.is_alive():
+                    raise RuntimeError(f"gphoto2 --shell terminó en {self.camera_port}")
+                self._cond.wait(remaining)
+            out = self.PROMPT_RX.sub("", self._buffer)
+            self._buffer = ""
+            return out
+
+    def _send(self, command: str, timeout: float) -> str:
+        # Escribe un comando y espera el prompt; el llamador tiene la sesión para sí
+        with self._cond:
+            self._buffer = ""
+            self._file_ready_at = None
+        self.proc.stdin.write((command + "\n").encode())
+        self.proc.stdin.flush()
+        return self._wait_prompt(timeout)
+
+    def execute(self, command: str, timeout: float = 15.0) -> str:
+        """
+        Envía un comando al shell y devuelve su salida (sin el prompt).
+        Reinicia la sesión si no está viva; si el comando expira, la sesión se
+        descarta para que el siguiente comando la vuelva a abrir.
+        """
+        with self._lock:
+            if not self.is_alive():
+                self.start()
+            try:
+                out = self._send(command, timeout)
+            except Exception:
+                self.close()
+                raise
+        # Algunos builds con readline hacen eco de la línea enviada
+        lines = out.splitlines()
+        if lines and lines[0].strip() == command.strip():
+            lines = lines[1:]
+        return "\n".join(lines)
+
+    @classmethod
+    def failed(cls, output: str) -> bool:
+        return cls.ERROR_MARK in output
+
+    # ---------- Configuración ----------
+    def read_config(self, camera_config: str, timeout: float = 10.0) -> str:
+        """
+        Lee una config y actualiza la caché de valor actual y opciones.
+        Devuelve la salida cruda de 'get-config'.
+        """
+        out = self.execute(f"get-config {camera_config}", timeout=timeout)
+        if self.failed(out):
+            return out
+        choices: Dict[str, str] = {}
+        current = None
+        for line in out.splitlines():
+            line = line.strip()
+            if line.startswith("Current:"):
+                current = line[len("Current:"):].strip()
+            elif line.startswith("Choice:"):
+                parts = line.split(" ", 2)
+                if len(parts) == 3:
+                    choices[parts[2].strip()] = parts[1].strip()
+        self.config_choices[camera_config] = choices
+        if current is not None:
+            self.config_values[camera_config] = {current, choices.get(current, current)}
+        return out
+
+    def refresh_config(self, camera_configs: Tuple[str, ...]) -> None:
+        """
+        Lectura única de los valores actuales tras abrir la sesión.
+        """
+        for camera_config in camera_configs:
+            try:
+                self.read_config(camera_config)
+            except Exception as e:
+                print(f"[GPhoto2Session] No se pudo leer {camera_config} en {self.camera_port}: {e}")
+        self.config_loaded = True
+
+    def has_value(self, camera_config: str, config_value: str) -> bool:
+        return str(config_value) in self.config_values.get(camera_config, ())
+
+    def remember_value(self, camera_config: str, config_value: str) -> None:
+        config_value = str(config_value)
+        values = {config_value}
+        for label, idx in self.config_choices.get(camera_config, {}).items():
+            if config_value in (label, idx):
+                values |= {label, idx}
+        self.config_values[camera_config] = values
+
+    # ---------- Operaciones ----------
+    def capture_and_download(self, file_path: str, timeout: float = 40.0) -> bool:
+        start = time.monotonic()
+        out = self.execute("capture-image-and-download", timeout=timeout)
+        # El aviso "New file is in location" separa el disparo de la descarga
+        end, ready = time.monotonic(), self._file_ready_at
+        if ready is not None:
+            CaptureMetrics.record("trigger", ready - start, self.camera_port, ok=True)
+            CaptureMetrics.record("download", end - ready, self.camera_port, ok=not self.failed(out))
+        else:
+            CaptureMetrics.record("trigger", end - start, self.camera_port, ok=not self.failed(out), combined=True)
+        if self.failed(out):
+            print(f"[GPhoto2Session] {out.strip()}")
+            return False
+        saved = re.findall(r"Saving file as (.+)", out)
+        if not saved:
+            return False
+        src = os.path.join(self.staging_dir, saved[-1].strip())
+        if not os.path.exists(src):
+            return False
+        shutil.move(src, file_path)
+        return True
+
+    def capture_to_card(self, timeout: float = 20.0) -> Optional[str]:
+        """
+        Dispara sin descargar; la imagen queda en la tarjeta.
+        Devuelve la ruta en la cámara o None si falló.
+        """
+        out = self.execute("capture-image", timeout=timeout)
+        if self.failed(out):
+            print(f"[GPhoto2Session] {out.strip()}")
+            return None
+        m = re.search(r"New file is in location (.+?) on the camera", out)
+        return m.group(1).strip() if m else None
+
+    def download(self, camera_path: str, file_path: str, timeout: float = 40.0) -> bool:
+        """
+        Descarga un archivo de la tarjeta y lo guarda en file_path.
+        """
+        out = self.execute(f"get {camera_path}", timeout=timeout)
+        if self.failed(out):
+            print(f"[GPhoto2Session] {out.strip()}")
+            return False
+        saved = re.findall(r"Saving file as (.+)", out)
+        src = os.path.join(self.staging_dir, saved[-1].strip() if saved else os.path.basename(camera_path))
+        if not os.path.exists(src):
+            return False
+        shutil.move(src, file_path)
+        return True
+
+    def capture_preview(self, timeout: float = 10.0) -> Optional[bytes]:
+        """
+        Toma un frame de live-view (baja resolución, no se guarda en la tarjeta).
+        """
+        out = self.execute("capture-preview", timeout=timeout)
+        if self.failed(out):
+            return None
+        saved = re.findall(r"Saving file as (.+)", out)
+        src = os.path.join(self.staging_dir, saved[-1].strip() if saved else "capture_preview.jpg")
+        try:
+            with open(src, "rb") as f:
+                frame = f.read()
+            os.remove(src)
+            return frame
+        except OSError:
+            return None
+
+
+class DownloadQueue:
+    """
+    Descargas en segundo plano de imágenes ya capturadas en la tarjeta.
+    Un hilo por carril (lane): por defecto el puerto, o el controlador USB
+    compartido para que las cámaras de un mismo bus descarguen de a una.
+    """
+
+    def __init__(self):
+        self._queues: Dict[str, queue.Queue] = {}
+        self._lock = threading.Lock()
+        self._pending: set = set()  # (puerto, ruta_en_cámara) encolados y aún sin descargar
+        self.results: Dict[str, bool] = {}  # {ruta_local: éxito}
+
+    def submit(self, backend: "CameraBackend", camera_port: str, camera_path: str, file_path: str,
+               lane: Optional[str] = None) -> None:
+        lane = lane or camera_port
+        with self._lock:
+            q = self._queues.get(lane)
+            if q is None:
+                q = queue.Queue()
+                self._queues[lane] = q
+                threading.Thread(target=self._worker, args=(q,), daemon=True).start()
+            self._pending.add((camera_port, camera_path))
+        q.put((backend, camera_port, camera_path, file_path, CaptureMetrics.tags()))
+
+    def pending(self, camera_port: str, camera_path: str) -> bool:
+        # True si esa ruta de la cámara todavía espera su descarga
+        with self._lock:
+            return (camera_port, camera_path) in self._pending
+
+    @staticmethod
+    def fetch(backend: "CameraBackend", camera_port: str, camera_path: str, file_path: str,
+              tags: Optional[Dict[str, object]] = None) -> bool:
+        """
+        Descarga con reintentos y verifica el archivo local.
+        """
+        ok = False
+        for attempt in range(1, 4):
+            if GPhoto2.cancelled():
+                break
+            try:
+                with CaptureMetrics.span("download", camera_port, tags, attempt=attempt):
+                    ok = backend.download(camera_port, camera_path, file_path)
+                if ok:
+                    with CaptureMetrics.span("verify", camera_port, tags):
+                        ok = GPhoto2.verify_file(file_path)
+            except Exception as e:
+                print(f"[DownloadQueue] Error descargando {camera_path} ({camera_port}): {e}")
+            if ok:
+                break
+            time.sleep(0.7 * attempt)
+        if not ok:
+            print(f"[DownloadQueue] No se pudo descargar {camera_path} → {file_path}")
+        return ok
+
+    def _worker(self, q: queue.Queue) -> None:
+        while True:
+            backend, camera_port, camera_path, file_path, tags = q.get()
+            self.results[file_path] = self.fetch(backend, camera_port, camera_path, file_path, tags)
+            with self._lock:
+                self._pending.discard((camera_port, camera_path))
+            q.task_done()
+
+    def discard(self) -> None:
+        """
+        Descarta las descargas encoladas que aún no empezaron (quedan como fallidas).
+        """
+        with self._lock:
+            queues = list(self._queues.values())
+        for q in queues:
+            while True:
+                try:
+                    _, camera_port, camera_path, file_path, _ = q.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    self._pending.discard((camera_port, camera_path))
+                self.results[file_path] = False
+                q.task_done()
+
+    def wait(self) -> Dict[str, bool]:
+        """
+        Bloquea hasta vaciar todas las colas y devuelve (y limpia) los resultados.
+        """
+        with self._lock:
+            queues = list(self._queues.values())
+        for q in queues:
+            q.join()
+        results, self.results = self.results, {}
+        return results
+
+
+class CameraHealth:
+    """
+    Estado de salud de una cámara (por puerto) a partir de las capturas reales.
+
+    healthy → suspect (1 fallo) → failed (3 fallos seguidos); un éxito vuelve a healthy.
+    Solo se hace ping si la cámara no está healthy o lleva más de IDLE_PING_SECONDS
+    sin capturar. Timeouts y backoff se ajustan al p95 de latencia observado.
+    """
+    HEALTHY = "healthy"
+    SUSPECT = "suspect"
+    FAILED = "failed"
+
+    IDLE_PING_SECONDS: float = 60.0
+    MIN_SAMPLES: int = 5
+    MIN_TIMEOUT: float = 10.0
+    TIMEOUT_FACTOR: float = 3.0
+
+    def __init__(self, camera_port: str):
+        self.camera_port = camera_port
+        self.state = CameraHealth.SUSPECT  # sin historial: se verifica en la primera captura
+        self.consecutive_failures = 0
+        self.successes = 0
+        self.failures = 0
+        self.last_success: Optional[float] = None
+        self.latencies: Dict[str, deque] = {}  # {tipo: latencias de éxito}
+        self.failure_latencies: deque = deque(maxlen=50)
+        self._lock = threading.Lock()
+
+    def record_success(self, latency: float, kind: str = "capture") -> None:
+        with self._lock:
+            self.latencies.setdefault(kind, deque(maxlen=50)).append(latency)
+            self.successes += 1
+            self.consecutive_failures = 0
+            self.last_success = time.monotonic()
+            self.state = CameraHealth.HEALTHY
+
+    def record_failure(self, latency: float) -> None:
+        with self._lock:
+            self.failure_latencies.append(latency)
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.state = CameraHealth.FAILED if self.consecutive_failures >= 3 else CameraHealth.SUSPECT
+
+    def needs_ping(self) -> bool:
+        if self.state != CameraHealth.HEALTHY or self.last_success is None:
+            return True
+        return time.monotonic() - self.last_success > CameraHealth.IDLE_PING_SECONDS
+
+    def p95(self, kind: str = "capture") -> Optional[float]:
+        samples = list(self.latencies.get(kind, ()))
+        if len(samples) < CameraHealth.MIN_SAMPLES:
+            return None
+        return statistics.quantiles(samples, n=20)[-1]
+
+    def timeout(self, default: float, kind: str = "capture") -> float:
+        p95 = self.p95(kind)
+        if p95 is None:
+            return default
+        return min(default, max(CameraHealth.MIN_TIMEOUT, p95 * CameraHealth.TIMEOUT_FACTOR))
+
+    def backoff(self, attempt: int, kind: str = "capture") -> float:
+        p95 = self.p95(kind)
+        base = 0.7 if p95 is None else min(0.7, max(0.2, p95 * 0.25))
+        return base * attempt
+
+    def report(self) -> Dict[str, object]:
+        return {
+            "state": self.state,
+            "successes": self.successes,
+            "failures": self.failures,
+            "p95": {kind: self.p95(kind) for kind in self.latencies},
+        }
+
+
+class LiveView:
+    """
+    Streaming de frames de live-view de una cámara.
+
+    Un hilo toma frames de la cámara y deja solo el último en un buffer de un
+    elemento; otro hilo los entrega a on_frame a como mucho max_fps. Si on_frame
+    va lento, los frames intermedios se descartan en lugar de acumularse.
+    Si la cámara deja de enviar frames el stream se detiene solo y llama a on_stop().
+    """
+
+    def __init__(self, camera_port: str, on_frame, max_fps: float = 8.0,
+                 on_stop: Optional[Callable[[], None]] = None):
+        self.camera_port = camera_port
+        self.on_frame = on_frame
+        self.on_stop = on_stop
+        self.max_fps = max_fps
+        self.running = False
+        self.frames = 0
+        self.dropped = 0
+        self._latest: Optional[bytes] = None
+        self._cond = threading.Condition()
+        self._producer_thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self.running = True
+        self.frames = 0
+        self.dropped = 0
+        self._producer_thread = threading.Thread(target=self._producer, daemon=True)
+        self._producer_thread.start()
+        threading.Thread(target=self._consumer, daemon=True).start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+
+    def join(self, timeout: Optional[float] = None) -> None:
+        # Tras stop(): espera a que el productor termine su último capture_preview y suelte la cámara
+        thread = self._producer_thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def _producer(self) -> None:
+        failures = 0
+        while self.running:
+            frame = GPhoto2.capture_preview(self.camera_port)
+            if frame is None:
+                failures += 1
+                if failures >= 5:
+                    print(f"[LiveView] Sin frames de {self.camera_port}, deteniendo live-view")
+                    self.stop()
+                    if self.on_stop is not None:
+                        try:
+                            self.on_stop()
+                        except Exception as e:
+                            print(f"[LiveView] Error al avisar la detención: {e}")
+                    return
+                time.sleep(0.2 * failures)
+                continue
+            failures = 0
+            with self._cond:
+                if self._latest is not None:
+                    self.dropped += 1  # el consumidor no alcanzó a mostrarlo
+                self._latest = frame
+                self._cond.notify_all()
+
+    def _consumer(self) -> None:
+        interval = 1.0 / self.max_fps if self.max_fps else 0.0
+        last = 0.0
+        while True:
+            with self._cond:
+                while self.running and self._latest is None:
+                    self._cond.wait()
+                if not self.running:
+                    return
+                frame, self._latest = self._latest, None
+            wait = interval - (time.monotonic() - last)
+            if wait > 0:
+                time.sleep(wait)
+            last = time.monotonic()
+            try:
+                self.on_frame(frame)
+                self.frames += 1
+            except Exception as e:
+                print(f"[LiveView] Error mostrando frame: {e}")
+
+
+@dataclass
+class ConfigResult:
+    """
+    Resultado de aplicar varias configuraciones a una cámara.
+    """
+    camera_port: str
+    applied: Dict[str, bool] = field(default_factory=dict)  # {config: éxito}
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and all(self.applied.values())
+
+
+@dataclass
+class UsbLink:
+    """
+    Ubicación de un dispositivo en el árbol USB (sysfs).
+    """
+    port: str                     # "usb:BBB,DDD" como lo ve gphoto2
+    device: str                   # entrada sysfs, p.ej. "2-1.3"
+    bus: int
+    speed: Optional[str]          # velocidad negociada: "12M", "480M", "5000M"...
+    root_hub: str                 # "usb2"
+    controller: str               # controlador host (p.ej. "0000:00:14.0"); root_hub si no se resuelve
+    hubs: List[str] = field(default_factory=list)      # hubs intermedios desde el root hub
+    siblings: List[str] = field(default_factory=list)  # otros dispositivos en el mismo controlador
+    still_image: bool = False     # expone interfaz PTP (clase 06)
+
+
+class UsbTopology:
+    """
+    Resuelve puertos 'usb:BBB,DDD' a su posición real en el árbol USB leyendo sysfs.
+    """
+    ROOT = "/sys/bus/usb/devices"
+
+    @staticmethod
+    def _read(path: str) -> Optional[str]:
+        try:
+            with open(path) as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    @staticmethod
+    def scan(root: Optional[str] = None) -> Dict[str, UsbLink]:
+        """
+        Devuelve {puerto: UsbLink} de todos los dispositivos (sin root hubs ni interfaces).
+        """
+        root = root or UsbTopology.ROOT
+        try:
+            entries = os.listdir(root)
+        except OSError:
+            return {}
+
+        controllers: Dict[int, str] = {}
+        links: Dict[str, UsbLink] = {}
+        for entry in entries:
+            if ":" in entry or entry.startswith("usb"):
+                continue  # interfaces y root hubs
+            path = os.path.join(root, entry)
+            try:
+                bus = int(UsbTopology._read(os.path.join(path, "busnum")))
+                dev = int(UsbTopology._read(os.path.join(path, "devnum")))
+            except (TypeError, ValueError):
+                continue
+
+            if bus not in controllers:
+                # .../0000:00:14.0/usb2 → el padre del root hub es el controlador host
+                hub_path = os.path.realpath(os.path.join(root, f"usb{bus}"))
+                parent = os.path.basename(os.path.dirname(hub_path))
+                controllers[bus] = parent if os.path.exists(hub_path) and parent else f"usb{bus}"
+
+            still_image = False
+            try:
+                for interface in os.listdir(path):
+                    if interface.startswith(entry + ":"):
+                        still_image = still_image or UsbTopology._read(
+                            os.path.join(path, interface, "bInterfaceClass")) == "06"
+            except OSError:
+                pass
+
+            speed = UsbTopology._read(os.path.join(path, "speed"))
+            chain = entry.split("-", 1)[1].split(".") if "-" in entry else []
+            links[f"usb:{bus:03d},{dev:03d}"] = UsbLink(
+                port=f"usb:{bus:03d},{dev:03d}",
+                device=entry,
+                bus=bus,
+                speed=f"{speed}M" if speed else None,
+                root_hub=f"usb{bus}",
+                controller=controllers[bus],
+                hubs=[f"{bus}-" + ".".join(chain[:i]) for i in range(1, len(chain))],
+                still_image=still_image,
+            )
+
+        hubs = {hub for link in links.values() for hub in link.hubs}
+        for link in links.values():
+            link.siblings = sorted(other.port for other in links.values()
+                                   if other.controller == link.controller and other.port != link.port
+                                   and other.device not in hubs)
+        return links
+
+    @staticmethod
+    def resolve(camera_port: str, root: Optional[str] = None) -> Optional[UsbLink]:
+        return UsbTopology.scan(root).get(camera_port)
+
+    @staticmethod
+    def lanes(camera_ports: List[str], root: Optional[str] = None) -> Dict[str, str]:
+        """
+        {puerto: carril}: las cámaras en el mismo controlador host comparten carril;
+        las que no se pueden ubicar (ptpip, simuladas) tienen carril propio.
+        """
+        links = UsbTopology.scan(root) if any(str(p).startswith("usb:") for p in camera_ports) else {}
+        return {port: links[port].controller if port in links else port for port in camera_ports}
+
+
+class CameraBackend:
+    """
+    Interfaz de un motor de cámara. Opera sobre un puerto a la vez y sin
+    reintentos; GPhoto2 se encarga de reintentos, salud, paralelismo y colas.
+
+    Motores disponibles (GPhoto2.BACKEND):
+        "cli"         → CliBackend, proceso 'gphoto2' (sesión --shell o un proceso por comando).
+        "libgphoto2"  → LibGPhoto2Backend (src/libgphoto2_backend.py), en proceso con python-gphoto2.
+        "simulated"   → SimulatedBackend (src/simulated_backend.py), cámaras sintéticas sin hardware.
+    """
+    name: str = ""
+
+    def get_cameras(self) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def get_serial(self, camera_port: str, timeout: float = 8.0) -> Optional[str]:
+        raise NotImplementedError
+
+    def get_config(self, camera_port: str, camera_config: str) -> Dict[str, str]:
+        raise NotImplementedError
+
+    def set_configs(self, camera_port: str, configs: Dict[str, str]) -> ConfigResult:
+        raise NotImplementedError
+
+    def ping(self, camera_port: str, timeout: float = 8.0) -> None:
+        raise NotImplementedError
+
+    def capture_and_download(self, camera_port: str, file_path: str, timeout: float = 40.0) -> bool:
+        raise NotImplementedError
+
+    def capture_to_card(self, camera_port: str, timeout: float = 20.0) -> Optional[str]:
+        # RuntimeError si el motor no puede capturar sin descargar
+        raise NotImplementedError
+
+    def download(self, camera_port: str, camera_path: str, file_path: str, timeout: float = 40.0) -> bool:
+        raise NotImplementedError
+
+    def capture_preview(self, camera_port: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def wait_events(self, camera_port: str, staging_dir: str,
+                    on_file: Callable[[str], None], stop: threading.Event) -> None:
+        # Modo tethered: bloquea descargando a staging_dir cada foto que toma la
+        # cámara y llamando on_file(ruta_local), hasta que se activa stop
+        raise NotImplementedError
+
+    def capture_movie(self, camera_port: str, on_frame: Callable[[bytes], None], stop: threading.Event) -> None:
+        # Video de live-view: bloquea entregando cada frame JPEG a on_frame apenas
+        # llega, hasta que se activa stop. Por defecto encadena capture_preview.
+        while not stop.is_set():
+            frame = self.capture_preview(camera_port)
+            if frame:
+                on_frame(frame)
+            else:
+                time.sleep(0.05)
+
+    def close(self, camera_port: Optional[str] = None) -> None:
+        # Libera el puerto dado o todos si es None
+        raise NotImplementedError
+
+
+class CliBackend(CameraBackend):
+    """
+    Motor sobre el CLI 'gphoto2': sesión persistente '--shell' por puerto
+    (GPhoto2.SESSION_MODE) con caída a un proceso por comando.
+    """
+    name = "cli"
+
+    def __init__(self):
+        self._sessions: Dict[str, GPhoto2Session] = {}
+        self._sessions_lock = threading.Lock()
+
+    # ---------- Sesiones persistentes ----------
+    def session(self, camera_port: Optional[str]) -> Optional[GPhoto2Session]:
+        # Devuelve (creando si hace falta) la sesión del puerto, o None en modo CLI
+        if not GPhoto2.SESSION_MODE or not camera_port:
+            return None
+        with self._sessions_lock:
+            session = self._sessions.get(camera_port)
+            if session is None:
+                session = GPhoto2Session(camera_port, GPhoto2.ENV)
+                self._sessions[camera_port] = session
+            return session
+
+    def close(self, camera_port: Optional[str] = None) -> None:
+        with self._sessions_lock:
+            if camera_port is None:
+                sessions = list(self._sessions.values())
+                self._sessions.clear()
+            else:
+                session = self._sessions.pop(camera_port, None)
+                sessions = [session] if session is not None else []
+        for session in sessions:
+            session.close()
+
+    def kill(self) -> None:
+        # Corta todas las sesiones en el acto, aunque estén capturando (ver GPhoto2.cancel)
+        with self._sessions_lock:
+            sessions = list(self._sessions.values())
+        for session in sessions:
+            session.kill()
+
+    # ---------- Descubrimiento ----------
+    def get_cameras(self) -> Dict[str, str]:
+        cp = GPhoto2._run(["--auto-detect"], timeout=10, capture_output=True, check=False)
+        lines = cp.stdout.strip().splitlines()
+        cams: Dict[str, str] = {}
+
+        # Saltar encabezados, parsear con regex robusta (modelo + >=2 espacios + puerto)
+        rx = re.compile(r"^(?P<model>.+?)\s{2,}(?P<port>(usb:\d{3},\d+|ptpip:.*|serial:.*))$")
+        for line in lines[2:]:
+            line = line.strip()
+            if not line:
+                continue
+            m = rx.match(line)
+            if not m:
+                continue
+            model = m.group("model").strip()
+            port = m.group("port").strip()
+
+            # desambiguar nombres duplicados
+            base = model
+            idx = 0
+            while model in cams:
+                idx += 1
+                model = f"{base}({idx})"
+            cams[model] = port
+
+        return cams
+
+    def get_serial(self, camera_port: str, timeout: float = 8.0) -> Optional[str]:
+        session = self._sessions.get(camera_port) if GPhoto2.SESSION_MODE else None
+        if session is not None and session.is_alive():
+            try:
+                out = session.execute("get-config serialnumber", timeout=timeout)
+                m = re.search(r"Current:\s*(.+)", out)
+                return m.group(1).strip() if m and not session.failed(out) else None
+            except Exception:
+                return None
+        try:
+            cp = GPhoto2._run(["--port", camera_port, "--summary"], timeout=timeout, capture_output=True, check=False)
+            if cp.returncode != 0:
+                return None
+            m = re.search(r"Serial Number\s*:\s*(.+)", cp.stdout)
+            return m.group(1).strip() if m else None
+        except Exception:
+            return None
+
+    # ---------- Config ----------
+    def get_config(self, camera_port: str, camera_config: str) -> Dict[str, str]:
+        session = self.session(camera_port)
+        stdout = None
+        if session is not None:
+            try:
+                stdout = session.read_config(camera_config, timeout=10)
+            except Exception as e:
+                print(f"[GPhoto2] Sesión no disponible en {camera_port}, usando CLI: {e}")
+            if stdout is not None and session.failed(stdout):
+                raise RuntimeError(stdout.strip() or "get-config failed")
+        if stdout is None:
+            cp = GPhoto2._run(["--port", camera_port, "--get-config", camera_config],
+                              timeout=10, capture_output=True, check=False)
+            if cp.returncode != 0:
+                raise RuntimeError(cp.stderr.strip() or "get-config failed")
+            stdout = cp.stdout
+        configs: Dict[str, str] = {}
+        for line in stdout.splitlines():
+            line = line.strip()
+            if line.startswith("Choice:"):
+                # "Choice: 0 Auto" → idx, valor
+                parts = line.split(" ", 2)
+                if len(parts) == 3:
+                    idx = parts[1].strip()
+                    val = parts[2].strip()
+                    configs[val] = idx
+        return configs
+
+    def set_configs(self, camera_port: str, configs: Dict[str, str]) -> ConfigResult:
+        result = ConfigResult(camera_port=camera_port)
+        pending = dict(configs)
+        session = self.session(camera_port)
+        if session is not None:
+            try:
+                if not session.is_alive() or not session.config_loaded:
+                    session.execute("", timeout=10)  # abre la sesión si hace falta
+                    session.refresh_config(GPhoto2.TRACKED_CONFIGS)
+                for camera_config, config_value in configs.items():
+                    if session.has_value(camera_config, config_value):
+                        result.applied[camera_config] = True
+                    else:
+                        out = session.execute(f"set-config {camera_config}={config_value}", timeout=15)
+                        result.applied[camera_config] = not session.failed(out)
+                        if result.applied[camera_config]:
+                            session.remember_value(camera_config, config_value)
+                        else:
+                            session.config_values.pop(camera_config, None)
+                    pending.pop(camera_config)
+                return result
+            except Exception as e:
+                print(f"[GPhoto2] Sesión no disponible en {camera_port}, usando CLI: {e}")
+
+        args = ["--port", camera_port]
+        for camera_config, config_value in pending.items():
+            args += ["--set-config", f"{camera_config}={config_value}"]
+        try:
+            cp = GPhoto2._run(args, timeout=15 + 5 * len(pending), capture_output=True, check=False)
+            for camera_config in pending:
+                result.applied[camera_config] = cp.returncode == 0
+            if cp.returncode != 0:
+                result.error = (cp.stderr or "").strip() or "set-config failed"
+        except Exception as e:
+            for camera_config in pending:
+                result.applied[camera_config] = False
+            result.error = str(e)
+        return result
+
+    # ---------- Captura ----------
+    def ping(self, camera_port: str, timeout: float = 8.0) -> None:
+        session = self.session(camera_port)
+        if session is not None:
+            try:
+                session.execute("", timeout=timeout)  # abre/reabre la sesión si murió
+                return
+            except Exception:
+                pass  # best effort, cae a CLI
+        try:
+            GPhoto2._run(["--port", camera_port, "--summary"], timeout=timeout, capture_output=True, check=False)
+        except Exception:
+            pass  # best effort
+
+    def capture_and_download(self, camera_port: str, file_path: str, timeout: float = 40.0) -> bool:
+        session = self.session(camera_port)
+        if session is not None:
+            try:
+                return session.capture_and_download(file_path, timeout=timeout) and os.path.exists(file_path)
+            except (RuntimeError, OSError) as e:
+                # El shell no arrancó o se cerró: este intento va por CLI
+                print(f"[GPhoto2] Sesión no disponible en {camera_port}: {e}")
+        # Un solo proceso: disparo y descarga se miden juntos
+        with CaptureMetrics.span("trigger", camera_port, combined=True):
+            cp = GPhoto2._run(
+                ["--port", camera_port, "--capture-image-and-download", "--filename", file_path],
+                timeout=timeout, capture_output=True, check=False
+            )
+        if cp.returncode == 0 and os.path.exists(file_path):
+            return True
+        print(f"[GPhoto2] {(cp.stderr or '').strip() or (cp.stdout or '').strip()}")
+        return False
+
+    def capture_to_card(self, camera_port: str, timeout: float = 20.0) -> Optional[str]:
+        session = self.session(camera_port)
+        if session is None:
+            raise RuntimeError("captura a tarjeta requiere sesión persistente")
+        return session.capture_to_card(timeout=timeout)
+
+    def download(self, camera_port: str, camera_path: str, file_path: str, timeout: float = 40.0) -> bool:
+        session = self.session(camera_port)
+        if session is None:
+            raise RuntimeError("descarga diferida requiere sesión persistente")
+        return session.download(camera_path, file_path, timeout=timeout)
+
+    def capture_preview(self, camera_port: str) -> Optional[bytes]:
+        session = self.session(camera_port)
+        if session is not None:
+            try:
+                return session.capture_preview()
+            except Exception as e:
+                print(f"[GPhoto2] Sesión no disponible en {camera_port}, usando CLI: {e}")
+        tmp_dir = tempfile.mkdtemp(prefix="gphoto2_preview_")
+        file_path = os.path.join(tmp_dir, "preview.jpg")
+        try:
+            cp = GPhoto2._run(["--port", camera_port, "--capture-preview", "--filename", file_path],
+                              timeout=10, capture_output=True, check=False)
+            if cp.returncode != 0 or not os.path.exists(file_path):
+                return None
+            with open(file_path, "rb") as f:
+                return f.read()
+        except Exception:
+            return None
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    def wait_events(self, camera_port: str, staging_dir: str,
+                    on_file: Callable[[str], None], stop: threading.Event) -> None:
+        # El puerto USB no admite dos procesos: se cierra la sesión --shell mientras dure
+        self.close(camera_port)
+        proc = subprocess.Popen(
+            ["gphoto2", "--port", camera_port, "--wait-event-and-download",
+             "--filename", os.path.join(staging_dir, "%f.%C")],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            env={**os.environ, **GPhoto2.ENV}
+        )
+
+        def watchdog():
+            while not stop.wait(0.5):
+                if proc.poll() is not None:
+                    return
+            proc.terminate()
+
+        threading.Thread(target=watchdog, daemon=True).start()
+        try:
+            for line in proc.stdout:
+                m = re.search(r"Saving file as (.+)", line)
+                if m:
+                    on_file(os.path.join(staging_dir, m.group(1).strip()))
+                elif GPhoto2Session.ERROR_MARK in line:
+                    print(f"[GPhoto2] {line.strip()}")
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    @staticmethod
+    def split_frames(buffer: bytearray) -> List[bytes]:
+        """
+        Saca de buffer los JPEG completos (SOI ... EOI) de un flujo MJPEG y
+        deja en él el resto, que se completa con la próxima lectura.
+        """
+        frames = []
+        while True:
+            start = buffer.find(b"\xff\xd8")
+            if start < 0:
+                del buffer[:max(0, len(buffer) - 1)]
+                return frames
+            end = buffer.find(b"\xff\xd9", start + 2)
+            if end < 0:
+                del buffer[:start]
+                return frames
+            frames.append(bytes(buffer[start:end + 2]))
+            del buffer[:end + 2]
+
+    def capture_movie(self, camera_port: str, on_frame: Callable[[bytes], None], stop: threading.Event) -> None:
+        # '--capture-movie --stdout' emite el live-view como MJPEG hasta que se corta el proceso
+        self.close(camera_port)
+        proc = subprocess.Popen(
+            ["gphoto2", "--port", camera_port, "--capture-movie", "--stdout"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            env={**os.environ, **GPhoto2.ENV}
+        )
+
+        def watchdog():
+            while not stop.wait(0.1):
+                if proc.poll() is not None:
+                    return
+            proc.terminate()
+
+        threading.Thread(target=watchdog, daemon=True).start()
+        buffer = bytearray()
+        try:
+            for chunk in iter(lambda: proc.stdout.read1(65536), b""):
+                buffer += chunk
+                for frame in self.split_frames(buffer):
+                    on_frame(frame)
+        finally:
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+
+class TetheredCapture:
+    """
+    Modo tethered: cada cámara envía al host las fotos a medida que se toman
+    (disparo por hardware o a distancia) y on_file(puerto, ruta_local) las
+    reparte. Un hilo de escucha por cámara; si el motor se cae, se relanza.
+    """
+
+    def __init__(self, on_file: Callable[[str, str], None]):
+        self.on_file = on_file
+        self.running = False
+        self.staging_dir: Optional[str] = None
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def start(self, camera_ports: List[str]) -> None:
+        if self.running:
+            return
+        self.running = True
+        self._stop.clear()
+        self.staging_dir = tempfile.mkdtemp(prefix="gphoto2_tether_")
+        for port in camera_ports:
+            staging_dir = os.path.join(self.staging_dir, re.sub(r"\W+", "_", port))
+            os.makedirs(staging_dir, exist_ok=True)
+            thread = threading.Thread(target=self._listen, args=(port, staging_dir), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        print(f"[Tethered] Escuchando {len(camera_ports)} cámaras")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.running = False
+        if self.staging_dir:
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            self.staging_dir = None
+
+    def _listen(self, camera_port: str, staging_dir: str) -> None:
+        backend = GPhoto2.backend()
+        while not self._stop.is_set():
+            try:
+                backend.wait_events(camera_port, staging_dir,
+                                    lambda path: self._arrived(camera_port, path), self._stop)
+            except Exception as e:
+                print(f"[Tethered] Error escuchando {camera_port}: {e}")
+            self._stop.wait(2.0)  # relanza tras una caída
+
+    def _arrived(self, camera_port: str, file_path: str) -> None:
+        try:
+            self.on_file(camera_port, file_path)
+        except Exception as e:
+            print(f"[Tethered] No se pudo procesar {file_path} de {camera_port}: {e}")
+
 
 class GPhoto2:
     ENV = {"LANG": "C", "LC_ALL": "C"}  # salidas estables para parseo
 
+    # Motor de cámara: "cli", "libgphoto2" o "simulated" (ver CameraBackend)
+    BACKEND: str = "cli"
+    # Parámetros del constructor del motor (p.ej. latencias del simulado)
+    BACKEND_OPTIONS: Dict[str, object] = {}
+    # Sesiones 'gphoto2 --shell' persistentes por puerto en el motor CLI (False → un proceso por comando)
+    SESSION_MODE: bool = True
+    # Configs cuyo valor actual se cachea por sesión para aplicar solo diferencias
+    TRACKED_CONFIGS: Tuple[str, ...] = ("iso", "shutterspeed", "imagequality", "imagesize")
+
+    _backend: Optional[CameraBackend] = None
+    _backend_lock = threading.Lock()
+    # Cámaras en un mismo controlador USB: disparo simultáneo, descargas de a una
+    BUS_AWARE: bool = True
+
+    _downloads = DownloadQueue()
+    _health: Dict[str, CameraHealth] = {}
+    _lane_locks: Dict[str, threading.Lock] = {}
+    # Procesos 'gphoto2' en curso, para que cancel() pueda terminarlos
+    _procs: set = set()
+    _procs_lock = threading.Lock()
+    _cancelled = threading.Event()
+
     # ---------- Helpers de proceso ----------
     @staticmethod
     def _run(args: List[str], *, timeout: Optional[float] = None,
              capture_output: bool = True, check: bool = False) -> subprocess.CompletedProcess:
-        # Ejecuta 'gphoto2' con args como lista (sin shell), respetando locale estable
-        return subprocess.run(
+        # Ejecuta 'gphoto2' con args como lista (sin shell), respetando locale estable.
+        # Igual que subprocess.run, pero el proceso queda registrado mientras corre
+        pipe = subprocess.PIPE if capture_output else None
+        proc = subprocess.Popen(
             ["gphoto2"] + args,
-            capture_output=capture_output,
+            stdout=pipe,
+            stderr=pipe,
             text=True,
-            timeout=timeout,
-            check=check,
             env={**os.environ, **GPhoto2.ENV}
         )
+        with GPhoto2._procs_lock:
+            GPhoto2._procs.add(proc)
+        try:
+            stdout, stderr = proc.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.communicate()
+            raise
+        finally:
+            with GPhoto2._procs_lock:
+                GPhoto2._procs.discard(proc)
+        completed = subprocess.CompletedProcess(proc.args, proc.returncode, stdout, stderr)
+        if check:
+            completed.check_returncode()
+        return completed
 
     @staticmethod
     def _run_cmdline(cmdline: str, *, timeout: Optional[float] = None,
@@ -29,10 +1130,99 @@ class GPhoto2:
         args = shlex.split(cmdline)
         return GPhoto2._run(args, timeout=timeout, capture_output=capture_output, check=check)
 
+    # ---------- Motor ----------
+    @staticmethod
+    def backend() -> CameraBackend:
+        # Crea el motor configurado en el primer uso; si no está disponible cae al CLI
+        with GPhoto2._backend_lock:
+            if GPhoto2._backend is None:
+                if GPhoto2.BACKEND == "libgphoto2":
+                    try:
+                        from src.libgphoto2_backend import LibGPhoto2Backend
+                        GPhoto2._backend = LibGPhoto2Backend(**GPhoto2.BACKEND_OPTIONS)
+                    except (ImportError, RuntimeError) as e:
+                        print(f"[GPhoto2] Motor libgphoto2 no disponible, usando CLI: {e}")
+                        GPhoto2.BACKEND = "cli"
+                elif GPhoto2.BACKEND == "simulated":
+                    from src.simulated_backend import SimulatedBackend
+                    GPhoto2._backend = SimulatedBackend(**GPhoto2.BACKEND_OPTIONS)
+                if GPhoto2._backend is None:
+                    GPhoto2._backend = CliBackend()
+                print(f"[GPhoto2] Motor de cámara: {GPhoto2._backend.name}")
+            return GPhoto2._backend
+
+    @staticmethod
+    def set_backend(name: str, **options) -> None:
+        """
+        Selecciona el motor ("cli", "libgphoto2" o "simulated"); se crea en el siguiente uso.
+        options se pasan al constructor del motor.
+        """
+        with GPhoto2._backend_lock:
+            if GPhoto2._backend is not None and GPhoto2._backend.name == name and GPhoto2.BACKEND_OPTIONS == options:
+                return
+            backend, GPhoto2._backend = GPhoto2._backend, None
+            GPhoto2.BACKEND = name
+            GPhoto2.BACKEND_OPTIONS = options
+        if backend is not None:
+            backend.close()
+
+    @staticmethod
+    def health(camera_port: str) -> CameraHealth:
+        with GPhoto2._backend_lock:
+            health = GPhoto2._health.get(camera_port)
+            if health is None:
+                health = CameraHealth(camera_port)
+                GPhoto2._health[camera_port] = health
+            return health
+
+    @staticmethod
+    def health_report() -> Dict[str, Dict[str, object]]:
+        return {port: health.report() for port, health in GPhoto2._health.items()}
+
+    @staticmethod
+    def close_session(camera_port: str) -> None:
+        if GPhoto2._backend is not None:
+            GPhoto2._backend.close(camera_port)
+
+    @staticmethod
+    def close_sessions() -> None:
+        if GPhoto2._backend is not None:
+            GPhoto2._backend.close()
+
+    # ---------- Cancelación ----------
+    @staticmethod
+    def cancel() -> None:
+        """
+        Corta todo lo que está hablando con las cámaras: termina los procesos gphoto2
+        en curso, cierra las sesiones, descarta las descargas encoladas y hace que
+        capturas y descargas dejen de reintentar hasta resume(). El Executor llama a
+        resume() al terminar el trabajo cancelado, para no dejar bloqueadas las cámaras.
+        """
+        GPhoto2._cancelled.set()
+        GPhoto2._downloads.discard()
+        with GPhoto2._procs_lock:
+            procs = list(GPhoto2._procs)
+        for proc in procs:
+            with contextlib.suppress(OSError):
+                proc.kill()
+        if isinstance(GPhoto2._backend, CliBackend):
+            GPhoto2._backend.kill()
+        GPhoto2.close_sessions()
+
+    @staticmethod
+    def resume() -> None:
+        # Vuelve a permitir capturas después de cancel()
+        GPhoto2._cancelled.clear()
+
+    @staticmethod
+    def cancelled() -> bool:
+        return GPhoto2._cancelled.is_set()
+
     # ---------- Gestión de procesos que estorban ----------
     @staticmethod
     def kill_initial_process() -> bool:
         try:
+            GPhoto2.close_sessions()
             for proc in ("gvfsd-gphoto2", "gphoto2", "gvfs-mtp-volume-monitor"):
                 subprocess.run(["killall", "-q", proc], check=False)
             return True
@@ -46,148 +1236,347 @@ class GPhoto2:
         Devuelve dict {modelo_o_modelo(n): puerto}, p.ej. {"Sony ILCE-6400": "usb:002,006", "Sony ILCE-6400(1)": "usb:004,003"}
         """
         try:
-            cp = GPhoto2._run(["--auto-detect"], timeout=10, capture_output=True, check=False)
-            lines = cp.stdout.strip().splitlines()
-            cams: Dict[str, str] = {}
-
-            # Saltar encabezados, parsear con regex robusta (modelo + >=2 espacios + puerto)
-            rx = re.compile(r"^(?P<model>.+?)\s{2,}(?P<port>(usb:\d{3},\d+|ptpip:.*|serial:.*))$")
-            for line in lines[2:]:
-                line = line.strip()
-                if not line:
-                    continue
-                m = rx.match(line)
-                if not m:
-                    continue
-                model = m.group("model").strip()
-                port = m.group("port").strip()
-
-                # desambiguar nombres duplicados
-                base = model
-                idx = 0
-                while model in cams:
-                    idx += 1
-                    model = f"{base}({idx})"
-                cams[model] = port
-
-            return cams or {None: None}
+            return GPhoto2.backend().get_cameras() or {None: None}
         except Exception as e:
             raise RuntimeError(f"Failed to retrieve cameras: {e}")
 
     @staticmethod
     def get_serial_for_port(camera_port: str, timeout: float = 8.0) -> Optional[str]:
         """
-        Lee el serial mediante --summary (línea 'Serial Number').
+        Lee el serial de la cámara (CLI: --summary, línea 'Serial Number';
+        con una sesión abierta en el puerto se consulta la config 'serialnumber').
         """
         try:
-            cp = GPhoto2._run(["--port", camera_port, "--summary"], timeout=timeout, capture_output=True, check=False)
-            if cp.returncode != 0:
-                return None
-            m = re.search(r"Serial Number\s*:\s*(.+)", cp.stdout)
-            return m.group(1).strip() if m else None
+            return GPhoto2.backend().get_serial(camera_port, timeout=timeout)
         except Exception:
             return None
 
     @staticmethod
     def get_speed_for_port(camera_port: str) -> Optional[str]:
         """
-        Intenta detectar 12M/480M consultando 'lsusb -t' y mapeando el Bus/Device del puerto.
-        (Best effort; puede devolver None si no se logra mapear.)
+        Velocidad USB negociada del puerto ("12M", "480M", "5000M"...) según sysfs,
+        o None si el puerto no es USB o no se encuentra.
         """
-        try:
-            # puerto usb:BBB,DDD
-            m = re.match(r"usb:(\d{3}),(\d+)$", camera_port)
-            if not m:
-                return None
-            bus, dev = m.group(1), m.group(2)
-
-            # Buscar en lsusb -t una línea con 'Bus BBB' no existe directo; se mapea por topología.
-            # Best effort: devolver la primera velocidad listada.
-            out = subprocess.run(["lsusb", "-t"], capture_output=True, text=True).stdout
-            ms = re.findall(r"(\d+)(?:-[-\d\.]+)?\s+:\s+.*?(\d+M)", out)  # pares (bus?, velocidad)
-            # Simple: si hay 480M en la salida, asumimos High-Speed disponible.
-            return "480M" if "480M" in out else ("12M" if "12M" in out else None)
-        except Exception:
-            return None
+        link = UsbTopology.resolve(camera_port)
+        return link.speed if link else None
 
     # ---------- Config ----------
     @staticmethod
     def get_config(camera_port: Optional[str], camera_config: str) -> Dict[str, str]:
         if not camera_port:
             return {}
-        cp = GPhoto2._run(["--port", camera_port, "--get-config", camera_config],
-                          timeout=10, capture_output=True, check=False)
-        if cp.returncode != 0:
-            raise RuntimeError(cp.stderr.strip() or "get-config failed")
-        configs: Dict[str, str] = {}
-        for line in cp.stdout.splitlines():
-            line = line.strip()
-            if line.startswith("Choice:"):
-                # "Choice: 0 Auto" → idx, valor
-                parts = line.split(" ", 2)
-                if len(parts) == 3:
-                    idx = parts[1].strip()
-                    val = parts[2].strip()
-                    configs[val] = idx
-        return configs
+        return GPhoto2.backend().get_config(camera_port, camera_config)
 
     @staticmethod
     def set_config(camera_port: str, camera_config: str, config_value: str) -> bool:
+        return GPhoto2.set_configs(camera_port, {camera_config: config_value}).ok
+
+    @staticmethod
+    def set_configs(camera_port: str, configs: Dict[str, str]) -> ConfigResult:
+        """
+        Aplica varias configuraciones en una sola sesión (o un solo proceso con
+        varios --set-config si no hay sesión). Solo se envían las configuraciones
+        cuyo valor difiere del último conocido en la cámara.
+        """
+        if not camera_port or not configs:
+            return ConfigResult(camera_port=camera_port)
         try:
-            cp = GPhoto2._run(["--port", camera_port, "--set-config", f"{camera_config}={config_value}"],
-                              timeout=15, capture_output=True, check=False)
-            return cp.returncode == 0
-        except Exception:
-            return False
+            return GPhoto2.backend().set_configs(camera_port, configs)
+        except Exception as e:
+            return ConfigResult(camera_port=camera_port, applied={k: False for k in configs}, error=str(e))
+
+    @staticmethod
+    def apply_configs(configs_by_port: Dict[str, Dict[str, str]]) -> Dict[str, ConfigResult]:
+        """
+        Aplica configuraciones a todas las cámaras en paralelo.
+        configs_by_port: {puerto: {config: valor}}. Devuelve {puerto: ConfigResult}.
+        """
+        configs_by_port = {port: configs for port, configs in configs_by_port.items() if port}
+        if not configs_by_port:
+            return {}
+        with ThreadPoolExecutor(max_workers=len(configs_by_port)) as pool:
+            futures = {port: pool.submit(GPhoto2.set_configs, port, configs)
+                       for port, configs in configs_by_port.items()}
+            results: Dict[str, ConfigResult] = {}
+            for port, future in futures.items():
+                try:
+                    results[port] = future.result()
+                except Exception as e:
+                    results[port] = ConfigResult(camera_port=port, error=str(e))
+        return results
+
+    # ---------- Live-view ----------
+    @staticmethod
+    def capture_preview(camera_port: str) -> Optional[bytes]:
+        """
+        Devuelve un frame de live-view (JPEG en memoria) o None si falló.
+        """
+        try:
+            return GPhoto2.backend().capture_preview(camera_port)
+        except Exception as e:
+            print(f"[GPhoto2] Error en live-view de {camera_port}: {e}")
+            return None
 
     # ---------- Captura ----------
     @staticmethod
     def _ping(camera_port: str, timeout: float = 8.0) -> None:
         try:
-            GPhoto2._run(["--port", camera_port, "--summary"], timeout=timeout, capture_output=True, check=False)
+            with CaptureMetrics.span("ping", camera_port):
+                GPhoto2.backend().ping(camera_port, timeout=timeout)
         except Exception:
             pass  # best effort
 
+    @staticmethod
+    def verify_file(file_path: str) -> bool:
+        # La descarga terminó si el archivo existe y no está vacío
+        try:
+            return os.path.getsize(file_path) > 0
+        except OSError:
+            return False
+
     @staticmethod
     def capture_image(camera_port: str, download_path: str, file_name: str) -> bool:
         os.makedirs(download_path, exist_ok=True)
         file_path = os.path.join(download_path, file_name)
 
         print(f"[GPhoto2] Preparando captura en {camera_port} → {file_path}")
-        GPhoto2._ping(camera_port)
+        health = GPhoto2.health(camera_port)
+        if health.needs_ping():
+            GPhoto2._ping(camera_port)
+
+        backend = GPhoto2.backend()
+        timeout = health.timeout(40)
 
         # Retries con backoff
         for attempt in range(1, 4):
+            if GPhoto2.cancelled():
+                return False
+            start = time.monotonic()
             try:
                 print(f"[GPhoto2] Intento {attempt}/3")
-                cp = GPhoto2._run(
-                    ["--port", camera_port, "--capture-image-and-download", "--filename", file_path],
-                    timeout=40, capture_output=True, check=False
-                )
-                if cp.returncode == 0 and os.path.exists(file_path):
-                    time.sleep(0.2)
+                ok = backend.capture_and_download(camera_port, file_path, timeout=timeout)
+                if ok:
+                    with CaptureMetrics.span("verify", camera_port):
+                        ok = GPhoto2.verify_file(file_path)
+                if ok:
+                    health.record_success(time.monotonic() - start)
                     return True
-                else:
-                    err = (cp.stderr or "").strip()
-                    out = (cp.stdout or "").strip()
-                    print(f"[GPhoto2] Falló intento {attempt}: {err or out}")
+                print(f"[GPhoto2] Falló intento {attempt}")
             except subprocess.TimeoutExpired:
                 print(f"[GPhoto2] Timeout en intento {attempt}")
-            time.sleep(0.7 * attempt)  # backoff
+            except Exception as e:
+                print(f"[GPhoto2] Falló intento {attempt}: {e}")
+            health.record_failure(time.monotonic() - start)
+            if health.state == CameraHealth.FAILED:
+                GPhoto2._ping(camera_port)
+            time.sleep(health.backoff(attempt))  # backoff
         return False
 
+    @staticmethod
+    def _capture_to_card(camera_port: str, attempts: int = 3,
+                         on_trigger: Optional[Callable[[], None]] = None) -> Optional[str]:
+        """
+        Dispara a la tarjeta con reintentos y devuelve la ruta en la cámara (None si falló).
+        on_trigger: se llama justo antes de cada disparo, ya hecho el ping.
+        RuntimeError/OSError si el motor no puede capturar sin descargar.
+        """
+        health = GPhoto2.health(camera_port)
+        if health.needs_ping():
+            GPhoto2._ping(camera_port)
+
+        backend = GPhoto2.backend()
+        for attempt in range(1, attempts + 1):
+            if GPhoto2.cancelled():
+                return None
+            start = time.monotonic()
+            if on_trigger is not None:
+                on_trigger()
+            try:
+                with CaptureMetrics.span("trigger", camera_port, attempt=attempt):
+                    camera_path = backend.capture_to_card(camera_port, timeout=health.timeout(20, kind="card"))
+                if camera_path:
+                    health.record_success(time.monotonic() - start, kind="card")
+                    return camera_path
+                print(f"[GPhoto2] Falló captura a tarjeta, intento {attempt}")
+            except subprocess.TimeoutExpired:
+                print(f"[GPhoto2] Timeout en captura a tarjeta, intento {attempt}")
+            health.record_failure(time.monotonic() - start)
+            if attempt < attempts:
+                time.sleep(health.backoff(attempt, kind="card"))
+        return None
+
+    @staticmethod
+    def capture_deferred(camera_port: str, download_path: str, file_name: str, lane: Optional[str] = None,
+                         attempts: int = 3, on_trigger: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Captura a la tarjeta (sin descargar) y encola la descarga en segundo plano.
+        lane: carril de descarga (ver UsbTopology.lanes); por defecto el puerto.
+        attempts y on_trigger: ver _capture_to_card (la captura continua dispara una sola vez).
+        Si la cámara reporta una ruta que se reutiliza (captura a SDRAM) descarga en el acto.
+        Si el motor no lo soporta (CLI sin sesión) cae a capture_image.
+        """
+        os.makedirs(download_path, exist_ok=True)
+        try:
+            camera_path = GPhoto2._capture_to_card(camera_port, attempts, on_trigger)
+        except (RuntimeError, OSError) as e:
+            print(f"[GPhoto2] Captura a tarjeta no disponible en {camera_port}: {e}")
+            return GPhoto2.capture_image(camera_port, download_path, file_name)
+        if not camera_path:
+            return False
+        file_path = os.path.join(download_path, file_name)
+        if GPhoto2._reused_path(camera_port, camera_path):
+            # La cámara sigue capturando a SDRAM: el próximo disparo pisaría esta foto
+            print(f"[GPhoto2] {camera_port} reutiliza {camera_path}, descargando en el acto")
+            with GPhoto2._lane_lock(lane or camera_port):
+                return DownloadQueue.fetch(GPhoto2.backend(), camera_port, camera_path, file_path)
+        GPhoto2._downloads.submit(GPhoto2.backend(), camera_port, camera_path, file_path, lane=lane)
+        return True
+
+    @staticmethod
+    def _reused_path(camera_port: str, camera_path: str) -> bool:
+        # Las capturas a SDRAM quedan en la raíz con un nombre fijo (/capt0000.jpg);
+        # una ruta aún encolada también se pisaría en el siguiente disparo
+        return os.path.dirname(camera_path) in ("", "/") or GPhoto2._downloads.pending(camera_port, camera_path)
+
+    @staticmethod
+    def capture_staggered(camera_port: str, download_path: str, file_name: str,
+                          lane_lock: Optional[threading.Lock] = None,
+                          on_exposed: Optional[Callable[[], None]] = None) -> bool:
+        """
+        Dispara a la tarjeta y descarga en el mismo hilo.
+        lane_lock: para cámaras que comparten controlador USB; se descarga tomándolo
+        para no repartir el ancho de banda del bus.
+        on_exposed: se llama al cerrarse el obturador, antes de descargar.
+        Si el motor no captura a tarjeta cae a capture_image.
+        """
+        os.makedirs(download_path, exist_ok=True)
+        try:
+            camera_path = GPhoto2._capture_to_card(camera_port)
+        except (RuntimeError, OSError) as e:
+            print(f"[GPhoto2] Captura a tarjeta no disponible en {camera_port}: {e}")
+            return GPhoto2.capture_image(camera_port, download_path, file_name)
+        if on_exposed is not None:
+            on_exposed()
+        if not camera_path:
+            return False
+        with lane_lock or contextlib.nullcontext():
+            return DownloadQueue.fetch(GPhoto2.backend(), camera_port, camera_path,
+                                       os.path.join(download_path, file_name))
+
+    @staticmethod
+    def _lane_lock(lane: str) -> threading.Lock:
+        with GPhoto2._backend_lock:
+            lock = GPhoto2._lane_locks.get(lane)
+            if lock is None:
+                lock = threading.Lock()
+                GPhoto2._lane_locks[lane] = lock
+            return lock
+
+    @staticmethod
+    def wait_downloads() -> Dict[str, bool]:
+        """
+        Espera a que terminen las descargas diferidas. Devuelve {ruta_local: éxito}.
+        """
+        return GPhoto2._downloads.wait()
+
+    @staticmethod
+    def capture_images(jobs: List[Tuple[str, str, str]], deferred: bool = False,
+                       on_exposed: Optional[Callable[[], None]] = None) -> Dict[str, bool]:
+        """
+        Dispara todas las cámaras a la vez (un worker por puerto) y espera a todas.
+        jobs: lista de (puerto, carpeta_descarga, nombre_archivo).
+        deferred: captura a la tarjeta y descarga en segundo plano (ver wait_downloads).
+        on_exposed: se llama una vez, cuando todas las cámaras cerraron el obturador
+        (o fallaron), mientras las descargas siguen; p.ej. para empezar a girar la mesa.
+        Con BUS_AWARE, las cámaras en buses distintos van totalmente en paralelo y
+        las que comparten controlador USB descargan de a una.
+        Devuelve {puerto: éxito}.
+        """
+        jobs = [job for job in jobs if job[0]]
+        if not jobs:
+            if on_exposed is not None:
+                on_exposed()
+            return {}
+        ports = [port for port, _, _ in jobs]
+        lanes = UsbTopology.lanes(ports) if GPhoto2.BUS_AWARE else {port: port for port in ports}
+        shared = {lane for lane in lanes.values() if list(lanes.values()).count(lane) > 1}
+
+        pending = set(ports)  # cámaras con el obturador aún abierto
+        pending_lock = threading.Lock()
+
+        def exposed(port: str) -> None:
+            with pending_lock:
+                if port not in pending:
+                    return
+                pending.discard(port)
+                last = not pending
+            if last and on_exposed is not None:
+                on_exposed()
+
+        def capture(port: str, path: str, name: str) -> bool:
+            lane = lanes[port]
+            try:
+                if deferred:
+                    return GPhoto2.capture_deferred(port, path, name, lane=lane)
+                if lane in shared or on_exposed is not None:
+                    lane_lock = GPhoto2._lane_lock(lane) if lane in shared else None
+                    return GPhoto2.capture_staggered(port, path, name, lane_lock,
+                                                     on_exposed=lambda: exposed(port))
+                return GPhoto2.capture_image(port, path, name)
+            finally:
+                exposed(port)
+
+        results: Dict[str, bool] = {}
+        with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+            futures = {port: pool.submit(capture, port, path, name) for port, path, name in jobs}
+            for port, future in futures.items():
+                try:
+                    results[port] = future.result()
+                except Exception as e:
+                    print(f"[GPhoto2] Error capturando en {port}: {e}")
+                    results[port] = False
+        return results
+
+    @staticmethod
+    def record_movie(camera_port: str, file_path: str, stop: threading.Event) -> List[Tuple[int, int, float]]:
+        """
+        Graba el video de live-view de la cámara en file_path (MJPEG) hasta que se
+        activa stop, frame a frame sin acumularlo en memoria.
+        Devuelve el índice [(offset, largo, time.monotonic() de llegada)] de cada frame.
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        index: List[Tuple[int, int, float]] = []
+        with open(file_path, "wb") as f:
+            def write(frame: bytes) -> None:
+                index.append((f.tell(), len(frame), time.monotonic()))
+                f.write(frame)
+            try:
+                with CaptureMetrics.span("record", camera_port):
+                    GPhoto2.backend().capture_movie(camera_port, write, stop)
+            except Exception as e:
+                print(f"[GPhoto2] Error grabando video en {camera_port}: {e}")
+        print(f"[GPhoto2] Video de {camera_port}: {len(index)} frames → {file_path}")
+        return index
+
     # ---------- Utilidades de alto nivel ----------
     @staticmethod
-    def inventory() -> List[Tuple[str, str, Optional[str], Optional[str]]]:
+    def inventory(cams: Optional[Dict[str, str]] = None) -> List[Tuple[str, str, Optional[str], Optional[str]]]:
         """
-        Devuelve lista de (modelo, puerto, serial, velocidad_aprox).
+        Devuelve lista de (modelo, puerto, serial, velocidad) en el orden de detección.
+        Consulta todos los puertos a la vez. cams: resultado previo de get_cameras().
         """
-        cams = GPhoto2.get_cameras()
-        inv = []
-        for model, port in cams.items():
-            if not model or not port:
-                continue
-            serial = GPhoto2.get_serial_for_port(port)
-            speed = GPhoto2.get_speed_for_port(port)
-            inv.append((model, port, serial, speed))
+        cams = GPhoto2.get_cameras() if cams is None else cams
+        cams = {model: port for model, port in cams.items() if model and port}
+        if not cams:
+            return []
+        links = UsbTopology.scan()
+        with ThreadPoolExecutor(max_workers=len(cams)) as pool:
+            serials = {model: pool.submit(GPhoto2.get_serial_for_port, port) for model, port in cams.items()}
+            inv = []
+            for model, port in cams.items():
+                link = links.get(port)
+                inv.append((model, port, serials[model].result(), link.speed if link else None))
         return inv
+
+
+atexit.register(GPhoto2.close_sessions)
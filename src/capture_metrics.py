@@ -0,0 +1,159 @@
+import os
+import re
+import json
+import time
+import threading
+from datetime import datetime
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+
+class CaptureMetrics:
+    """
+    Tiempos por fase de cada toma (mover motor, asentar, ping, disparo,
+    descarga, verificación), etiquetados con cámara, puerto, ángulo y rutina.
+
+    Guarda las últimas MAX_SPANS mediciones en memoria y, entre start_run() y
+    end_run(), las de la corrida actual para escribir un reporte JSON.
+    """
+    PHASES = ("motor_move", "settle", "ping", "trigger", "exposure", "download", "verify", "record", "extract")
+    MAX_SPANS = 10000
+
+    _lock = threading.Lock()
+    _spans: deque = deque(maxlen=MAX_SPANS)
+    _context: Dict[str, object] = {"routine": None, "angle": None, "degrees": None}
+    _cameras: Dict[str, str] = {}
+    _run: Optional[Dict[str, object]] = None
+
+    # ---------- Contexto ----------
+    @staticmethod
+    def start_run(routine: Optional[str] = None, cameras: Optional[Dict[str, str]] = None, **tags) -> None:
+        """
+        Abre una corrida. cameras: {nombre: puerto} para etiquetar cada medición con su cámara.
+        """
+        with CaptureMetrics._lock:
+            CaptureMetrics._cameras = {port: name for name, port in (cameras or {}).items() if port}
+            CaptureMetrics._context = {"routine": routine, "angle": None, "degrees": None, **tags}
+            CaptureMetrics._run = {
+                "routine": routine,
+                "tags": tags,
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+                "start": time.monotonic(),
+                "spans": [],
+            }
+
+    @staticmethod
+    def set_context(**tags) -> None:
+        """
+        Actualiza las etiquetas que se aplican a las siguientes mediciones (p.ej. angle=3, degrees=135).
+        """
+        with CaptureMetrics._lock:
+            CaptureMetrics._context = {**CaptureMetrics._context, **tags}
+
+    @staticmethod
+    def tags() -> Dict[str, object]:
+        # Copia de las etiquetas actuales, para mediciones que terminan más tarde (descargas diferidas)
+        with CaptureMetrics._lock:
+            return dict(CaptureMetrics._context)
+
+    # ---------- Registro ----------
+    @staticmethod
+    def record(phase: str, seconds: float, camera_port: Optional[str] = None,
+               tags: Optional[Dict[str, object]] = None, **extra) -> None:
+        with CaptureMetrics._lock:
+            span = {
+                "phase": phase,
+                "seconds": round(seconds, 4),
+                "camera": CaptureMetrics._cameras.get(camera_port),
+                "port": camera_port,
+                **(tags if tags is not None else CaptureMetrics._context),
+                **extra,
+            }
+            CaptureMetrics._spans.append(span)
+            if CaptureMetrics._run is not None:
+                CaptureMetrics._run["spans"].append(span)
+
+    @staticmethod
+    @contextmanager
+    def span(phase: str, camera_port: Optional[str] = None,
+             tags: Optional[Dict[str, object]] = None, **extra):
+        """
+        Mide el bloque: with CaptureMetrics.span("ping", port): ...
+        Se registra aunque el bloque lance una excepción (con ok=False).
+        """
+        start = time.monotonic()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            CaptureMetrics.record(phase, time.monotonic() - start, camera_port, tags, ok=ok, **extra)
+
+    # ---------- Consulta ----------
+    @staticmethod
+    def recent(phase: Optional[str] = None) -> List[Dict[str, object]]:
+        with CaptureMetrics._lock:
+            return [s for s in CaptureMetrics._spans if phase is None or s["phase"] == phase]
+
+    @staticmethod
+    def summary(spans: Optional[List[Dict[str, object]]] = None) -> Dict[str, Dict[str, float]]:
+        """
+        {fase: {count, total, mean, p50, p95, max}} de las mediciones dadas (o de las recientes).
+        """
+        spans = CaptureMetrics.recent() if spans is None else spans
+        by_phase: Dict[str, List[float]] = {}
+        for span in spans:
+            by_phase.setdefault(span["phase"], []).append(span["seconds"])
+        summary = {}
+        for phase, values in by_phase.items():
+            values = sorted(values)
+            summary[phase] = {
+                "count": len(values),
+                "total": round(sum(values), 3),
+                "mean": round(sum(values) / len(values), 4),
+                "p50": values[len(values) // 2],
+                "p95": values[min(len(values) - 1, int(len(values) * 0.95))],
+                "max": values[-1],
+            }
+        return summary
+
+    @staticmethod
+    def end_run(report_directory: Optional[str] = None) -> Optional[str]:
+        """
+        Cierra la corrida y, si se da report_directory, escribe el reporte JSON.
+        Devuelve la ruta del reporte o None.
+        """
+        with CaptureMetrics._lock:
+            run, CaptureMetrics._run = CaptureMetrics._run, None
+            CaptureMetrics._context = {"routine": None, "angle": None, "degrees": None}
+        if run is None or not report_directory:
+            return None
+
+        spans = run.pop("spans")
+        by_camera: Dict[str, List[Dict[str, object]]] = {}
+        for span in spans:
+            if span["port"]:
+                by_camera.setdefault(span["camera"] or span["port"], []).append(span)
+        report = {
+            "routine": run["routine"],
+            "tags": run["tags"],
+            "started_at": run["started_at"],
+            "finished_at": datetime.now().isoformat(timespec="seconds"),
+            "duration": round(time.monotonic() - run["start"], 3),
+            "summary": CaptureMetrics.summary(spans),
+            "by_camera": {camera: CaptureMetrics.summary(camera_spans) for camera, camera_spans in by_camera.items()},
+            "spans": spans,
+        }
+
+        name = re.sub(r"[^\w-]+", "_", str(run["routine"] or "scan"))
+        path = os.path.join(report_directory, f"{datetime.now():%Y%m%d_%H%M%S}_{name}.json")
+        try:
+            os.makedirs(report_directory, exist_ok=True)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=4, ensure_ascii=False)
+        except OSError as e:
+            print(f"[CaptureMetrics] No se pudo escribir el reporte {path}: {e}")
+            return None
+        print(f"[CaptureMetrics] Reporte de tiempos: {path}")
+        return path
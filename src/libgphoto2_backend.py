@@ -0,0 +1,222 @@
+import os
+import re
+import threading
+from typing import Dict, Optional
+
+from src.camera_controller import CameraBackend, ConfigResult
+from src.capture_metrics import CaptureMetrics
+
+try:
+    import gphoto2 as gp
+except ImportError:  # python-gphoto2 es opcional; sin él se usa el motor CLI
+    gp = None
+
+
+class LibGPhoto2Backend(CameraBackend):
+    """
+    Motor en proceso sobre libgphoto2 (python-gphoto2): un handle gp.Camera
+    abierto por puerto durante toda la ejecución, sin procesos ni parseo de texto.
+    """
+    name = "libgphoto2"
+
+    def __init__(self):
+        if gp is None:
+            raise RuntimeError("python-gphoto2 no está instalado")
+        self._cameras: Dict[str, "gp.Camera"] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._port_info_list = None
+        self._abilities_list = None
+
+    # ---------- Handles por puerto ----------
+    def _port_lock(self, camera_port: str) -> threading.Lock:
+        with self._lock:
+            lock = self._locks.get(camera_port)
+            if lock is None:
+                lock = threading.Lock()
+                self._locks[camera_port] = lock
+            return lock
+
+    def _load_lists(self) -> None:
+        if self._port_info_list is None:
+            self._port_info_list = gp.PortInfoList()
+            self._port_info_list.load()
+        if self._abilities_list is None:
+            self._abilities_list = gp.CameraAbilitiesList()
+            self._abilities_list.load()
+
+    def _camera(self, camera_port: str) -> "gp.Camera":
+        # Abre (una sola vez) la cámara del puerto; llamar con el lock del puerto tomado
+        camera = self._cameras.get(camera_port)
+        if camera is not None:
+            return camera
+        with self._lock:
+            self._load_lists()
+            detected = self._abilities_list.detect(self._port_info_list)
+        model = next((name for name, port in detected if port == camera_port), None)
+        if model is None:
+            raise RuntimeError(f"No hay cámara en {camera_port}")
+        camera = gp.Camera()
+        camera.set_abilities(self._abilities_list[self._abilities_list.lookup_model(model)])
+        camera.set_port_info(self._port_info_list[self._port_info_list.lookup_path(camera_port)])
+        camera.init()
+        self._capture_to_card(camera)
+        self._cameras[camera_port] = camera
+        return camera
+
+    @staticmethod
+    def _capture_to_card(camera: "gp.Camera") -> None:
+        # capturetarget=1 (tarjeta): en SDRAM cada foto se reporta como /capt0000.jpg y pisa a la anterior
+        try:
+            widget = camera.get_single_config("capturetarget")
+            widget.set_value(widget.get_choice(1))
+            camera.set_single_config("capturetarget", widget)
+        except gp.GPhoto2Error:
+            pass  # cuerpos sin capturetarget: capture_deferred descarga las rutas repetidas en el acto
+
+    def _drop(self, camera_port: str) -> None:
+        camera = self._cameras.pop(camera_port, None)
+        if camera is not None:
+            try:
+                camera.exit()
+            except gp.GPhoto2Error:
+                pass
+
+    def _call(self, camera_port: str, fn):
+        # Ejecuta fn(camera) serializado por puerto; ante error de libgphoto2 se reabre en el próximo uso
+        with self._port_lock(camera_port):
+            try:
+                return fn(self._camera(camera_port))
+            except gp.GPhoto2Error:
+                self._drop(camera_port)
+                raise
+
+    def close(self, camera_port: Optional[str] = None) -> None:
+        ports = [camera_port] if camera_port else list(self._cameras)
+        for port in ports:
+            with self._port_lock(port):
+                self._drop(port)
+
+    # ---------- Descubrimiento ----------
+    def get_cameras(self) -> Dict[str, str]:
+        cams: Dict[str, str] = {}
+        for model, port in gp.Camera.autodetect():
+            # desambiguar nombres duplicados
+            base = model
+            idx = 0
+            while model in cams:
+                idx += 1
+                model = f"{base}({idx})"
+            cams[model] = port
+        return cams
+
+    def get_serial(self, camera_port: str, timeout: float = 8.0) -> Optional[str]:
+        try:
+            summary = self._call(camera_port, lambda camera: str(camera.get_summary()))
+        except (gp.GPhoto2Error, RuntimeError):
+            return None
+        m = re.search(r"Serial Number\s*:\s*(.+)", summary)
+        return m.group(1).strip() if m else None
+
+    # ---------- Config ----------
+    def get_config(self, camera_port: str, camera_config: str) -> Dict[str, str]:
+        def read(camera):
+            widget = camera.get_single_config(camera_config)
+            return {widget.get_choice(i): str(i) for i in range(widget.count_choices())}
+        try:
+            return self._call(camera_port, read)
+        except gp.GPhoto2Error as e:
+            raise RuntimeError(str(e) or "get-config failed")
+
+    def set_configs(self, camera_port: str, configs: Dict[str, str]) -> ConfigResult:
+        result = ConfigResult(camera_port=camera_port)
+
+        def write(camera):
+            for camera_config, config_value in configs.items():
+                try:
+                    widget = camera.get_single_config(camera_config)
+                    value = str(config_value)
+                    if value.isdigit() and widget.get_type() in (gp.GP_WIDGET_RADIO, gp.GP_WIDGET_MENU):
+                        # Igual que el CLI: un número es el índice de la opción
+                        value = widget.get_choice(int(value))
+                    if widget.get_value() != value:
+                        widget.set_value(value)
+                        camera.set_single_config(camera_config, widget)
+                    result.applied[camera_config] = True
+                except gp.GPhoto2Error as e:
+                    result.applied[camera_config] = False
+                    result.error = str(e)
+
+        try:
+            self._call(camera_port, write)
+        except (gp.GPhoto2Error, RuntimeError) as e:
+            for camera_config in configs:
+                result.applied.setdefault(camera_config, False)
+            result.error = str(e)
+        return result
+
+    # ---------- Captura ----------
+    def ping(self, camera_port: str, timeout: float = 8.0) -> None:
+        try:
+            self._call(camera_port, lambda camera: camera.get_summary())
+        except (gp.GPhoto2Error, RuntimeError):
+            pass  # best effort
+
+    @staticmethod
+    def _save(camera, folder: str, name: str, file_path: str) -> None:
+        camera_file = camera.file_get(folder, name, gp.GP_FILE_TYPE_NORMAL)
+        with open(file_path, "wb") as f:
+            f.write(memoryview(camera_file.get_data_and_size()))
+        # Igual que '--capture-image-and-download': no dejar la foto en la tarjeta
+        camera.file_delete(folder, name)
+
+    def capture_and_download(self, camera_port: str, file_path: str, timeout: float = 40.0) -> bool:
+        def capture(camera):
+            with CaptureMetrics.span("trigger", camera_port):
+                path = camera.capture(gp.GP_CAPTURE_IMAGE)
+            with CaptureMetrics.span("download", camera_port):
+                self._save(camera, path.folder, path.name, file_path)
+        try:
+            self._call(camera_port, capture)
+        except gp.GPhoto2Error as e:
+            print(f"[GPhoto2] {e}")
+            return False
+        return os.path.exists(file_path)
+
+    def capture_to_card(self, camera_port: str, timeout: float = 20.0) -> Optional[str]:
+        try:
+            path = self._call(camera_port, lambda camera: camera.capture(gp.GP_CAPTURE_IMAGE))
+        except gp.GPhoto2Error as e:
+            print(f"[GPhoto2] {e}")
+            return None
+        return f"{path.folder.rstrip('/')}/{path.name}"
+
+    def download(self, camera_port: str, camera_path: str, file_path: str, timeout: float = 40.0) -> bool:
+        folder, name = camera_path.rsplit("/", 1)
+        try:
+            self._call(camera_port, lambda camera: self._save(camera, folder or "/", name, file_path))
+        except gp.GPhoto2Error as e:
+            print(f"[GPhoto2] {e}")
+            return False
+        return os.path.exists(file_path)
+
+    def wait_events(self, camera_port: str, staging_dir: str, on_file, stop: threading.Event) -> None:
+        def poll(camera):
+            event_type, data = camera.wait_for_event(500)
+            if event_type != gp.GP_EVENT_FILE_ADDED:
+                return None
+            file_path = os.path.join(staging_dir, data.name)
+            self._save(camera, data.folder, data.name, file_path)
+            return file_path
+
+        while not stop.is_set():
+            file_path = self._call(camera_port, poll)
+            if file_path:
+                on_file(file_path)
+
+    def capture_preview(self, camera_port: str) -> Optional[bytes]:
+        try:
+            camera_file = self._call(camera_port, lambda camera: camera.capture_preview())
+        except gp.GPhoto2Error:
+            return None
+        return bytes(memoryview(camera_file.get_data_and_size()))
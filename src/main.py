@@ -1,6 +1,8 @@
 import flet as ft
 from src.resources.properties import Properties as Props
 from src.resources.utils.layout import Layout
+from src.resources.utils.cameras_controller import Cameras
+from src.camera_controller import GPhoto2 as gp
 
 def main(page: ft.Page) -> None:
 
@@ -23,6 +25,14 @@ def main(page: ft.Page) -> None:
         page.add(app)
         page.update()
 
+        # PAGE: Hardware discovery (background, cached)
+        if Props.CAMERA_BACKEND == "simulated":
+            gp.set_backend(Props.CAMERA_BACKEND, **Props.SIMULATED_CAMERA_OPTIONS)
+        else:
+            gp.set_backend(Props.CAMERA_BACKEND)
+        Cameras.discover_async(on_done=app.refresh_cameras)
+        Cameras.watch(on_change=app.refresh_cameras)
+
 if __name__=="__main__":
     ft.app(
             target=main,
@@ -1,74 +1,817 @@
 import time
-import RPi.GPIO as GPIO
+import math
+import bisect
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, CancelledError, Future, wait
+from src.capture_metrics import CaptureMetrics
+
+try:
+    import RPi.GPIO as GPIO
+except (ImportError, RuntimeError):  # not a Raspberry Pi: use SimulatedGPIO
+    GPIO = None
+
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
+
+# Physical (BOARD) pin → BCM GPIO number on the 40-pin header; pigpio only speaks BCM
+BOARD_TO_BCM = {
+    3: 2, 5: 3, 7: 4, 8: 14, 10: 15, 11: 17, 12: 18, 13: 27, 15: 22, 16: 23, 18: 24, 19: 10,
+    21: 9, 22: 25, 23: 11, 24: 8, 26: 7, 27: 0, 28: 1, 29: 5, 31: 6, 32: 12, 33: 13, 35: 19,
+    36: 16, 37: 26, 38: 20, 40: 21,
+}
+
+
+class MotionProfile:
+    """
+    Velocity profile of a move, in steps/s (accel in steps/s², jerk in steps/s³):
+    "constant" (the original fixed delay), "trapezoidal" (constant acceleration)
+    or "s_curve" (jerk-limited acceleration). Deceleration mirrors acceleration.
+    """
+    KINDS = ("constant", "trapezoidal", "s_curve")
+    RAMP_DT = 0.0001  # integration step of the s-curve ramp, in seconds
+
+    def __init__(self, name="constant", kind="constant", max_speed=500.0, accel=1000.0,
+                 jerk=5000.0, start_speed=100.0):
+        """
+        :param name: Profile name, as listed in the presets.
+        :param kind: One of KINDS.
+        :param max_speed: Cruise speed in steps/s.
+        :param accel: Maximum acceleration in steps/s².
+        :param jerk: Maximum jerk in steps/s³ (s_curve only).
+        :param start_speed: Speed of the first and last step, in steps/s.
+        :raises ValueError: If the kind is unknown or a speed, accel or jerk is not > 0.
+        """
+        if kind not in MotionProfile.KINDS:
+            raise ValueError(f"Perfil de movimiento desconocido: {kind}")
+        for label, value in (("max_speed", max_speed), ("accel", accel), ("jerk", jerk), ("start_speed", start_speed)):
+            if not float(value) > 0:
+                raise ValueError(f"Perfil de movimiento {name}: {label} debe ser mayor que 0 ({value})")
+        self.name = name
+        self.kind = kind
+        self.max_speed = float(max_speed)
+        self.accel = float(accel)
+        self.jerk = float(jerk)
+        self.start_speed = min(float(start_speed), self.max_speed)
+        self._ramp = None  # s_curve acceleration phase: ([distance in steps], [speed])
+
+    @staticmethod
+    def from_settings(name, settings):
+        """
+        Builds a profile from a settings dict such as Properties.MOTION_PROFILES[name].
+        """
+        return MotionProfile(name=name, **settings)
+
+    def _ramp_table(self):
+        # Integrates the jerk-limited acceleration phase up to max_speed once
+        if self._ramp is None:
+            dt = MotionProfile.RAMP_DT
+            speed, accel, distance = self.start_speed, 0.0, 0.0
+            distances, speeds = [0.0], [speed]
+            while speed < self.max_speed:
+                if self.max_speed - speed <= accel * accel / (2 * self.jerk):
+                    accel = max(accel - self.jerk * dt, self.jerk * dt)  # ease into cruise
+                else:
+                    accel = min(accel + self.jerk * dt, self.accel)
+                speed = min(speed + accel * dt, self.max_speed)
+                distance += speed * dt
+                distances.append(distance)
+                speeds.append(speed)
+            self._ramp = (distances, speeds)
+        return self._ramp
+
+    def speed_at(self, step, steps):
+        """
+        Speed of step number `step` (0-based) in a move of `steps` steps.
+        """
+        distance = min(step, steps - 1 - step)  # steps from the nearest end of the move
+        if self.kind == "constant":
+            return self.max_speed
+        if self.kind == "trapezoidal":
+            speed = math.sqrt(self.start_speed ** 2 + 2 * self.accel * distance)
+        else:
+            distances, speeds = self._ramp_table()
+            speed = speeds[min(bisect.bisect_left(distances, distance), len(speeds) - 1)]
+        return min(speed, self.max_speed)
+
+    def runs(self, steps):
+        """
+        Pulse timing of a move as [(half period in seconds, count)], with
+        consecutive steps of the same half period (to the µs) grouped together.
+        """
+        runs = []
+        for step in range(steps):
+            half_us = max(1, round(500_000 / self.speed_at(step, steps)))
+            if runs and runs[-1][0] == half_us:
+                runs[-1][1] += 1
+            else:
+                runs.append([half_us, 1])
+        return [(half_us / 1_000_000, count) for half_us, count in runs]
+
+    def elapsed(self, step, steps):
+        """
+        Time from the start of a move of `steps` steps until step number `step` is sent, in seconds.
+        """
+        elapsed = 0.0
+        for delay, count in self.runs(steps):
+            if step < count:
+                return elapsed + 2 * delay * step
+            elapsed += 2 * delay * count
+            step -= count
+        return elapsed
+
+    def step_times(self, steps):
+        """
+        elapsed() of every step of a move of `steps` steps at once, in seconds:
+        item k is when step k is sent; the last item (k = steps) is the duration.
+        """
+        times, elapsed = [0.0], 0.0
+        for delay, count in self.runs(steps):
+            for _ in range(count):
+                elapsed += 2 * delay
+                times.append(elapsed)
+        return times
+
+    def duration(self, steps):
+        """
+        Estimated time of a move of `steps` steps, in seconds.
+        """
+        return sum(2 * delay * count for delay, count in self.runs(steps))
+
+    def brake_time(self):
+        """
+        Time to brake from cruise speed down to start_speed, in seconds (0 for "constant").
+        """
+        if self.kind == "constant":
+            return 0.0
+        if self.kind == "trapezoidal":
+            return (self.max_speed - self.start_speed) / self.accel
+        distances, _ = self._ramp_table()
+        return (len(distances) - 1) * MotionProfile.RAMP_DT
+
+
+class SimulatedGPIO:
+    """
+    Stand-in for the RPi.GPIO calls used by the motor, so the controller and
+    pulse engines run on any Linux box. Keeps pin levels and counts rising edges.
+    """
+    BOARD = "BOARD"
+    BCM = "BCM"
+    OUT = "OUT"
+    IN = "IN"
+    PUD_UP = "PUD_UP"
+    HIGH = 1
+    LOW = 0
+
+    def __init__(self):
+        self.mode = None
+        self.pins: dict[int, int] = {}
+        self.rising_edges: dict[int, int] = {}
+
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setup(self, pin, direction, initial=LOW, pull_up_down=None):
+        if direction == self.OUT:
+            self.pins[pin] = initial
+        else:
+            self.pins[pin] = self.HIGH if pull_up_down == self.PUD_UP else self.LOW
+        self.rising_edges.setdefault(pin, 0)
+
+    def output(self, pin, value):
+        if pin not in self.pins:
+            raise RuntimeError(f"GPIO {pin} no está configurado como salida")
+        if value and not self.pins[pin]:
+            self.rising_edges[pin] += 1
+        self.pins[pin] = int(bool(value))
+
+    def input(self, pin):
+        return self.pins.get(pin, self.LOW)
+
+    def cleanup(self, pins=None):
+        for pin in ([pins] if isinstance(pins, int) else pins or list(self.pins)):
+            self.pins.pop(pin, None)
+        if pins is None:
+            self.mode = None
+
+
+class SleepPulseEngine:
+    """
+    Toggles the STEP pin from Python with time.sleep (the original loop).
+    Timing depends on the scheduler and the GIL; used as fallback.
+    """
+    name = "sleep"
+
+    def __init__(self, gpio, step_pin):
+        self.gpio = gpio
+        self.step_pin = step_pin
+        self._stopped = False
+
+    def pulse(self, steps, delay):
+        return self.play([(delay, steps)])
+
+    def play(self, runs):
+        """
+        Plays [(half period, count)] runs; returns the number of steps sent.
+        """
+        played = 0
+        for delay, count in runs:
+            for _ in range(count):
+                if self._stopped:
+                    return played
+                self.gpio.output(self.step_pin, self.gpio.HIGH)
+                time.sleep(delay)
+                self.gpio.output(self.step_pin, self.gpio.LOW)
+                time.sleep(delay)
+                played += 1
+        return played
+
+    def reset(self):
+        # A new move starts: forget the stop of the previous one
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def close(self):
+        pass
+
+
+class PigpioPulseEngine:
+    """
+    Hardware-timed pulses: the step waveform is built once per delay and the
+    pigpio daemon plays it through DMA, repeated with wave_chain loops.
+    Acceleration ramps are sent as one-off waves holding every pulse.
+    The last MAX_CACHED_WAVES loop waves are kept. A move that holds more ramp
+    pulses or chain than the daemon can take at once is played in chunks,
+    with a pause of a few ms between them.
+    Requires the pigpiod daemon running.
+    """
+    name = "pigpio"
+    MAX_LOOP = 65535  # wave_chain repeat counter is 16 bits
+    LOOP_MIN_STEPS = 16  # shorter runs go into the ramp waves instead of a cached loop
+    MAX_RAMP_PULSES = 5000  # pulses per ramp wave, well under the daemon limit
+    MAX_CACHED_WAVES = 32  # loop waves kept between moves, least recently used deleted first
+    MAX_CHAIN_BYTES = 600  # size limit of a wave_chain program
+    LOOP_CHAIN_BYTES = 7  # [255, 0, wave, 255, 1, x, y]
+
+    def __init__(self, step_pin_bcm, host=None):
+        if pigpio is None:
+            raise RuntimeError("pigpio no está instalado")
+        self.pi = pigpio.pi(host) if host else pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("No se pudo conectar con el daemon pigpiod")
+        self.step_pin = step_pin_bcm
+        self._stopped = False
+        self._waves: dict[int, int] = {}  # {half period in µs: wave id}, least recently used first
+        # Pulses the daemon holds for all waves at once (a step pulse takes about two control
+        # blocks), less room for the cached loops and the loops of one chunk
+        limit = min(self.pi.wave_get_max_pulses(), self.pi.wave_get_max_cbs() // 2)
+        loops = self.MAX_CACHED_WAVES + self.MAX_CHAIN_BYTES // self.LOOP_CHAIN_BYTES
+        self.ramp_budget = max(2 * self.LOOP_MIN_STEPS, limit - 2 * loops)
+
+    def _wave(self, half_period_us, keep=()):
+        # Loop wave of a half period; evicts the least recently used ones not in keep
+        wave_id = self._waves.pop(half_period_us, None)
+        if wave_id is None:
+            stale = [old for old in self._waves if old not in keep]
+            for old in stale[:max(0, len(self._waves) + 1 - self.MAX_CACHED_WAVES)]:
+                self.pi.wave_delete(self._waves.pop(old))
+            self.pi.wave_add_generic([
+                pigpio.pulse(1 << self.step_pin, 0, half_period_us),
+                pigpio.pulse(0, 1 << self.step_pin, half_period_us),
+            ])
+            wave_id = self.pi.wave_create()
+        self._waves[half_period_us] = wave_id
+        return wave_id
+
+    @staticmethod
+    def build_chain(wave_id, steps):
+        """
+        wave_chain program playing wave_id `steps` times: blocks of
+        [loop start, wave, loop end x y] repeating x + 256*y times each.
+        """
+        chain = []
+        while steps > 0:
+            count = min(steps, PigpioPulseEngine.MAX_LOOP)
+            chain += [255, 0, wave_id, 255, 1, count & 0xFF, count >> 8]
+            steps -= count
+        return chain
+
+    def pulse(self, steps, delay):
+        return self.play([(delay, steps)])
+
+    def chunks(self, runs):
+        """
+        Splits [(half period µs, count)] runs into chunks the daemon can hold at
+        once: lists of (half period µs, count, loop) with at most ramp_budget ramp
+        pulses and a wave_chain program of at most MAX_CHAIN_BYTES.
+        """
+        chunk, pulses, size = [], 0, 0
+        for half_period_us, count in runs:
+            loop = count >= self.LOOP_MIN_STEPS
+            while count > 0:
+                if loop:
+                    take = count
+                    cost = self.LOOP_CHAIN_BYTES * -(-count // self.MAX_LOOP)
+                else:
+                    take = min(count, (self.ramp_budget - pulses) // 2)
+                    cost = 1 + take * 2 // self.MAX_RAMP_PULSES  # ramp waves in the chain, at most
+                if chunk and (take == 0 or size + cost > self.MAX_CHAIN_BYTES):
+                    yield chunk
+                    chunk, pulses, size = [], 0, 0
+                    continue
+                chunk.append((half_period_us, take, loop))
+                count -= take
+                size += cost
+                pulses += 0 if loop else 2 * take
+        if chunk:
+            yield chunk
+
+    def _play_chunk(self, chunk):
+        # Builds the waves of a chunk, plays them and frees the ramp waves; False if stopped before sending
+        chain, ramp_waves, pulses = [], [], []
+        keep = {half_period_us for half_period_us, _, loop in chunk if loop}
+        # Loop waves first: the daemon only reuses the memory of deleted waves that
+        # have no live wave after them, so the ramp waves must be the last ones
+        for half_period_us in keep:
+            self._wave(half_period_us, keep)
+
+        def flush():
+            if pulses:
+                self.pi.wave_add_generic(pulses)
+                wave_id = self.pi.wave_create()
+                ramp_waves.append(wave_id)
+                chain.append(wave_id)
+                pulses.clear()
+
+        try:
+            for half_period_us, count, loop in chunk:
+                if loop:
+                    flush()
+                    chain += self.build_chain(self._wave(half_period_us, keep), count)
+                    continue
+                for _ in range(count):
+                    pulses.append(pigpio.pulse(1 << self.step_pin, 0, half_period_us))
+                    pulses.append(pigpio.pulse(0, 1 << self.step_pin, half_period_us))
+                    if len(pulses) >= self.MAX_RAMP_PULSES:
+                        flush()
+            flush()
+            if self._stopped:
+                return False  # stopped while the waves were being built
+            self.pi.wave_chain(chain)
+            while self.pi.wave_tx_busy():
+                time.sleep(0.005)
+            return True
+        finally:
+            for wave_id in ramp_waves:
+                self.pi.wave_delete(wave_id)
+
+    def play(self, runs):
+        """
+        Plays [(half period, count)] runs; returns the number of steps sent,
+        or None if stopped halfway (the daemon does not report the count).
+        """
+        self.pi.set_mode(self.step_pin, pigpio.OUTPUT)
+        runs = [(max(1, int(round(delay * 1_000_000))), count) for delay, count in runs if count > 0]
+        sent = False
+        for chunk in self.chunks(runs):
+            if self._stopped:
+                break
+            sent = self._play_chunk(chunk) or sent
+        if self._stopped or not sent:
+            return None if sent else 0  # 0: nothing to send, or stopped before sending
+        return sum(count for _, count in runs)
+
+    def reset(self):
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+        self.pi.wave_tx_stop()
+
+    def close(self):
+        self.pi.wave_clear()
+        self._waves = {}
+        self.pi.stop()
+
+
+class SimulatedPulseEngine:
+    """
+    Plays the same pulse runs as PigpioPulseEngine against a SimulatedGPIO:
+    counts the steps and waits the exact waveform time (if realtime).
+    """
+    name = "simulated"
+
+    def __init__(self, gpio, step_pin, realtime=True):
+        self.gpio = gpio
+        self.step_pin = step_pin
+        self.realtime = realtime
+        self.steps_sent = 0
+        self._stopped = False
+
+    def pulse(self, steps, delay):
+        return self.play([(delay, steps)])
+
+    def play(self, runs):
+        """
+        Plays [(half period, count)] runs; returns the number of steps sent.
+        """
+        played = 0
+        for delay, count in runs:
+            if self.realtime and not self._stopped:
+                time.sleep(count * 2 * delay)
+            if self._stopped:
+                break
+            self.gpio.rising_edges[self.step_pin] = self.gpio.rising_edges.get(self.step_pin, 0) + count
+            self.steps_sent += count
+            played += count
+        return played
+
+    def reset(self):
+        self._stopped = False
+
+    def stop(self):
+        self._stopped = True
+
+    def close(self):
+        pass
+
 
 class StepperMotorController:
     """
     A utility class to control a stepper motor using a TB6600 driver.
     """
 
-    def __init__(self, dir_pin, step_pin, enable_pin=None):
+    # Pulse engine: "auto" (pigpio if the daemon is reachable, else sleep), "pigpio", "sleep" or "simulated"
+    PULSE_ENGINE = "auto"
+    STEPS_PER_REV = 200 * 20  # 200 full steps x 20 microsteps per turn of the table
+    MOTION_LOG_SIZE = 200  # moves kept in motion_log
+
+    def __init__(self, dir_pin, step_pin, enable_pin=None, engine=None, gpio=None, profile=None,
+                 endstop_pin=None):
         """
         Initialize the GPIO pins for the stepper motor.
 
         :param dir_pin: GPIO pin connected to the DIR input of TB6600.
         :param step_pin: GPIO pin connected to the STEP input of TB6600.
         :param enable_pin: (Optional) GPIO pin connected to the ENA input of TB6600.
+        :param engine: (Optional) Pulse engine name, defaults to PULSE_ENGINE.
+        :param gpio: (Optional) GPIO module/object; defaults to RPi.GPIO or SimulatedGPIO.
+        :param profile: (Optional) MotionProfile used by every move; None keeps the fixed delay.
+        :param endstop_pin: (Optional) GPIO pin of the homing switch (active low, pulled up).
         """
+        self.profile = profile
         self.dir_pin = dir_pin
         self.step_pin = step_pin
         self.enable_pin = enable_pin
+        self.endstop_pin = endstop_pin
+        self.position = 0  # absolute position in steps from the zero
+        self.homed = False
+        self._target = 0.0  # commanded position in steps, keeps the fractions of a step
+        self._motion = None  # (start time, start position, direction, runs) of the move being played
+        # Recent moves as [start time, start position, direction, runs, steps sent or None while playing]
+        self.motion_log = deque(maxlen=self.MOTION_LOG_SIZE)
+        self.engine_name = engine or StepperMotorController.PULSE_ENGINE
+
+        if gpio is None and (GPIO is None or self.engine_name == "simulated"):
+            if self.engine_name != "simulated":
+                print("RPi.GPIO no disponible, usando GPIO simulado")
+            gpio = SimulatedGPIO()
+        self.gpio = gpio or GPIO
+        self.engine = None
+        self.in_session = False
+        self._executor = None
+        self._moves: list[Future] = []  # queued moves not yet collected by wait_moves
+        self._moves_lock = threading.Lock()
+        self._generation = 0  # bumped by cancel_moves; moves queued before it are cancelled
+        self._move_generation = None  # generation of the queued move being run on the motor thread
+
+    def _pulse_engine(self):
+        """
+        Creates the pulse engine on first use, falling back to the sleep loop.
+        """
+        if self.engine is not None:
+            return self.engine
+
+        if isinstance(self.gpio, SimulatedGPIO) and self.engine_name in ("auto", "simulated"):
+            self.engine = SimulatedPulseEngine(self.gpio, self.step_pin)
+        elif self.engine_name in ("auto", "pigpio"):
+            try:
+                self.engine = PigpioPulseEngine(BOARD_TO_BCM.get(self.step_pin, self.step_pin))
+            except Exception as e:
+                print(f"Pulsos por hardware no disponibles, usando bucle con sleep: {e}")
+
+        if self.engine is None:
+            self.engine = SleepPulseEngine(self.gpio, self.step_pin)
+        print(f"Motor de pulsos: {self.engine.name}")
+        return self.engine
 
-    def move_steps(self, steps, direction=True, delay=0.001):
+    def move_steps(self, steps, direction=True, delay=0.001, profile=None):
         """
         Move the stepper motor a specific number of steps.
 
         :param steps: Number of steps to move.
         :param direction: Direction of rotation. True for one direction, False for the other.
-        :param delay: Delay between steps in seconds.
+        :param delay: Delay between steps in seconds, used when there is no motion profile.
+        :param profile: (Optional) MotionProfile for this move; defaults to self.profile.
         """
-        self.motor_init()
+        profile = profile or self.profile
+        runs = profile.runs(steps) if profile else [(delay, steps)]
+        self._target += steps if direction else -steps
+        self._step(steps, direction, runs)
 
-        GPIO.output(self.dir_pin, GPIO.HIGH if direction else GPIO.LOW)
-        for _ in range(steps):
-            GPIO.output(self.step_pin, GPIO.HIGH)
-            time.sleep(delay)
-            GPIO.output(self.step_pin, GPIO.LOW)
-            time.sleep(delay)
+    def _step(self, steps, direction, runs):
+        """
+        Play the runs and update the absolute position with the steps actually sent.
+        """
+        if not self.in_session:
+            self.motor_init()
+        try:
+            self.gpio.output(self.dir_pin, self.gpio.HIGH if direction else self.gpio.LOW)
+            engine = self._pulse_engine()
+            # The stop flag is cleared here, when the move starts, and only then is the
+            # generation checked: a cancel_moves in between is caught by one or the other
+            engine.reset()
+            generation = self._move_generation
+            if generation is not None and generation != self._generation:
+                self._target = float(self.position)
+                raise CancelledError()
+            self._motion = (time.monotonic(), self.position, direction, runs)
+            entry = [*self._motion, None]
+            self.motion_log.append(entry)
+            played = engine.play(runs)
+            entry[4] = played if played is not None else sum(count for _, count in runs)
+        finally:
+            self._motion = None
+            if not self.in_session:
+                self.cleanup()
 
-        self.cleanup()
+        if played is None:
+            print("Movimiento interrumpido: posición desconocida, hace falta volver al cero")
+            self.homed = False
+            self._target = float(self.position)
+            return
+        self.position += played if direction else -played
+        if played != steps:
+            self._target = float(self.position)  # stopped halfway: do not resume the rest
 
-    def move_degs(self, degrees, direction=True, delay=0.001):
+    def move_degs(self, degrees, direction=True, delay=0.001, profile=None):
         """
         Mueve el motor paso a paso un número específico de grados.
 
         :param degrees: Número de grados a mover.
         :param direction: Dirección de rotación. True para una dirección, False para la otra.
-        :param delay: Retardo entre pasos en segundos.
+        :param delay: Retardo entre pasos en segundos, si no hay perfil de movimiento.
+        :param profile: (Opcional) MotionProfile del movimiento; por defecto self.profile.
+        """
+        steps_per_degree = self.STEPS_PER_REV / 360  # 11.11 pasos por grado
+        # La fracción de paso se acumula en _target: 72 movimientos de 5° son justo una vuelta
+        self._target += degrees * steps_per_degree * (1 if direction else -1)
+        steps = round(self._target) - self.position
+        profile = profile or self.profile
+        runs = profile.runs(abs(steps)) if profile else [(delay, abs(steps))]
+        with CaptureMetrics.span("motor_move", degrees=degrees, steps=abs(steps),
+                                 profile=profile.name if profile else None):
+            self._step(abs(steps), steps >= 0, runs)
+
+    def move_to(self, degrees, delay=0.001, profile=None):
+        """
+        Mueve la mesa a un ángulo absoluto (desde el cero) por el camino más corto.
+
+        :param degrees: Ángulo destino; 360 equivale a 0.
+        :param delay: Retardo entre pasos en segundos, si no hay perfil de movimiento.
+        :param profile: (Opcional) MotionProfile del movimiento; por defecto self.profile.
+        """
+        current = self._target * 360 / self.STEPS_PER_REV
+        delta = (degrees - current + 180) % 360 - 180
+        if delta:
+            self.move_degs(abs(delta), delta > 0, delay, profile)
+
+    @property
+    def angle(self):
+        """
+        Current angle of the table in degrees, 0 <= angle < 360.
+        """
+        return (self.position % self.STEPS_PER_REV) * 360 / self.STEPS_PER_REV
+
+    def motion_started_at(self):
+        """
+        time.monotonic() at which the move being played started, or None if the motor is stopped.
+        """
+        motion = self._motion
+        return motion[0] if motion else None
+
+    def estimated_angle(self, at=None):
+        """
+        Angle of the table at time `at` (time.monotonic(), default now), estimated
+        from the timing of the moves in motion_log.
+        """
+        at = time.monotonic() if at is None else at
+        for started, position, direction, runs, played in reversed(self.motion_log):
+            if started > at:
+                continue
+            elapsed = at - started
+            done = 0
+            for delay, count in runs:
+                if elapsed < 2 * delay * count:
+                    done += max(0, int(elapsed / (2 * delay)))
+                    break
+                elapsed -= 2 * delay * count
+                done += count
+            if played is not None:
+                done = min(done, played)
+            position += done if direction else -done
+            return (position % self.STEPS_PER_REV) * 360 / self.STEPS_PER_REV
+        return self.angle
+
+    def home(self, delay=0.002, max_degrees=370):
+        """
+        Set the zero of the table. With an endstop, turn forward until it triggers;
+        otherwise the current position becomes the software zero.
+
+        :param delay: Delay between steps while seeking the endstop.
+        :param max_degrees: Give up after turning this much without reaching it.
+        :raises RuntimeError: If the endstop is not reached.
         """
-        steps_per_degree = 200 * 20 / 360  # 11.11 pasos por grado
-        steps = int(degrees * steps_per_degree)
-        self.move_steps(steps, direction, delay)
+        if self.endstop_pin is not None:
+            if not self.in_session:
+                self.motor_init()
+            try:
+                self.gpio.output(self.dir_pin, self.gpio.HIGH)
+                engine = self._pulse_engine()
+                engine.reset()
+                for _ in range(int(max_degrees * self.STEPS_PER_REV / 360)):
+                    if self.gpio.input(self.endstop_pin) == self.gpio.LOW:
+                        break
+                    engine.play([(delay, 1)])
+                else:
+                    raise RuntimeError(f"No se alcanzó el final de carrera en {max_degrees}°")
+            finally:
+                if not self.in_session:
+                    self.cleanup()
+        self.position = 0
+        self._target = 0.0
+        self.motion_log.clear()  # logged positions are from before the new zero
+        self.homed = True
+        print("Motor en el cero")
+
+    def use_profile(self, name, profiles):
+        """
+        Selects the named motion profile for the next moves.
+
+        :param name: Profile name, e.g. the one stored in a preset.
+        :param profiles: {name: settings} dict of available profiles.
+        :return: The MotionProfile, or None (fixed delay) if the name is unknown.
+        """
+        settings = profiles.get(name)
+        if settings is None:
+            print(f"Perfil de movimiento desconocido: {name}, usando retardo fijo")
+        self.profile = MotionProfile.from_settings(name, settings) if settings else None
+        return self.profile
+
+    def open_session(self) -> bool:
+        """
+        Sets the pins up once and keeps the driver enabled until close_session,
+        so the moves of a scan skip the per-move setup and cleanup.
+        """
+        if self.in_session:
+            return True
+        if not self.motor_init():
+            return False
+        self._pulse_engine()
+        self.in_session = True
+        return True
+
+    def close_session(self):
+        """
+        Cancels any queued move, disables the driver and releases the motor pins.
+        """
+        if not self.in_session:
+            return
+        self.cancel_moves()
+        self.in_session = False
+        pins = [self.dir_pin, self.step_pin]
+        if self.endstop_pin is not None:
+            pins.append(self.endstop_pin)
+        try:
+            if self.enable_pin is not None:
+                self.gpio.output(self.enable_pin, self.gpio.HIGH)  # Disable the driver
+                pins.append(self.enable_pin)
+        finally:
+            self.gpio.cleanup(pins)
+
+    def __enter__(self):
+        """
+        with motor: ... runs the block inside a session; pins are released on exit or error.
+        """
+        if not self.open_session():
+            raise RuntimeError("No se pudieron configurar los pines del motor")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close_session()
+        return False
+
+    def move_degs_async(self, degrees, direction=True, delay=0.001, profile=None, on_done=None) -> Future:
+        """
+        Queue a move on the motor thread and return its Future right away.
+        Moves run one after another, in the order they were queued.
+
+        :param degrees: Degrees to move.
+        :param direction: Direction of rotation.
+        :param delay: Delay between steps in seconds, used when there is no motion profile.
+        :param profile: (Optional) MotionProfile for this move; defaults to self.profile.
+        :param on_done: (Optional) on_done(future) called when the move finishes, fails or is cancelled.
+        :return: Future whose result() raises CancelledError if the move was cancelled.
+        """
+        return self._submit(on_done, self.move_degs, degrees, direction, delay, profile)
+
+    def move_to_async(self, degrees, delay=0.001, profile=None, on_done=None) -> Future:
+        """
+        Queue a move_to (absolute angle, shortest path) on the motor thread; see move_degs_async.
+        The path is chosen when the move starts, after the moves queued before it.
+        """
+        return self._submit(on_done, self.move_to, degrees, delay, profile)
+
+    def _submit(self, on_done, move, *args) -> Future:
+        with self._moves_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="motor")
+            future = self._executor.submit(self._queued_move, self._generation, move, *args)
+            self._moves.append(future)
+        if on_done is not None:
+            future.add_done_callback(on_done)
+        return future
+
+    def _queued_move(self, generation, move, *args):
+        if generation != self._generation:
+            raise CancelledError()
+        self._move_generation = generation  # checked again by _step once the engine is reset
+        try:
+            move(*args)
+        finally:
+            self._move_generation = None
+        if generation != self._generation:
+            raise CancelledError()  # stopped halfway by cancel_moves
+
+    def wait_moves(self, timeout=None):
+        """
+        Block until every queued move is done.
+
+        :param timeout: (Optional) Seconds to wait for each move.
+        :raises CancelledError: If a move was cancelled; other move errors are re-raised too.
+        """
+        with self._moves_lock:
+            moves, self._moves = self._moves, []
+        for future in moves:
+            future.result(timeout)
+
+    def cancel_moves(self, timeout=5.0):
+        """
+        Cancel the queued moves and stop the one being played, waiting up to
+        `timeout` seconds for it to halt.
+        """
+        with self._moves_lock:
+            self._generation += 1
+            moves, self._moves = self._moves, []
+        for future in moves:
+            future.cancel()
+        self.stop()
+        wait(moves, timeout=timeout)
+
+    def stop(self):
+        """
+        Stops the pulses being played, if any.
+        """
+        if self.engine is not None:
+            self.engine.stop()
 
     def cleanup(self):
         """
         Clean up GPIO settings.
         """
-        GPIO.cleanup()
+        self.gpio.cleanup()
 
     def motor_init(self) -> bool:
         try:
             print("Seteando pineas a modo board")
-            GPIO.setmode(GPIO.BOARD)
+            self.gpio.setmode(self.gpio.BOARD)
             print("Seteando dir pin como GPIO out")
-            GPIO.setup(self.dir_pin, GPIO.OUT)
+            self.gpio.setup(self.dir_pin, self.gpio.OUT)
             print("Seteando step pin como GPIO out")
-            GPIO.setup(self.step_pin, GPIO.OUT)
+            self.gpio.setup(self.step_pin, self.gpio.OUT)
             if self.enable_pin is not None:
-                GPIO.setup(self.enable_pin, GPIO.OUT)
-                GPIO.output(self.enable_pin, GPIO.LOW)  # Enable the driver
-            
+                self.gpio.setup(self.enable_pin, self.gpio.OUT)
+                self.gpio.output(self.enable_pin, self.gpio.LOW)  # Enable the driver
+            if self.endstop_pin is not None:
+                self.gpio.setup(self.endstop_pin, self.gpio.IN, pull_up_down=self.gpio.PUD_UP)
+
             return True
-        
+
         except Exception as e:
             print(f"Setear los pines fallo con {e}")
             self.cleanup()
@@ -80,4 +823,4 @@ class StepperMotorController:
 # for i in range(0, 4):
 #     motor.move_degs(45)
 #     time.sleep(5)
-# motor.cleanup()
\ No newline at end of file
+# motor.cleanup()
@@ -1,8 +1,10 @@
 import os
+import base64
 import flet as ft
 from datetime import datetime
-from src.camera_controller import GPhoto2 as gp
+from src.camera_controller import GPhoto2 as gp, LiveView
 from src.resources.properties import Properties as Props
+from src.resources.utils.executor_controller import Executor
 
 def test_camera_is_not_selected():
     return not all([Props.CURRENT_TEST_CAMERA])
@@ -10,6 +12,9 @@ def test_camera_is_not_selected():
 def is_testing():
     return Props.IS_TESTING
 
+def is_live_view():
+    return Props.IS_LIVE_VIEW
+
 class ImageViewer(ft.Container):
     """
     A component for displaying an image preview with camera controls.
@@ -27,6 +32,10 @@ class ImageViewer(ft.Container):
         """
         super().__init__()
         self.page = page
+        self.live_view: LiveView = None
+        self.paused_live_view: str = None  # camera port of the live view stopped for a running job
+        # Live view polls the camera; scans, bursts and sweeps need it for themselves
+        Executor.add_hooks(on_start=self.pause_live_view, on_finish=self.resume_live_view)
 
         # CONTROLS
         self.camera_dropdown = ft.Dropdown(
@@ -45,6 +54,15 @@ class ImageViewer(ft.Container):
             on_click=self.__test_button_clicked
         )
 
+        self.live_button = ft.OutlinedButton(
+            text="En vivo",
+            icon=ft.Icons.VIDEOCAM,
+            style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=Props.BORDER_RADIUS)),
+            height=Props.BUTTON_HEIGHT,
+            width=Props.BUTTON_WIDTH,
+            on_click=self.__live_button_clicked
+        )
+
         self.view_image = ft.Container(
             alignment=ft.alignment.center,
             width= Props.IMAGE_VIEW_WIDTH,
@@ -67,7 +85,8 @@ class ImageViewer(ft.Container):
                     ft.Row(
                         [
                             self.camera_dropdown,
-                            self.test_button
+                            self.test_button,
+                            self.live_button
                         ],
                         alignment=ft.MainAxisAlignment.CENTER
                     )
@@ -86,6 +105,13 @@ class ImageViewer(ft.Container):
 
         return cameras_list
 
+    def refresh_cameras(self):
+        """
+        Reloads the camera options once camera discovery finishes.
+        """
+        self.camera_dropdown.options = self.__get_cameras_options()
+        self.camera_dropdown.update()
+
     def __camera_dropdown_changed(self, e):
         """
         Update camera selection for testing.
@@ -93,6 +119,112 @@ class ImageViewer(ft.Container):
         """
         Props.CURRENT_TEST_CAMERA = self.camera_dropdown.value
 
+    def __live_button_clicked(self, e):
+        """
+        Toggles the live-view preview of the selected camera.
+        :return:
+        """
+        if is_live_view():
+            self.stop_live_view()
+            return
+
+        if is_testing():
+            self.show_alert("Por favor espera, ya hay una prueba en curso.")
+            return
+
+        if Executor.is_running():
+            self.show_alert("Espera, hay una rutina en curso.")
+            return
+
+        if test_camera_is_not_selected():
+            self.show_alert("Por favor, selecciona una cámara para ver en vivo.")
+            return
+
+        __camera: str = Props.CAMERAS_DICT.get(Props.CURRENT_TEST_CAMERA)
+        if not __camera:
+            self.show_alert("La cámara seleccionada no está conectada.")
+            return
+
+        print("Iniciando vista en vivo de la cámara " + Props.CURRENT_TEST_CAMERA)
+        self.start_live_view(__camera)
+
+    def start_live_view(self, camera_port: str):
+        """
+        Starts the live-view preview of a camera port.
+        :return:
+        """
+        Props.IS_LIVE_VIEW = True
+        self.live_button.text = "Detener"
+        self.live_button.icon = ft.Icons.STOP
+        self.live_button.update()
+
+        self.live_view = LiveView(
+            camera_port=camera_port,
+            on_frame=self.__show_live_frame,
+            max_fps=Props.LIVE_VIEW_MAX_FPS,
+            on_stop=self.__live_view_lost
+        )
+        self.live_view.start()
+
+    def pause_live_view(self):
+        """
+        Stops the live view before a job takes the cameras, waiting for its last
+        preview to release the port. Called by the Executor on its worker thread.
+        :return:
+        """
+        live_view = self.live_view
+        if live_view is None:
+            return
+        self.paused_live_view = live_view.camera_port
+        self.stop_live_view()
+        live_view.join(timeout=Props.LIVE_VIEW_RELEASE_TIMEOUT)
+
+    def resume_live_view(self):
+        """
+        Restarts the live view paused by pause_live_view, if its camera is still connected.
+        Called by the Executor on its worker thread once the job ended.
+        :return:
+        """
+        camera_port, self.paused_live_view = self.paused_live_view, None
+        if camera_port and camera_port in Props.CAMERAS_DICT.values():
+            print(f"Reanudando vista en vivo en {camera_port}")
+            self.start_live_view(camera_port)
+
+    def __live_view_lost(self):
+        """
+        Called by LiveView when the camera stopped sending frames: resets the toggle.
+        :return:
+        """
+        # A newer live view may have started since; only reset the one that stopped
+        if self.live_view is not None and not self.live_view.running:
+            self.stop_live_view()
+            self.show_alert("Vista en vivo detenida: la cámara no envía imágenes.")
+
+    def __show_live_frame(self, frame: bytes):
+        """
+        Pushes a live-view frame to the image control.
+        :return:
+        """
+        self.view_image.content.src_base64 = base64.b64encode(frame).decode()
+        self.view_image.content.update()
+
+    def stop_live_view(self):
+        """
+        Stops the live-view preview, if running.
+        :return:
+        """
+        if self.live_view is not None:
+            self.live_view.stop()
+            print(f"Vista en vivo detenida: {self.live_view.frames} frames, {self.live_view.dropped} descartados")
+            self.live_view = None
+
+        Props.IS_LIVE_VIEW = False
+        self.view_image.content.src_base64 = None
+        self.view_image.content.update()
+        self.live_button.text = "En vivo"
+        self.live_button.icon = ft.Icons.VIDEOCAM
+        self.live_button.update()
+
     def __test_button_clicked(self, e):
         """
         Action for test button
@@ -100,6 +232,9 @@ class ImageViewer(ft.Container):
         """
 
         print("Boton de probar en tab Capturar clickeado")
+
+        if is_live_view():
+            self.stop_live_view()
         
         __file_name: str = f"test_{datetime.now().strftime('%H-%M-%S')}.jpg"
 
@@ -176,6 +311,7 @@ class ImageViewer(ft.Container):
         :return:
         """
         self.test_button.style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=Props.BORDER_RADIUS))
+        self.live_button.style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=Props.BORDER_RADIUS))
         self.camera_dropdown.border_radius=Props.BORDER_RADIUS
 
     def update_view_image_size(self):
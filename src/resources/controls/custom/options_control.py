@@ -1,7 +1,8 @@
 import flet as ft
 import time
 from src.resources.properties import Properties as Props
-from src.camera_controller import GPhoto2 as gp
+from src.resources.utils.cameras_controller import Cameras
+from src.resources.utils.scan_controller import Scan
 from src.resources.controls.custom.loading_dialog import LoadingDialog
 
 
@@ -10,7 +11,7 @@ class OptionsControl(ft.Container):
     A container control for displaying configurable scan options.
 
     This component contains dropdowns for selecting scan frequency,
-    image format, and resolution. It is designed to be placed in the
+    image format, resolution and the motor motion profile. It is designed to be placed in the
     interface where users configure scan parameters before initiating
     a capture or scan operation.
 
@@ -18,6 +19,8 @@ class OptionsControl(ft.Container):
         freq_dropdown (ft.Dropdown): Dropdown for selecting frequency in degrees per shot.
         format_dropdown (ft.Dropdown): Dropdown for selecting image format (e.g., RAW, JPG).
         resolution_dropdown (ft.Dropdown): Dropdown for selecting output resolution.
+        motion_dropdown (ft.Dropdown): Dropdown for selecting the motion profile (light or heavy products).
+        settle_dropdown (ft.Dropdown): Dropdown for selecting how the table settles before each shot.
     """
 
     def __init__(self):
@@ -28,18 +31,16 @@ class OptionsControl(ft.Container):
             - Frequency selection dropdown
             - Format selection dropdown
             - Resolution selection dropdown
+            - Motion profile selection dropdown
+            - Settle strategy selection dropdown
 
         All controls are arranged vertically with standard padding.
         """
         super().__init__()
 
         self.freq_dropdown = ft.Dropdown(
-            options=[
-                ft.DropdownOption(text="5 [DEG/SHOT]"),
-                ft.DropdownOption(text="45 [DEG/SHOT]"),
-                ft.DropdownOption(text="90 [DEG/SHOT]"),
-                ft.DropdownOption(text="360 [DEG/SHOT]")
-            ],
+            # One option per scan plan (see Props.SCAN_PLANS_DIRECTORY)
+            options=[ft.DropdownOption(text=name) for name in Scan.plans()],
             value=None,
             label="Frecuencia",
             width = Props.CHECKBOX_WIDTH,
@@ -65,12 +66,32 @@ class OptionsControl(ft.Container):
             on_change=self.__resolution_dropdown_changed
         )
 
+        self.motion_dropdown = ft.Dropdown(
+            options=[ft.DropdownOption(text=name) for name in Props.MOTION_PROFILES.keys()],
+            value=Props.CURRENT_MOTION_PROFILE,
+            label="Movimiento",
+            width = Props.CHECKBOX_WIDTH,
+            border_radius = Props.BORDER_RADIUS,
+            on_change=self.__motion_dropdown_changed
+        )
+
+        self.settle_dropdown = ft.Dropdown(
+            options=[ft.DropdownOption(text=name) for name in Props.SETTLE_STRATEGIES.keys()],
+            value=Props.CURRENT_SETTLE_STRATEGY,
+            label="Asentamiento",
+            width = Props.CHECKBOX_WIDTH,
+            border_radius = Props.BORDER_RADIUS,
+            on_change=self.__settle_dropdown_changed
+        )
+
         self.content = ft.Container(
             ft.Column(
                 [
                     self.freq_dropdown,
                     self.format_dropdown,
-                    self.resolution_dropdown
+                    self.resolution_dropdown,
+                    self.motion_dropdown,
+                    self.settle_dropdown
                 ]
             ),
             padding = Props.PAGE_PADDING
@@ -129,21 +150,10 @@ class OptionsControl(ft.Container):
         loading_dialog.update_legend(f"Aplicando formato: {Props.CURRENT_FORMAT}")
         print(f"Aplicando formato: {Props.CURRENT_FORMAT}")
 
-        for camera in Props.CAMERAS_LIST:
-            if camera == None:
-                continue
-            
-            loading_dialog.update_legend(f"Aplicando formato a la cámara: {camera}")
-            print(f"Aplicando formato a la cámara: {camera}")
-
-            gp.set_config(
-                camera_port=Props.CAMERAS_DICT[camera],
-                camera_config=Props.FORMAT_CAMERA_CONFIG,
-                config_value=Props.FORMATS_DICT[Props.CURRENT_FORMAT]
-                )
-            
-            loading_dialog.update_legend(f"Formato aplicado correctamente!")
-            print(f"Formato aplicado correctamente!")
+        results = Cameras.apply_to_all({Props.FORMAT_CAMERA_CONFIG: Props.FORMATS_DICT[Props.CURRENT_FORMAT]})
+        for camera, ok in results.items():
+            loading_dialog.update_legend(f"Formato {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
+            print(f"Formato {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
         
         loading_dialog.update_legend(f"Listo!")
         loading_dialog.hide()
@@ -171,35 +181,60 @@ class OptionsControl(ft.Container):
         else:
             Props.CURRENT_FILE_EXTENSION = Props.JPEG_EXTENSION
 
-        for camera in Props.CAMERAS_LIST:
-            if camera == None:
-                continue 
-
-            loading_dialog.update_legend(f"Aplicando resolución a la cámara: {camera}")
-            print(f"Aplicando resolución a la cámara: {camera}")
-
-            gp.set_config(
-                camera_port=Props.CAMERAS_DICT[camera],
-                camera_config=Props.RESOLUTION_CAMERA_CONFIG,
-                config_value=Props.RESOLUTIONS_DICT[Props.CURRENT_RESOLUTION]
-                )
-            
-            loading_dialog.update_legend(f"Resolución aplicada correctamente!")
-            print("Resolucion aplicada correctamente.")
+        results = Cameras.apply_to_all({Props.RESOLUTION_CAMERA_CONFIG: Props.RESOLUTIONS_DICT[Props.CURRENT_RESOLUTION]})
+        for camera, ok in results.items():
+            loading_dialog.update_legend(f"Resolución {'aplicada' if ok else 'no aplicada'} a la cámara: {camera}")
+            print(f"Resolución {'aplicada' if ok else 'no aplicada'} a la cámara: {camera}")
         
         loading_dialog.update_legend(f"Listo!")
         loading_dialog.hide()
 
+    def __motion_dropdown_changed(self,e):
+        """
+        Updates the motion profile used by the motor in the next scans.
+
+        Args:
+            e (ControlEvent): The event triggered when a motion profile is selected.
+
+        Side effects:
+            - Updates the `Props.CURRENT_MOTION_PROFILE` with the selected value.
+        """
+        Props.CURRENT_MOTION_PROFILE = self.motion_dropdown.value
+        print(f"Perfil de movimiento: {Props.CURRENT_MOTION_PROFILE}")
+
+    def __settle_dropdown_changed(self,e):
+        """
+        Updates the settle strategy used before each shot in the next scans.
+
+        Args:
+            e (ControlEvent): The event triggered when a settle strategy is selected.
+
+        Side effects:
+            - Updates the `Props.CURRENT_SETTLE_STRATEGY` with the selected value.
+        """
+        Props.CURRENT_SETTLE_STRATEGY = self.settle_dropdown.value
+        print(f"Asentamiento: {Props.CURRENT_SETTLE_STRATEGY}")
+
     def update_all_radius(self):
         """
         Updates the border radius of all dropdowns in the control.
 
         Side effects:
-            - Sets the border radius of `freq_dropdown`, `format_dropdown`, and `resolution_dropdown` to the value in `Props.BORDER_RADIUS`.
+            - Sets the border radius of `freq_dropdown`, `format_dropdown`, `resolution_dropdown`, `motion_dropdown` and `settle_dropdown` to the value in `Props.BORDER_RADIUS`.
         """
         self.freq_dropdown.border_radius = Props.BORDER_RADIUS
         self.format_dropdown.border_radius = Props.BORDER_RADIUS
         self.resolution_dropdown.border_radius = Props.BORDER_RADIUS
+        self.motion_dropdown.border_radius = Props.BORDER_RADIUS
+        self.settle_dropdown.border_radius = Props.BORDER_RADIUS
+
+    def refresh_cameras(self):
+        """
+        Reloads the format and resolution options once camera discovery finishes.
+        """
+        self.format_dropdown.options = self.__get_format_options()
+        self.resolution_dropdown.options = self.__get_resolution_options()
+        self.update()
 
     def __get_format_options(self):
 
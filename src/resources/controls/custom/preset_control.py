@@ -1,6 +1,5 @@
 import os
 import json
-import time
 import flet as ft
 
 from src.resources.properties import Properties as Props
@@ -9,10 +8,17 @@ from src.motor_controller import StepperMotorController as Motor
 from src.camera_controller import GPhoto2 as gphoto2
 from src.resources.controls.custom.progress_bar import ProgressBar
 from src.resources.controls.custom.image_text_button import ImageTextButton
+from src.resources.utils.cameras_controller import Cameras
+from src.capture_metrics import CaptureMetrics
+from src.resources.utils.tether_controller import Tether
+from src.resources.utils.burst_controller import Burst
+from src.resources.utils.sweep_controller import VideoSweep
+from src.resources.utils.scan_controller import Scan
+from src.resources.utils.executor_controller import Executor
 
 
 def is_scanning():
-    return Props.IS_SCANNING
+    return Props.IS_SCANNING or Executor.is_running()
 
 def no_camera_selected():
     return not any([Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3])
@@ -34,6 +40,7 @@ class PresetControl(ft.Container):
         presets (dict): A dictionary of existing presets loaded from a JSON file.
         options (ft.Container): A container holding various options for preset configurations.
         camera_use (ft.Container): A container for camera usage settings (checkboxes).
+        motor (StepperMotorController): The turntable motor, shared by every control that scans.
         preset_dropdown (ft.Dropdown): A dropdown to select existing presets.
         preset_name_input (ft.TextField): An input field to enter a new preset name.
         apply_button (ft.ElevatedButton): A button to apply the selected preset.
@@ -41,15 +48,12 @@ class PresetControl(ft.Container):
         delete_button (ft.ElevatedButton): A button to delete an existing preset.
         update_button (ft.ElevatedButton): A button to update an existing preset.
     """
-    def __init__(self, page: ft.Page, options: ft.Container, camera_use: ft.Container):
+    def __init__(self, page: ft.Page, options: ft.Container, camera_use: ft.Container, motor: Motor):
 
         super().__init__()
         self.page = page
         self.presets = self.__load_presets()
-        self.motor = Motor(
-            dir_pin=Props.DIR_PIN,
-            step_pin=Props.STEP_PIN
-        )
+        self.motor = motor  # shared with the routines tab, see WorkspaceControl
 
         # OPTIONS INSTANCES
         self.options = options
@@ -240,6 +244,8 @@ class PresetControl(ft.Container):
         __freq = self.options.freq_dropdown.value
         __format = self.options.format_dropdown.value
         __resolution = self.options.resolution_dropdown.value
+        __motion_profile = self.options.motion_dropdown.value
+        __settle_strategy = self.options.settle_dropdown.value
         __use_camera1 = self.camera_use.camera1_checkbox.content.value
         __use_camera2 = self.camera_use.camera2_checkbox.content.value
         __use_camera3 = self.camera_use.camera3_checkbox.content.value
@@ -249,6 +255,8 @@ class PresetControl(ft.Container):
             "frequency": __freq,
             "format": __format,
             "resolution": __resolution,
+            "motion_profile": __motion_profile,
+            "settle_strategy": __settle_strategy,
             "use_camera1": __use_camera1,
             "use_camera2": __use_camera2,
             "use_camera3": __use_camera3
@@ -291,6 +299,8 @@ class PresetControl(ft.Container):
         __freq = self.options.freq_dropdown.value
         __format = self.options.format_dropdown.value
         __resolution = self.options.resolution_dropdown.value
+        __motion_profile = self.options.motion_dropdown.value
+        __settle_strategy = self.options.settle_dropdown.value
         __use_camera1 = self.camera_use.camera1_checkbox.content.value
         __use_camera2 = self.camera_use.camera2_checkbox.content.value
         __use_camera3 = self.camera_use.camera3_checkbox.content.value
@@ -300,6 +310,8 @@ class PresetControl(ft.Container):
             "frequency": __freq,
             "format": __format,
             "resolution": __resolution,
+            "motion_profile": __motion_profile,
+            "settle_strategy": __settle_strategy,
             "use_camera1": __use_camera1,
             "use_camera2": __use_camera2,
             "use_camera3": __use_camera3
@@ -345,6 +357,8 @@ class PresetControl(ft.Container):
         __freq = preset["frequency"]
         __format = preset["format"]
         __resolution = preset["resolution"]
+        __motion_profile = preset.get("motion_profile", Props.DEFAULT_MOTION_PROFILE)
+        __settle_strategy = preset.get("settle_strategy", Props.DEFAULT_SETTLE_STRATEGY)
         __use_camera1 = preset["use_camera1"]
         __use_camera2 = preset["use_camera2"]
         __use_camera3 = preset["use_camera3"]
@@ -353,6 +367,8 @@ class PresetControl(ft.Container):
         self.options.freq_dropdown.value = __freq
         self.options.format_dropdown.value = __format
         self.options.resolution_dropdown.value = __resolution
+        self.options.motion_dropdown.value = __motion_profile
+        self.options.settle_dropdown.value = __settle_strategy
         self.camera_use.camera1_checkbox.content.value = __use_camera1
         self.camera_use.camera2_checkbox.content.value = __use_camera2
         self.camera_use.camera3_checkbox.content.value = __use_camera3
@@ -361,16 +377,25 @@ class PresetControl(ft.Container):
         Props.CURRENT_FREQUENCY = __freq
         Props.CURRENT_FORMAT = __format
         Props.CURRENT_RESOLUTION = __resolution
+        Props.CURRENT_MOTION_PROFILE = __motion_profile
+        Props.CURRENT_SETTLE_STRATEGY = __settle_strategy
         Props.CURRENT_USE_CAMERA1 = __use_camera1
         Props.CURRENT_USE_CAMERA2 = __use_camera2
         Props.CURRENT_USE_CAMERA3 = __use_camera3
 
-        self.show_alert(f"Se aplicó el preset correctamente: {__preset_name}")
+        # Only settings that changed reach the cameras
+        failed = [camera for camera, ok in Cameras.apply_capture_settings().items() if not ok]
 
-        # UPDATE PAGE
+        # UPDATE PAGE (also on failure: the preset values are applied to Props either way)
         self.options.update()
         self.camera_use.update()
 
+        if failed:
+            self.show_alert(f"No se pudo aplicar el preset a las cámaras: {', '.join(failed)}")
+            return
+
+        self.show_alert(f"Se aplicó el preset correctamente: {__preset_name}")
+
     def show_alert(self, message: str):
         """
         Displays a temporary snackbar alert with the given message.
@@ -438,53 +463,90 @@ class PresetControl(ft.Container):
         self.show_alert("Captura iniciada.")
         Props.IS_SCANNING = True
 
-        progress_bar = ProgressBar(page=Props.PAGE, title="Escaneo")
+        progress_bar = ProgressBar(page=Props.PAGE, title="Escaneo", on_cancel=Executor.cancel)
         progress_bar.show()
 
+        def on_event(kind, value):
+            # Progress posted by the scan, applied on the Executor's pump thread
+            if kind == "legend":
+                progress_bar.update_legend(new_legend=value)
+            elif kind == "value":
+                progress_bar.update_value(new_value=value)
+
+        def on_done(status):
+            Props.IS_SCANNING = False
+            if status == "cancelled":
+                progress_bar.finish("Escaneo detenido.")
+            elif status == "failed":
+                progress_bar.finish("El escaneo falló, revisa la consola.")
+            self.show_images_under_cameras()
+
+        # The scan runs on a worker thread so the page stays usable; "Detener" cancels it
+        if not Executor.start(
+            job=self.__run_scan,
+            on_event=on_event,
+            on_done=on_done,
+            cancellers=(self.motor.cancel_moves, gphoto2.cancel, Tether.stop),
+            finalizers=(gphoto2.resume,)  # "Detener" must not leave the cameras blocked
+        ):
+            Props.IS_SCANNING = False
+            progress_bar.hide()
+            self.show_alert("Espera, hay una rutina en curso.")
+
+    def __run_scan(self):
+        """
+        Runs the scan with the current options. Called on the Executor thread.
+        """
         self.clean_directory()
+        self.motor.use_profile(Props.CURRENT_MOTION_PROFILE, Props.MOTION_PROFILES)
+        CaptureMetrics.start_run(
+            cameras=Props.CAMERAS_DICT,
+            preset=self.preset_dropdown.value,
+            frequency=Props.CURRENT_FREQUENCY,
+            motion_profile=Props.CURRENT_MOTION_PROFILE,
+            settle_strategy=Props.CURRENT_SETTLE_STRATEGY,
+            product_id=Props.PRODUCT_ID
+        )
 
-        match Props.CURRENT_FREQUENCY:
-            case "5 [DEG/SHOT]":
-                n = 72
-                for i in range(0,n):
-                    self.motor.move_degs(5)
-                    self.trigger_capture(iteration_number = i)
-
-                    progress_bar.update_value(new_value=(1/n)*(i+1))
-                    progress_bar.update_legend(new_legend=f"Serie actual: {i + 1}, restante {n - i - 1}.")
-
-            case "45 [DEG/SHOT]":
-                n = 8
-                for i in range(0,n):
-                    self.motor.move_degs(45)
-                    self.trigger_capture(iteration_number = i)
-
-                    progress_bar.update_value(new_value=(1/n)*(i+1))
-                    progress_bar.update_legend(new_legend=f"Serie actual: {i + 1}, restante {n - i -1}.")
-
-            case "90 [DEG/SHOT]":
-                n = 4
-                for i in range(0,n):
-                    self.motor.move_degs(90)
-                    self.trigger_capture(iteration_number = i)
-
-                    progress_bar.update_value(new_value=(1/n)*(i+1))
-                    progress_bar.update_legend(new_legend=f"Serie actual: {i + 1}, restante {n - i - 1}.")
-
-            case "360 [DEG/SHOT]":
-                self.motor.move_degs(360)
-                time.sleep(3)
-
-            case _:
-                self.motor.move_degs(360)
-                time.sleep(3)
-
-
-        Props.IS_SCANNING = False
-        progress_bar.update_value(new_value=(1))
-        progress_bar.update_legend(new_legend=f"Listo!")
-
-        self.show_images_under_cameras()
+        def on_progress(done: int, total: int):
+            Executor.post("value", done / total)
+            Executor.post("legend", f"Serie actual: {done}, restante {total - done}.")
+
+        try:
+            # One motor session for the whole scan: pins set up once, driver kept enabled
+            with self.motor:
+                if not self.motor.homed:
+                    self.motor.home()
+                # Routed from where the table stands now
+                plan = Scan.compile(Props.CURRENT_FREQUENCY, naming="preset", start=self.motor.angle)
+                if Props.TETHERED_MODE and not Tether.start(namer=Scan.namer(plan)):
+                    print("Modo tethered: no hay cámaras seleccionadas conectadas")
+                if Props.SWEEP_MODE and not Props.TETHERED_MODE and plan.shots:
+                    # One video per camera during a single turn; frames at each angle become the shots
+                    Executor.post("legend", "Barrido en video...")
+                    VideoSweep.run(self.motor, plan)
+                elif Props.CONTINUOUS_MODE and not Props.TETHERED_MODE and plan.shots:
+                    # The table never stops: cameras fire on the fly as each angle comes by
+                    Executor.post("legend", "Captura continua...")
+                    Burst.run(self.motor, plan)
+                else:
+                    Scan.run(self.motor, plan, on_progress=on_progress)
+
+            if Props.TETHERED_MODE:
+                print(f"Modo tethered: fotos recibidas {Tether.stop()}")
+
+            if Props.DEFERRED_DOWNLOAD:
+                Executor.post("legend", "Descargando imágenes de las cámaras...")
+                downloads = gphoto2.wait_downloads()
+                failed = [path for path, ok in downloads.items() if not ok]
+                if failed:
+                    print(f"No se pudieron descargar {len(failed)} imágenes: {failed}")
+        finally:
+            Tether.stop()  # also when homing, compiling or a move fails: free the camera ports
+            CaptureMetrics.end_run(Props.METRICS_DIRECTORY)
+
+        Executor.post("value", 1)
+        Executor.post("legend", "Listo!")
 
     def clean_directory(self):
         if Props.CURRENT_USE_CAMERA1:
@@ -502,36 +564,6 @@ class PresetControl(ft.Container):
                 path = os.path.join(Props.CAMERA3_DOWNLOAD_PATH, f)
                 os.remove(path)
     
-    def trigger_capture(self, iteration_number: int) -> None:
-
-        if Props.CURRENT_USE_CAMERA1:
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[0]],
-                download_path = Props.CAMERA1_DOWNLOAD_PATH,
-                file_name = "A000" + str(iteration_number) + Props.CURRENT_FILE_EXTENSION
-            )
-        
-            time.sleep(0.25)
-
-        if Props.CURRENT_USE_CAMERA2:
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[1]],
-                download_path = Props.CAMERA2_DOWNLOAD_PATH,
-                file_name = "B000" + str(iteration_number) + Props.CURRENT_FILE_EXTENSION
-            )
-
-            time.sleep(0.25)
-
-        if Props.CURRENT_USE_CAMERA3:
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[2]],
-                download_path = Props.CAMERA3_DOWNLOAD_PATH,
-                file_name = "C000" + str(iteration_number) + Props.CURRENT_FILE_EXTENSION
-            )
-
-            time.sleep(0.25)
-
-    
     def show_images_under_cameras(self):
         """
         Show original images under cameras.
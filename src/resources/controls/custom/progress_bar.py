@@ -4,8 +4,14 @@ from src.resources.controls.custom.header_control import HeaderControl
 
 
 class ProgressBar:
-    def __init__(self, page: ft.Page, title: str):
+    def __init__(self, page: ft.Page, title: str, on_cancel=None):
+        """
+        on_cancel: called by "Detener" to stop a job running in the background (see Executor).
+        With it, "Cerrar" can hide the dialog while the job runs, leaving the page usable.
+        Without it, "Detener" just hides the dialog.
+        """
         self.page = page
+        self.on_cancel = on_cancel
         self.title = HeaderControl(title)
         self.progress_bar = ft.ProgressBar(
             value=0,
@@ -21,7 +27,7 @@ class ProgressBar:
 
         self.close_button = ft.OutlinedButton(
             text="Cerrar",
-            disabled=True,
+            disabled=on_cancel is None,
             icon=ft.Icons.CLOSE,
             style=ft.ButtonStyle(shape=ft.RoundedRectangleBorder(radius=Props.BORDER_RADIUS)),
             height=Props.BUTTON_HEIGHT,
@@ -76,7 +82,26 @@ class ProgressBar:
     def hide(self):
         self.dialog.open = False
         self.page.update()
+
+    def reset(self):
+        """
+        Clears the dialog for a new run.
+        """
+        self.progress_bar.value = 0
+        self.percentage.value = "0%"
+        self.legend.value = "En curso..."
+        self.cancel_button.disabled = False
+        self.close_button.disabled = self.on_cancel is None
     
+    def finish(self, new_legend: str):
+        """
+        Ends a run that did not complete (stopped or failed): shows the legend and enables "Cerrar".
+        """
+        self.legend.value = new_legend
+        self.cancel_button.disabled = True
+        self.close_button.disabled = False
+        self.page.update()
+
     def update_value(self, new_value: int):
         self.progress_bar.value = new_value
         self.percentage.value = str(int(new_value * 100)) + "%"
@@ -97,8 +122,15 @@ class ProgressBar:
 
 
     def __close_button_clicked(self, e):
-        self.progress_bar.value = 0
+        # A background job keeps running with the dialog hidden; reset() clears it for the next run
         self.hide()
 
     def __cancel_button_clicked(self, e):
-        self.hide()
\ No newline at end of file
+        if self.on_cancel is None:
+            self.hide()
+            return
+        # The dialog stays open until the job reports that it stopped
+        self.cancel_button.disabled = True
+        self.cancel_button.update()
+        self.update_legend("Deteniendo...")
+        self.on_cancel()
\ No newline at end of file
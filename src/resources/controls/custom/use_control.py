@@ -100,3 +100,12 @@ class UseControl(ft.Container):
             e (ControlEvent): Checkbox change event.
         """
         Props.CURRENT_USE_CAMERA3 = self.camera3_checkbox.content.value
+
+    def refresh_cameras(self):
+        """
+        Updates the checkbox labels once camera discovery finishes.
+        """
+        self.camera1_checkbox.content.label = Props.CAMERAS_LIST[0] or "No disponible"
+        self.camera2_checkbox.content.label = Props.CAMERAS_LIST[1] or "No disponible"
+        self.camera3_checkbox.content.label = Props.CAMERAS_LIST[2] or "No disponible"
+        self.update()
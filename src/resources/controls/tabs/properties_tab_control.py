@@ -2,7 +2,6 @@ import os
 import json
 import flet as ft
 from src.resources.properties import Properties as Props
-from src.camera_controller import GPhoto2 as gp
 from src.resources.utils.servers_controller import Servers
 from src.resources.controls.custom.loading_dialog import LoadingDialog
 from src.resources.controls.custom.delete_server_dialog import DeleteServerDialog
@@ -13,6 +12,7 @@ from src.resources.controls.custom.credentials_dialog import CredentialsDialog
 from src.resources.utils.credentials_controller import Credentials
 from src.resources.controls.custom.update_server_dialog import UpdateServerDialog
 from src.resources.utils.routines_controller import Routines
+from src.resources.utils.cameras_controller import Cameras
 
 
 def convert_percentage_to_width_height(width: int, height: int):
@@ -102,6 +102,42 @@ class PropertiesTab(ft.Tab):
             on_change=self.__shutterspeed_dropdown_changed
         )
 
+        self.deferred_download_switch = ft.Switch(
+            label="Capturar a la tarjeta y descargar en segundo plano",
+            value=Props.DEFERRED_DOWNLOAD,
+            on_change=self.__deferred_download_switch_changed
+        )
+
+        self.slot_dropdowns: list[ft.Dropdown] = [
+            ft.Dropdown(
+                options=self.__get_available_cameras(),
+                value=Props.CAMERAS_LIST[i],
+                label=f"CÁMARA {i + 1}",
+                width=Props.DROPDOWN_WIDTH,
+                data=i,
+                on_change=self.__slot_dropdown_changed
+            )
+            for i in range(len(Props.CAMERA_SLOTS))
+        ]
+
+        self.tethered_mode_switch = ft.Switch(
+            label="Recibir las fotos que disparen las cámaras (hardware o remoto)",
+            value=Props.TETHERED_MODE,
+            on_change=self.__tethered_mode_switch_changed
+        )
+
+        self.continuous_mode_switch = ft.Switch(
+            label="Girar sin detenerse y disparar al pasar por cada ángulo",
+            value=Props.CONTINUOUS_MODE,
+            on_change=self.__continuous_mode_switch_changed
+        )
+
+        self.sweep_mode_switch = ft.Switch(
+            label="Grabar video durante una vuelta y extraer los cuadros de cada ángulo",
+            value=Props.SWEEP_MODE,
+            on_change=self.__sweep_mode_switch_changed
+        )
+
         self.resolution_dropdown = ft.Dropdown(
             options=[
                 ft.DropdownOption(text="1080p"),
@@ -238,6 +274,10 @@ class PropertiesTab(ft.Tab):
             initially_expanded=Props.INITIALLY_EXPANDED_PROPERTIES,
             controls_padding=Props.TAB_PADDING,
             controls=[
+                ft.ListTile(
+                    title=ft.Text("Posiciones del rig: "),
+                    subtitle=ft.Column(controls=self.slot_dropdowns)
+                ),
                 ft.ListTile(
                     title=ft.Text("Cámara ISO: "),
                     subtitle=self.iso_dropdown 
@@ -246,6 +286,22 @@ class PropertiesTab(ft.Tab):
                     title=ft.Text("Cámara SHUTTERSPEED: "),
                     subtitle=self.shutterspeed_dropdown
                 ),
+                ft.ListTile(
+                    title=ft.Text("Descarga diferida: "),
+                    subtitle=self.deferred_download_switch
+                ),
+                ft.ListTile(
+                    title=ft.Text("Modo tethered: "),
+                    subtitle=self.tethered_mode_switch
+                ),
+                ft.ListTile(
+                    title=ft.Text("Captura continua: "),
+                    subtitle=self.continuous_mode_switch
+                ),
+                ft.ListTile(
+                    title=ft.Text("Barrido en video: "),
+                    subtitle=self.sweep_mode_switch
+                ),
 
             ]
         )
@@ -341,6 +397,42 @@ class PropertiesTab(ft.Tab):
         self.page.open(snackbar)
         self.page.update()
 
+    def refresh_cameras(self):
+        """
+        Reloads the ISO and shutterspeed options once camera discovery finishes.
+        """
+        self.iso_dropdown.options = self.__get_available_isos()
+        self.shutterspeed_dropdown.options = self.__get_available_shutterspeeds()
+        for dropdown in self.slot_dropdowns:
+            dropdown.options = self.__get_available_cameras()
+            dropdown.value = Props.CAMERAS_LIST[dropdown.data]
+        self.update()
+
+    def __get_available_cameras(self):
+
+        cameras_list: list[ft.DropdownOption] = []
+
+        for camera in Props.CAMERAS_DICT.keys():
+            if camera is None:
+                continue
+            serial = Props.CAMERAS_SERIALS.get(camera)
+            cameras_list.append(
+                ft.DropdownOption(key=camera, text=f"{camera} ({serial})" if serial else camera)
+            )
+
+        return cameras_list
+
+    def __slot_dropdown_changed(self, e):
+        """
+        Binds a rig slot (camera 1, 2 or 3) to the selected camera serial.
+        """
+        Cameras.assign_slot(e.control.data, e.control.value)
+        for dropdown in self.slot_dropdowns:
+            dropdown.value = Props.CAMERAS_LIST[dropdown.data]
+        Props.USE_CONTROL.refresh_cameras()
+        self.update()
+        print(f"Posiciones del rig: {Props.CAMERAS_LIST}")
+
     def __get_available_isos(self):
 
         isos_list: list[ft.DropdownOption] = []
@@ -398,22 +490,10 @@ class PropertiesTab(ft.Tab):
         loading_dialog.show()
         loading_dialog.update_legend(f"Aplicando ISO: {Props.CURRENT_ISO}")
 
-        for camera in Props.CAMERAS_LIST:
-
-            if not camera:
-                print("Camera was None, skipping")
-                continue
-            
-            print(f"Aplicando ISO a la camara {camera}")
-            loading_dialog.update_legend(f"Aplicando ISO a la cámara: {camera}")
-
-            gp.set_config(
-                camera_port=Props.CAMERAS_DICT[camera],
-                camera_config=Props.ISO_CAMERA_CONFIG,
-                config_value=Props.ISOS_DICT[Props.CURRENT_ISO]
-                )
-            print(f"ISO aplicado con exito")
-            loading_dialog.update_legend(f"ISO aplicado a la cámara: {camera}")
+        results = Cameras.apply_to_all({Props.ISO_CAMERA_CONFIG: Props.ISOS_DICT[Props.CURRENT_ISO]})
+        for camera, ok in results.items():
+            print(f"ISO {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
+            loading_dialog.update_legend(f"ISO {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
         
         loading_dialog.update_legend(f"Listo!")
         loading_dialog.hide()
@@ -435,28 +515,43 @@ class PropertiesTab(ft.Tab):
         loading_dialog.update_legend(f"Aplicando SHUTTERSPEED: {Props.CURRENT_ISO}")
         print(f"Aplicando SHUTTERSPEED: {Props.CURRENT_ISO}")
 
-        for camera in Props.CAMERAS_LIST:
-
-            if not camera:
-                print("Camera was None, skipping")
-                continue
-
-            loading_dialog.update_legend(f"Aplicando SHUTTERSPEED a la cámara: {camera}")
-            print(f"Aplicando SHUTTERSPEED a la cámara: {camera}")
-
-            gp.set_config(
-                camera_port=Props.CAMERAS_DICT[camera],
-                camera_config=Props.SHUTTERSPEED_CAMERA_CONFIG,
-                config_value=Props.SHUTTERSPEEDS_DICT[Props.CURRENT_SHUTTERSPEED]
-                )
-            
-            loading_dialog.update_legend(f"SHUTTERSPEED aplicado a la cámara: {camera}")
-            print(f"SHUTTERSPEED aplicado a la cámara: {camera}")
+        results = Cameras.apply_to_all({Props.SHUTTERSPEED_CAMERA_CONFIG: Props.SHUTTERSPEEDS_DICT[Props.CURRENT_SHUTTERSPEED]})
+        for camera, ok in results.items():
+            print(f"SHUTTERSPEED {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
+            loading_dialog.update_legend(f"SHUTTERSPEED {'aplicado' if ok else 'no aplicado'} a la cámara: {camera}")
         
         loading_dialog.update_legend(f"Listo!")
         loading_dialog.hide()
 
 
+    def __deferred_download_switch_changed(self, e):
+        """
+        Callback for the deferred download switch.
+        """
+        Props.DEFERRED_DOWNLOAD = self.deferred_download_switch.value
+        print(f"Descarga diferida: {Props.DEFERRED_DOWNLOAD}")
+
+    def __tethered_mode_switch_changed(self, e):
+        """
+        Callback for the tethered mode switch.
+        """
+        Props.TETHERED_MODE = self.tethered_mode_switch.value
+        print(f"Modo tethered: {Props.TETHERED_MODE}")
+
+    def __continuous_mode_switch_changed(self, e):
+        """
+        Callback for the continuous capture switch.
+        """
+        Props.CONTINUOUS_MODE = self.continuous_mode_switch.value
+        print(f"Captura continua: {Props.CONTINUOUS_MODE}")
+
+    def __sweep_mode_switch_changed(self, e):
+        """
+        Callback for the video sweep switch.
+        """
+        Props.SWEEP_MODE = self.sweep_mode_switch.value
+        print(f"Barrido en video: {Props.SWEEP_MODE}")
+
     def __resolution_dropdown_changed(self, e):
         """
         Callback for the resolution dropdown menu.
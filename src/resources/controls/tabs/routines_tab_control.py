@@ -1,5 +1,4 @@
 import os
-import time
 import json
 import flet as ft
 from src.resources.utils.routines_controller import Routines
@@ -12,27 +11,31 @@ from src.camera_controller import GPhoto2 as gphoto2
 from src.motor_controller import StepperMotorController as Motor
 from src.resources.controls.filters.filters import Filter
 from src.resources.controls.custom.progress_bar import ProgressBar
-from src.camera_controller import GPhoto2 as gp
 from src.resources.controls.custom.loading_dialog import LoadingDialog
 from src.resources.utils.save_controller import Save
+from src.resources.utils.cameras_controller import Cameras
+from src.resources.utils.tether_controller import Tether
+from src.resources.utils.burst_controller import Burst
+from src.resources.utils.sweep_controller import VideoSweep
+from src.resources.utils.scan_controller import Scan
+from src.resources.utils.executor_controller import Executor
+from src.capture_metrics import CaptureMetrics
 
 class RoutinesTab(ft.Tab):
     """
     Routines tab in Workspace frame
     """
 
-    def __init__(self, page: ft.Page, title: str):
+    def __init__(self, page: ft.Page, title: str, motor: Motor):
         super().__init__()
         self.page = page
         self.progress_bar = ProgressBar(
             page=self.page,
-            title = f"Rutina: {Props.CURRENT_ROUTINE['name']}"
+            title = f"Rutina: {Props.CURRENT_ROUTINE['name']}",
+            on_cancel=Executor.cancel
         )
         self.text = title
-        self.motor = Motor(
-            dir_pin=Props.DIR_PIN,
-            step_pin=Props.STEP_PIN
-        )
+        self.motor = motor  # shared with the scan tab, see WorkspaceControl
 
         self.icon = ft.Icon(ft.Icons.CONSTRUCTION, size=Props.TAB_ICON_SIZE, visible=Props.TAB_ICON_ENABLED)
 
@@ -314,33 +317,19 @@ class RoutinesTab(ft.Tab):
                         Props.CURRENT_FREQUENCY = preset["frequency"]
                         Props.CURRENT_FORMAT = preset["format"]
                         Props.CURRENT_RESOLUTION = preset["resolution"]
+                        Props.CURRENT_MOTION_PROFILE = preset.get("motion_profile", Props.DEFAULT_MOTION_PROFILE)
+                        Props.CURRENT_SETTLE_STRATEGY = preset.get("settle_strategy", Props.DEFAULT_SETTLE_STRATEGY)
                         Props.CURRENT_USE_CAMERA1 = preset["use_camera1"]
                         Props.CURRENT_USE_CAMERA2 = preset["use_camera2"]
                         Props.CURRENT_USE_CAMERA3 = preset["use_camera3"]
 
-                    for camera in Props.CAMERAS_LIST:
-                        if camera == None:
-                            continue
-                        
-                        loading_dialog.update_legend(f"Aplicando configuración a la cámara: {camera}")
-                        print(f"Aplicando configuración a la cámara: {camera}")
-                        gp.set_config(
-                            camera_port=Props.CAMERAS_DICT[camera],
-                            camera_config=Props.FORMAT_CAMERA_CONFIG,
-                            config_value=Props.FORMATS_DICT[Props.CURRENT_FORMAT]
-                        )
-                        loading_dialog.update_legend(f"Aplicando configuración de formato: {Props.FORMAT_CAMERA_CONFIG}")
-                        print(f"Aplicando configuración de formato: {Props.FORMAT_CAMERA_CONFIG}")
-
-                        gp.set_config(
-                            camera_port=Props.CAMERAS_DICT[camera],
-                            camera_config=Props.RESOLUTION_CAMERA_CONFIG,
-                            config_value=Props.RESOLUTIONS_DICT[Props.CURRENT_RESOLUTION]
-                        )
-                        loading_dialog.update_legend(f"Aplicando configuración de resolución: {Props.RESOLUTION_CAMERA_CONFIG}")
-                        print(f"Aplicando configuración de resolución: {Props.RESOLUTION_CAMERA_CONFIG}")
+                    loading_dialog.update_legend(f"Aplicando formato y resolución a las cámaras.")
+                    print(f"Aplicando formato y resolución a las cámaras.")
+                    results = Cameras.apply_capture_settings()
+                    for camera, ok in results.items():
+                        if not ok:
+                            loading_dialog.update_legend(f"No se pudo aplicar la configuración a la cámara: {camera}")
 
-                    
                     loading_dialog.update_legend(f"Configuración aplicada correctamente!")
                     print(f"Configuración aplicada correctamente!")
 
@@ -486,6 +475,11 @@ class RoutinesTab(ft.Tab):
         
         print("Boton de empezar rutina clickeado")
 
+        if Executor.is_running():
+            self.show_alert("Espera, hay una rutina en curso.")
+            self.progress_bar.show()
+            return
+
         if Props.CURRENT_ROUTINE["stages"] == []:
             self.show_alert("Por favor, añade al menos una etapa.")
             print("Por favor, añade al menos una etapa.")
@@ -496,22 +490,62 @@ class RoutinesTab(ft.Tab):
             print("Por favor, agrega el ID de proudcto.")
             return
         
-        self.progress_bar.percentage.value = "0%"
+        self.progress_bar.reset()
         self.progress_bar.show()
 
+        # The routine runs on a worker thread so the page stays usable; "Detener" cancels it
+        Executor.start(
+            job=self.__run_routine,
+            on_event=self.__routine_event,
+            on_done=self.__routine_done,
+            cancellers=(self.motor.cancel_moves, gphoto2.cancel, Tether.stop, Save.abort),
+            finalizers=(gphoto2.resume,)  # "Detener" must not leave the cameras blocked
+        )
+
+    def __routine_event(self, kind, value):
+        # Progress posted by the routine, applied on the Executor's pump thread
+        if kind == "legend":
+            self.progress_bar.update_legend(new_legend=value)
+        elif kind == "value":
+            self.progress_bar.update_value(new_value=value)
+
+    def __routine_done(self, status):
+        if status == "cancelled":
+            self.progress_bar.finish("Rutina detenida.")
+        elif status == "failed":
+            self.progress_bar.finish("La rutina falló, revisa la consola.")
+
+    def __run_routine(self):
+        """
+        Runs every stage of the current routine. Called on the Executor thread.
+        """
+        CaptureMetrics.start_run(
+            routine=Props.CURRENT_ROUTINE["name"],
+            cameras=Props.CAMERAS_DICT,
+            product_id=Props.PRODUCT_ID
+        )
+        try:
+            self.__run_stages()
+        finally:
+            Props.IS_SCANNING = Props.IS_FILTERING = Props.IS_SAVING = False
+            Props.APPEND_FILTER = False
+            CaptureMetrics.end_run(Props.METRICS_DIRECTORY)
+
+    def __run_stages(self):
         # Check the amout of stages
         total_stages = len(Props.CURRENT_ROUTINE["stages"])
         current_stage_num = 1
 
         for stage in Props.CURRENT_ROUTINE["stages"]:
+            Executor.check()
             match stage["type"]:
                 case "Scan":
                     Props.IS_SCANNING = True
 
-                    self.progress_bar.update_legend("Scan: Cargando...")
+                    Executor.post("legend", "Scan: Cargando...")
                     self.__start_scan(stage=stage)
-                    self.progress_bar.update_legend("Scan: Listo...")
-                    self.progress_bar.update_value(new_value=(1/total_stages)*(current_stage_num))
+                    Executor.post("legend", "Scan: Listo...")
+                    Executor.post("value", (1/total_stages)*(current_stage_num))
 
                     current_stage_num += 1
 
@@ -520,11 +554,11 @@ class RoutinesTab(ft.Tab):
                 case "Filter":
                     Props.IS_FILTERING = True
 
-                    self.progress_bar.update_legend("Filter: Cargando...")
+                    Executor.post("legend", "Filter: Cargando...")
                     self.__start_filter(stage=stage)
                     Props.APPEND_FILTER = True
-                    self.progress_bar.update_legend("Filter: Listo...")
-                    self.progress_bar.update_value(new_value=(1/total_stages)*(current_stage_num))
+                    Executor.post("legend", "Filter: Listo...")
+                    Executor.post("value", (1/total_stages)*(current_stage_num))
 
                     current_stage_num += 1
 
@@ -533,17 +567,18 @@ class RoutinesTab(ft.Tab):
                 case "Save":
                     Props.IS_SAVING = True
 
-                    self.progress_bar.update_legend("Save: Cargando...")
+                    Executor.post("legend", "Save: Cargando...")
                     try: 
                         self.__start_save(stage=stage)
                     except Exception as e:
+                        Executor.check()  # a cancelled upload is not a configuration error
                         Props.FAILED_TO_SAVE_IMAGE = True
-                        self.progress_bar.update_legend(new_legend=f"No se configuró correctamente la etapa de guardado. Verifica que la configuración de la rutina sea correcta.\nTipo: {type(e).__name__}, Mensaje: {str(e)[:100]}...")
+                        Executor.post("legend", f"No se configuró correctamente la etapa de guardado. Verifica que la configuración de la rutina sea correcta.\nTipo: {type(e).__name__}, Mensaje: {str(e)[:100]}...")
                         print(f"No se pudo guardar la imagen:\n{e}")
                         break
 
-                    self.progress_bar.update_legend("Save: Listo...")
-                    self.progress_bar.update_value(new_value=(1/total_stages)*(current_stage_num))
+                    Executor.post("legend", "Save: Listo...")
+                    Executor.post("value", (1/total_stages)*(current_stage_num))
 
                     
                     # Clean filtered directory if not appending
@@ -557,22 +592,20 @@ class RoutinesTab(ft.Tab):
                 case _:
                     pass
         
-        self.progress_bar.update_value(new_value=(1))
+        Executor.post("value", (1))
         if Props.FAILED_TO_APPLY_FILTER:
-            self.progress_bar.update_legend(new_legend=f"No se configuró correctamente la etapa de filtro. Verifica que la configuración de la rutina sea correcta.")
+            Executor.post("legend", f"No se configuró correctamente la etapa de filtro. Verifica que la configuración de la rutina sea correcta.")
             Props.FAILED_TO_APPLY_FILTER = False
         elif Props.FAILED_TO_SAVE_STAGE:
-            self.progress_bar.update_legend(new_legend=f"No se configuró correctamente la etapa de guardado. Verifica que la configuración de la rutina sea correcta.")
+            Executor.post("legend", f"No se configuró correctamente la etapa de guardado. Verifica que la configuración de la rutina sea correcta.")
             Props.FAILED_TO_SAVE_STAGE = False 
         elif Props.FAILED_TO_APPLY_PRESET:
-            self.progress_bar.update_legend(new_legend=f"No se configuró correctamente la etapa de escaneo. Verifica que la configuración de la rutina sea correcta.")
+            Executor.post("legend", f"No se configuró correctamente la etapa de escaneo. Verifica que la configuración de la rutina sea correcta.")
             Props.FAILED_TO_APPLY_PRESET = False 
         elif Props.FAILED_TO_SAVE_IMAGE:
             Props.FAILED_TO_APPLY_PRESET = False 
         else:
-            self.progress_bar.update_legend(new_legend=f"Listo.")
-
-        Props.APPEND_FILTER = False
+            Executor.post("legend", f"Listo.")
     
     def __start_scan(self, stage):
         # Load preset
@@ -591,6 +624,8 @@ class RoutinesTab(ft.Tab):
         __freq = preset["frequency"]
         __format = preset["format"]
         __resolution = preset["resolution"]
+        __motion_profile = preset.get("motion_profile", Props.DEFAULT_MOTION_PROFILE)
+        __settle_strategy = preset.get("settle_strategy", Props.DEFAULT_SETTLE_STRATEGY)
         __use_camera1 = preset["use_camera1"]
         __use_camera2 = preset["use_camera2"]
         __use_camera3 = preset["use_camera3"]
@@ -599,6 +634,8 @@ class RoutinesTab(ft.Tab):
         Props.OPTIONS_CONTROL.freq_dropdown.value = __freq
         Props.OPTIONS_CONTROL.format_dropdown.value = __format
         Props.OPTIONS_CONTROL.resolution_dropdown.value = __resolution
+        Props.OPTIONS_CONTROL.motion_dropdown.value = __motion_profile
+        Props.OPTIONS_CONTROL.settle_dropdown.value = __settle_strategy
         Props.USE_CONTROL.camera1_checkbox.content.value = __use_camera1
         Props.USE_CONTROL.camera2_checkbox.content.value = __use_camera2
         Props.USE_CONTROL.camera3_checkbox.content.value = __use_camera3
@@ -607,89 +644,59 @@ class RoutinesTab(ft.Tab):
         Props.CURRENT_FREQUENCY = __freq
         Props.CURRENT_FORMAT = __format
         Props.CURRENT_RESOLUTION = __resolution
+        Props.CURRENT_MOTION_PROFILE = __motion_profile
+        Props.CURRENT_SETTLE_STRATEGY = __settle_strategy
         Props.CURRENT_USE_CAMERA1 = __use_camera1
         Props.CURRENT_USE_CAMERA2 = __use_camera2
         Props.CURRENT_USE_CAMERA3 = __use_camera3
 
-        self.clean_directory()
+        # Only settings that changed since the last scan reach the cameras
+        Executor.post("legend", "Scan: Aplicando preset a las cámaras...")
+        for camera, ok in Cameras.apply_capture_settings().items():
+            if not ok:
+                print(f"No se pudo aplicar el preset a la cámara: {camera}")
 
-        # START CAPTURE
-        match Props.CURRENT_FREQUENCY:
-            case "5 [DEG/SHOT]":
-                n = 72
-                for i in range(0,n):
-                    
-                    # Prefix
-                    match i:
-                        case 8:
-                            Props.LETTER_PREFIX = "A"
-                        case 17:
-                            Props.LETTER_PREFIX = "B"
-                        case 71:
-                            Props.LETTER_PREFIX = "C"
-                        case 35:
-                            Props.LETTER_PREFIX = "D"
-                        case 53:
-                            Props.LETTER_PREFIX = "E"
-                        case _:
-                            Props.LETTER_PREFIX = ""
-
-
-                    self.motor.move_degs(5)
-                    self.trigger_capture(iteration_number = i)
-                    self.progress_bar.update_legend(new_legend=f"Scan: Serie actual: {i + 1}, restante {n - i - 1}")
-
-            case "45 [DEG/SHOT]":
-                n = 8
-                for i in range(0,n):
-
-                    # Prefix
-                    match i:
-                        case 0:
-                            Props.LETTER_PREFIX = "A"
-                        case 1:
-                            Props.LETTER_PREFIX = "B"
-                        case 7:
-                            Props.LETTER_PREFIX = "C"
-                        case 3:
-                            Props.LETTER_PREFIX = "D"
-                        case 5:
-                            Props.LETTER_PREFIX = "E"
-                        case _:
-                            Props.LETTER_PREFIX = ""
-
-                    self.motor.move_degs(45)
-                    self.trigger_capture(iteration_number = i)
-                    self.progress_bar.update_legend(new_legend=f"Scan: Serie actual: {i + 1}, restante {n - i - 1}")
-
-            case "90 [DEG/SHOT]":
-                n = 4
-                for i in range(0,n):
-
-                    # Prefix
-                    match i:
-                        case 0:
-                            Props.LETTER_PREFIX = "B"
-                        case 3:
-                            Props.LETTER_PREFIX = "C"
-                        case 1:
-                            Props.LETTER_PREFIX = "D"
-                        case 2:
-                            Props.LETTER_PREFIX = "E"
-                        case _:
-                            Props.LETTER_PREFIX = ""
-                    
-                    self.motor.move_degs(90)
-                    self.trigger_capture(iteration_number = i)
-                    self.progress_bar.update_legend(new_legend=f"Scan: Serie actual: {i + 1}, restante {n - i - 1}")
+        self.clean_directory()
+        self.motor.use_profile(Props.CURRENT_MOTION_PROFILE, Props.MOTION_PROFILES)
+        CaptureMetrics.set_context(preset=preset_name, frequency=Props.CURRENT_FREQUENCY,
+                                   motion_profile=Props.CURRENT_MOTION_PROFILE,
+                                   settle_strategy=Props.CURRENT_SETTLE_STRATEGY)
 
-            case "360 [DEG/SHOT]":
-                self.motor.move_degs(360)
-                time.sleep(3)
+        def on_progress(done: int, total: int):
+            Executor.post("legend", f"Scan: Serie actual: {done}, restante {total - done}")
 
-            case _:
-                self.motor.move_degs(360)
-                time.sleep(3)
+        # START CAPTURE
+        # One motor session for the whole scan: pins set up once, driver kept enabled
+        try:
+            with self.motor:
+                if not self.motor.homed:
+                    self.motor.home()
+                # Routed from where the table stands now
+                plan = Scan.compile(Props.CURRENT_FREQUENCY, naming="routine", start=self.motor.angle)
+                if Props.TETHERED_MODE and not Tether.start(namer=Scan.namer(plan)):
+                    print("Modo tethered: no hay cámaras seleccionadas conectadas")
+                if Props.SWEEP_MODE and not Props.TETHERED_MODE and plan.shots:
+                    # One video per camera during a single turn; frames at each angle become the shots
+                    Executor.post("legend", "Scan: Barrido en video...")
+                    VideoSweep.run(self.motor, plan)
+                elif Props.CONTINUOUS_MODE and not Props.TETHERED_MODE and plan.shots:
+                    # The table never stops: cameras fire on the fly as each angle comes by
+                    Executor.post("legend", "Scan: Captura continua...")
+                    Burst.run(self.motor, plan)
+                else:
+                    Scan.run(self.motor, plan, on_progress=on_progress)
+
+            if Props.TETHERED_MODE:
+                print(f"Modo tethered: fotos recibidas {Tether.stop()}")
+        finally:
+            Tether.stop()  # also when homing, compiling or a move fails: free the camera ports
+
+        if Props.DEFERRED_DOWNLOAD:
+            Executor.post("legend", "Scan: Descargando imágenes de las cámaras...")
+            downloads = gphoto2.wait_downloads()
+            failed = [path for path, ok in downloads.items() if not ok]
+            if failed:
+                print(f"No se pudieron descargar {len(failed)} imágenes: {failed}")
 
     def __start_filter(self, stage):
 
@@ -718,15 +725,16 @@ class RoutinesTab(ft.Tab):
 
         total_images = len(images_to_filter)
         filtered_images = 0
-        self.progress_bar.update_legend(new_legend=f"Filter: Se encontraron {total_images} imágenes para filtrar.")
+        Executor.post("legend", f"Filter: Se encontraron {total_images} imágenes para filtrar.")
 
         for image in images_to_filter:
+            Executor.check()
             print(image)
             file_name = os.path.basename(image)
             print(file_name)
             file_path = Props.FILTERED_IMAGES_DIRECTORY + file_name
             filtered_images += 1
-            self.progress_bar.update_legend(new_legend=f"Filter: Aplicando filtro a imagen {file_name}, imágenes restantes {total_images - filtered_images}.")
+            Executor.post("legend", f"Filter: Aplicando filtro a imagen {file_name}, imágenes restantes {total_images - filtered_images}.")
 
             match filter_to_apply:
                 case "Remove background":
@@ -784,7 +792,7 @@ class RoutinesTab(ft.Tab):
 
     def __start_save(self, stage):
 
-        self.progress_bar.update_legend(new_legend=f"Save: Preparando para guardar archivos en el servidor remoto {Props.USE_SERVER}.")
+        Executor.post("legend", f"Save: Preparando para guardar archivos en el servidor remoto {Props.USE_SERVER}.")
 
         # GET IMAGES TO TRANSFER
         images_to_transfer = []
@@ -833,6 +841,7 @@ class RoutinesTab(ft.Tab):
         total_images = len(images_to_transfer)
         print(f"Total images: {total_images}")
         for image_file_path in images_to_transfer:
+            Executor.check()
             file_name = os.path.basename(image_file_path)
             total_images-=1
 
@@ -840,7 +849,7 @@ class RoutinesTab(ft.Tab):
                 continue
 
             print(f"Sending image: {file_name}")
-            self.progress_bar.update_legend(new_legend=f"Save: Guardando imagen {file_name}, restantes {total_images}.")
+            Executor.post("legend", f"Save: Guardando imagen {file_name}, restantes {total_images}.")
 
             if not Props.USE_PATH.endswith('/'):
                 Props.USE_PATH += '/'
@@ -852,7 +861,7 @@ class RoutinesTab(ft.Tab):
                 remote_file_path=Props.USE_PATH + '/' + Props.PRODUCT_ID + '/' + file_name
             )
 
-        self.progress_bar.update_legend(new_legend=f"Save: Proceso de guardado de imagen completado.")
+        Executor.post("legend", f"Save: Proceso de guardado de imagen completado.")
     
     def __load_presets(self):
         """
@@ -889,37 +898,6 @@ class RoutinesTab(ft.Tab):
             path = os.path.join(Props.FILTERED_IMAGES_DIRECTORY, f)
             os.remove(path) 
 
-    def trigger_capture(self, iteration_number: int) -> None:
-        if Props.CURRENT_USE_CAMERA1:
-            local_prefix = "" if Props.LETTER_PREFIX in ("A","F") else Props.LETTER_PREFIX
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[0]],
-                download_path = Props.CAMERA1_DOWNLOAD_PATH,
-                file_name = Props.PRODUCT_ID + str(iteration_number) + local_prefix + Props.CURRENT_FILE_EXTENSION
-            )
-
-            time.sleep(0.25)
-
-        if Props.CURRENT_USE_CAMERA2:
-            local_prefix = "A" if Props.LETTER_PREFIX == "A" else ""
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[1]],
-                download_path = Props.CAMERA2_DOWNLOAD_PATH,
-                file_name = Props.PRODUCT_ID + str(iteration_number) + local_prefix + Props.CURRENT_FILE_EXTENSION
-            )
-
-            time.sleep(0.25)
-
-        if Props.CURRENT_USE_CAMERA3:
-            local_prefix = "F" if Props.LETTER_PREFIX == "C" else ""
-            gphoto2.capture_image(
-                camera_port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[2]],
-                download_path = Props.CAMERA3_DOWNLOAD_PATH,
-                file_name = Props.PRODUCT_ID + str(iteration_number) + local_prefix + Props.CURRENT_FILE_EXTENSION
-            )
-
-            time.sleep(0.25)
-
     def show_alert(self, message: str):
         """
         Displays a temporary snackbar alert with the given message.
@@ -6,6 +6,7 @@ from src.resources.controls.custom.options_control import OptionsControl
 from src.resources.controls.custom.preset_control import PresetControl
 from src.resources.controls.custom.use_control import UseControl
 from src.resources.properties import Properties as Props
+from src.motor_controller import StepperMotorController as Motor
 
 
 class ScanTab(ft.Tab):
@@ -15,7 +16,7 @@ class ScanTab(ft.Tab):
     This tab provides an interface for interacting with connected cameras,
     including viewing live or static previews and performing scan actions.
     """
-    def __init__(self, page: ft.Page, title: str):
+    def __init__(self, page: ft.Page, title: str, motor: Motor):
         super().__init__()
         self.page = page
         self.text = title
@@ -25,7 +26,7 @@ class ScanTab(ft.Tab):
         self.image_viewer = ImageViewer(self.page)
         self.options_control = OptionsControl()
         self.use_control = UseControl()
-        self.presets_control = PresetControl(self.page, self.options_control, self.use_control)
+        self.presets_control = PresetControl(self.page, self.options_control, self.use_control, motor)
         Props.OPTIONS_CONTROL = self.options_control
         Props.USE_CONTROL = self.use_control
 
@@ -86,6 +87,15 @@ class ScanTab(ft.Tab):
         self.presets_control.update_all_radius()
         self.update()
 
+    def refresh_cameras(self):
+        """
+        Refresh camera dependent controls after discovery.
+        :return:
+        """
+        self.image_viewer.refresh_cameras()
+        self.options_control.refresh_cameras()
+        self.use_control.refresh_cameras()
+
     def modify_view_image_size(self, width: int, height: int):
         """
         Modify image viewer size
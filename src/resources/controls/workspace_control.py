@@ -6,6 +6,7 @@ from src.resources.controls.tabs.properties_tab_control import PropertiesTab
 from src.resources.controls.tabs.scan_tab_control import ScanTab
 from src.resources.controls.tabs.routines_tab_control import RoutinesTab
 from src.resources.properties import Properties as Props
+from src.motor_controller import StepperMotorController as Motor
 
 class   WorkspaceControl(ft.Container):
     """
@@ -32,11 +33,21 @@ class   WorkspaceControl(ft.Container):
         self.padding = Props.FRAME_PADDING
         Props.WORKSPACE_TAB = self
 
+        # One motor for the turntable: both tabs scan with it, so they share its
+        # position, homing and session instead of each tracking its own
+        self.motor = Motor(
+            dir_pin=Props.DIR_PIN,
+            step_pin=Props.STEP_PIN,
+            enable_pin=Props.ENA_PIN,
+            endstop_pin=Props.ENDSTOP_PIN,
+            engine=Props.MOTOR_PULSE_ENGINE
+        )
+
         # Used tabs
         self.explorer_control = explorer_control
         self.preview_tab = PreviewTab(Props.PREVIEW_TAB_TITLE, self.page)
-        self.scan_tab = ScanTab(self.page, Props.SCAN_TAB_TITLE)
-        self.routines_tab = RoutinesTab(self.page, Props.ROUTINES_TAB_TITLE)
+        self.scan_tab = ScanTab(self.page, Props.SCAN_TAB_TITLE, self.motor)
+        self.routines_tab = RoutinesTab(self.page, Props.ROUTINES_TAB_TITLE, self.motor)
 
         self.properties_tab = PropertiesTab(
             Props.PROPERTIES_TAB_TITLE,
@@ -73,4 +84,8 @@ class   WorkspaceControl(ft.Container):
     
     def update_image_in_tab(self, file_path: str):
         self.preview_tab.update_image_preview(file_path)
-        
\ No newline at end of file
+
+    def refresh_cameras(self):
+        self.explorer_control.update_cameras()
+        self.scan_tab.refresh_cameras()
+        self.properties_tab.refresh_cameras()
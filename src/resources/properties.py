@@ -6,7 +6,6 @@ It centralizes settings, ensuring easy configuration and avoiding hardcoding val
 import os
 from cryptography.fernet import Fernet
 from flet import Page, Container, Dropdown, Tab
-from src.camera_controller import GPhoto2 as gp
 
 class Properties:
     # GENERAL PAGE
@@ -26,9 +25,14 @@ class Properties:
     ROUTINES_DIRECTORY: str = "src/resources/assets/routines/routines.json"
     SERVERS_DIRECTORY: str = "src/resources/assets/servers.json"
     CREDENTIALS_DIRECTORY: str = "src/resources/assets/credentials/credentials.json"
+    CAMERAS_CACHE_DIRECTORY: str = "src/resources/assets/cameras/cameras.json"
+    RIG_PROFILE_DIRECTORY: str = "src/resources/assets/cameras/rig_profile.json"
+    METRICS_DIRECTORY: str = "src/resources/assets/metrics/"
     CAPTURES_DIRECTORY: str = "src/resources/assets/images/captures/"
     TEST_CAPTURES_DIRECTORY: str = "src/resources/assets/images/view_test/"
     FILTERED_IMAGES_DIRECTORY: str = "src/resources/assets/images/filtered_images/"
+    SWEEP_DIRECTORY: str = "src/resources/assets/images/sweep/"
+    SCAN_PLANS_DIRECTORY: str = "src/resources/assets/scan_plans/scan_plans.json"
     
     OPTIONS_CONTROL: Container = None
     USE_CONTROL: Container = None
@@ -91,6 +95,7 @@ class Properties:
 
     # SCAN TAB
     CURRENT_FREQUENCY: str = ""
+    DEFAULT_SCAN_PLAN: str = "360 [DEG/SHOT]"   # plan used when the frequency has no plan
     CURRENT_FORMAT: str = ""
     CURRENT_RESOLUTION: str = ""
     CURRENT_ISO: str = ""
@@ -99,14 +104,36 @@ class Properties:
     CURRENT_USE_CAMERA2: str = False
     CURRENT_USE_CAMERA3: str = False
     CURRENT_TEST_CAMERA: str = ""
+    LIVE_VIEW_MAX_FPS: float = 8.0
+    LIVE_VIEW_RELEASE_TIMEOUT: float = 5.0  # s a job waits for the last live-view preview to release the camera
 
     CAMERA1_DOWNLOAD_PATH: str = CAPTURES_DIRECTORY + "camera_1/"
     CAMERA2_DOWNLOAD_PATH: str = CAPTURES_DIRECTORY + "camera_2/"
     CAMERA3_DOWNLOAD_PATH: str = CAPTURES_DIRECTORY + "camera_3/"
 
+    # Capture to card while rotating, download in background
+    DEFERRED_DOWNLOAD: bool = False
+    # Cameras are fired by hardware/remote and push their files (gphoto2 --wait-event-and-download)
+    TETHERED_MODE: bool = False
+    TETHER_SHOT_TIMEOUT: float = 30.0
+
+    # Continuous mode: the table spins at constant speed and the cameras fire on the fly
+    CONTINUOUS_MODE: bool = False
+    BURST_MAX_SPEED: float = 30.0       # deg/s
+    BURST_DEFAULT_CYCLE: float = 1.0    # s between shots of a camera not yet measured
+    BURST_CYCLE_MARGIN: float = 1.2     # headroom over the measured cycle
+    BURST_SHUTTER_LAG: float = 0.1      # s from trigger command to exposure
+
+    # Video sweep: record live-view video during one turn and extract the frames at each angle
+    SWEEP_MODE: bool = False
+    SWEEP_SPEED: float = 30.0           # deg/s
+    SWEEP_LEAD_IN: float = 1.0          # s of video before the table starts
+    SWEEP_FRAME_LATENCY: float = 0.05   # s from exposure to the frame reaching the host
+
     # SCAN STATUS
     IS_SCANNING: bool = False
     IS_TESTING: bool = False
+    IS_LIVE_VIEW: bool = False
     IS_FILTERING: bool = False
     IS_SAVING: bool = False
 
@@ -115,6 +142,18 @@ class Properties:
     DEFAULT_HINT: str = "Vacío"
 
     # CAMERAS TEST CLASS
+    # Camera engine: "cli" (gphoto2 process), "libgphoto2" (in-process, needs python-gphoto2)
+    # or "simulated" (synthetic images, no hardware)
+    CAMERA_BACKEND: str = "cli"
+    SIMULATED_CAMERA_OPTIONS: dict = {
+        "cameras": 3,
+        "resolution": (1920, 1080),
+        "trigger_latency": 0.5,
+        "download_latency": 0.5,
+        "failure_rate": 0.0,
+        "download_failure_rate": 0.0,
+        "tether_interval": 2.0,
+    }
     RAW_EXTENSION: str = ".ARW"
     JPEG_EXTENSION: str = ".png"
     CURRENT_FILE_EXTENSION: str = ".png"
@@ -123,13 +162,19 @@ class Properties:
     FORMAT_CAMERA_CONFIG: str = "imagequality"
     RESOLUTION_CAMERA_CONFIG: str = "imagesize"
 
-    CAMERAS_DICT: dict[str, str] = gp.get_cameras()
-    CAMERAS_LIST = (lambda keys: list(keys)[:3] + [None] * (3 - len(list(keys))))(CAMERAS_DICT.keys())
-    DEFAULT_CAMERA_PORT: str = next(iter(CAMERAS_DICT.values()))
-    ISOS_DICT: dict[str, str] = gp.get_config(camera_port=DEFAULT_CAMERA_PORT,camera_config=ISO_CAMERA_CONFIG)
-    SHUTTERSPEEDS_DICT: dict[str, str] = gp.get_config(camera_port=DEFAULT_CAMERA_PORT,camera_config=SHUTTERSPEED_CAMERA_CONFIG)
-    FORMATS_DICT: dict[str, str] = gp.get_config(camera_port=DEFAULT_CAMERA_PORT,camera_config=FORMAT_CAMERA_CONFIG)
-    RESOLUTIONS_DICT: dict[str, str] = gp.get_config(camera_port=DEFAULT_CAMERA_PORT,camera_config=RESOLUTION_CAMERA_CONFIG)
+    # Filled in the background by Cameras.discover() once the page is shown
+    CAMERAS_DICT: dict[str, str] = {None: None}
+    CAMERAS_LIST: list = [None, None, None]
+    DEFAULT_CAMERA_PORT: str = None
+    ISOS_DICT: dict[str, str] = {}
+    SHUTTERSPEEDS_DICT: dict[str, str] = {}
+    FORMATS_DICT: dict[str, str] = {}
+    RESOLUTIONS_DICT: dict[str, str] = {}
+    CAMERAS_SERIALS: dict[str, str] = {}
+    # Logical slots (top/side/low) bound to camera serials in the rig profile
+    CAMERA_SLOTS: tuple[str, str, str] = ("camera_1", "camera_2", "camera_3")
+    USB_DEVICES_DIRECTORY: str = "/sys/bus/usb/devices"
+    HOTPLUG_POLL_INTERVAL: float = 2.0
 
     # ROUTINES
     FAILED_TO_APPLY_FILTER: bool = False
@@ -143,7 +188,6 @@ class Properties:
     }
     APPEND_FILTER: bool = False
     PRODUCT_ID: str = ""
-    LETTER_PREFIX: str = ""
 
     # FILTERS
     FILTER_RESOLUTION_OUTPUT: str = "480p"
@@ -178,4 +222,38 @@ class Properties:
     STEP_PIN: int = 8
     
     # Amarillo  -> ena          -> 12 pin
-    # ENA_PIN: int = 12 # Not used
\ No newline at end of file
+    # None leaves ENA unwired (driver always on); 12 keeps it enabled only during a scan
+    ENA_PIN: int = None
+
+    # Homing switch of the table (active low, pulled up); None uses a software zero
+    ENDSTOP_PIN: int = None
+
+    # Step pulses: "auto" (pigpio daemon if reachable, else sleep loop), "pigpio", "sleep" or "simulated"
+    MOTOR_PULSE_ENGINE: str = "auto"
+
+    # Motion profiles selectable per preset (speeds in steps/s, accel in steps/s², jerk in steps/s³).
+    # kind: "constant", "trapezoidal" or "s_curve". 4000 steps per turn of the plate.
+    # "constante" is the original fixed 1 ms half period; "ligero" starts at that same speed,
+    # so its ramp only ever makes a move faster. Presets saved without a profile use the default.
+    MOTION_PROFILES: dict[str, dict] = {
+        "ligero": {"kind": "trapezoidal", "max_speed": 1200, "accel": 2400, "start_speed": 500},
+        "pesado": {"kind": "s_curve", "max_speed": 600, "accel": 800, "jerk": 3000, "start_speed": 100},
+        "constante": {"kind": "constant", "max_speed": 500},
+    }
+    DEFAULT_MOTION_PROFILE: str = "constante"
+    CURRENT_MOTION_PROFILE: str = DEFAULT_MOTION_PROFILE
+
+    # Settle strategies selectable per preset: how the scan waits for the product to stop
+    # wobbling after each move. kind: "profile" (factor × braking time of the motion profile,
+    # clamped to [min, max] s), "image" (live-view frames of one camera compared until the
+    # mean pixel change, 0-255, is below threshold; a missing frame is retried after `interval` s
+    # and after `misses` in a row it falls back to the profile delay, as with no live view)
+    # or "none" (rigid products).
+    SETTLE_STRATEGIES: dict[str, dict] = {
+        "perfil": {"kind": "profile", "factor": 1.5, "min": 0.1, "max": 3.0},
+        "imagen": {"kind": "image", "threshold": 1.5, "timeout": 5.0, "size": 160,
+                   "interval": 0.1, "misses": 5, "factor": 1.5, "min": 0.1, "max": 3.0},
+        "ninguno": {"kind": "none"},
+    }
+    DEFAULT_SETTLE_STRATEGY: str = "perfil"
+    CURRENT_SETTLE_STRATEGY: str = DEFAULT_SETTLE_STRATEGY
\ No newline at end of file
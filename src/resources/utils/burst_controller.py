@@ -0,0 +1,160 @@
+import time
+import statistics
+import threading
+from src.resources.properties import Properties as Props
+from src.camera_controller import GPhoto2 as gp, UsbTopology
+from src.motor_controller import MotionProfile
+from src.capture_metrics import CaptureMetrics
+from src.scan_plan import CompiledPlan
+from src.resources.utils.executor_controller import Executor
+
+class Burst:
+    """
+    Continuous-rotation capture: the table turns at a constant speed and every
+    selected camera fires on the fly when the table is due at each angle.
+    Downloads go to the background queue, as in deferred mode.
+    """
+
+    @staticmethod
+    def _download_paths() -> tuple[str, str, str]:
+        return Props.CAMERA1_DOWNLOAD_PATH, Props.CAMERA2_DOWNLOAD_PATH, Props.CAMERA3_DOWNLOAD_PATH
+
+    @staticmethod
+    def _cameras() -> dict[str, int]:
+        # {port: camera index 0..2} of the selected, connected cameras
+        uses = (Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3)
+        cameras = {}
+        for index, (name, use) in enumerate(zip(Props.CAMERAS_LIST, uses)):
+            port = Props.CAMERAS_DICT.get(name)
+            if use and port:
+                cameras[port] = index
+        return cameras
+
+    @staticmethod
+    def _trigger_times(camera_port: str) -> list[float]:
+        # Recent trigger-to-card times of a camera; "combined" spans also include the download
+        times = [span["seconds"] for span in CaptureMetrics.recent("trigger")
+                 if span["port"] == camera_port and span.get("ok") and not span.get("combined")]
+        return times[-20:]
+
+    @staticmethod
+    def cycle_time(camera_port: str) -> float:
+        """
+        Seconds a camera needs between shots: median of its recent trigger-to-card
+        times, or BURST_DEFAULT_CYCLE if it has not been measured yet.
+        """
+        times = Burst._trigger_times(camera_port)
+        return statistics.median(times) if times else Props.BURST_DEFAULT_CYCLE
+
+    @staticmethod
+    def shutter_lag(camera_port: str) -> float:
+        """
+        Seconds from the trigger command to the exposure of a camera: the fastest of
+        its recent trigger-to-card times, the one with the least card write after the
+        exposure, or BURST_SHUTTER_LAG if it has not been measured yet.
+        """
+        times = Burst._trigger_times(camera_port)
+        return min(times) if times else Props.BURST_SHUTTER_LAG
+
+    @staticmethod
+    def speed(step_degrees: float, camera_ports: list[str]) -> float:
+        """
+        Table speed in degrees/s that lets the slowest camera shoot every step_degrees.
+        """
+        cycle = max(Burst.cycle_time(port) for port in camera_ports)
+        return min(Props.BURST_MAX_SPEED, step_degrees / (cycle * Props.BURST_CYCLE_MARGIN))
+
+    @staticmethod
+    def run(motor, plan: CompiledPlan) -> dict[str, list[dict]]:
+        """
+        Turns the table forward once through the stops of a compiled plan, shooting on the fly.
+        Every camera fires at the stops where the plan has it, with the plan's file names,
+        a measured shutter lag (see shutter_lag) before the table is due there.
+        Returns {port: [{shot, file, ok, target_angle, estimated_angle}]}.
+        """
+        cameras = Burst._cameras()
+        stops = sorted((step for step in plan.steps if step.cameras), key=lambda step: step.angle)
+        if not cameras or not stops:
+            return {}
+
+        # The closest pair of stops sets the speed
+        angles = [stop.angle for stop in stops]
+        step_degrees = min((b - a for a, b in zip(angles, angles[1:]) if b > a), default=360)
+        steps_per_degree = motor.STEPS_PER_REV / 360
+        speed = Burst.speed(step_degrees, list(cameras))
+        base = motor.profile
+        profile = MotionProfile(
+            name="burst",
+            kind="trapezoidal",
+            max_speed=speed * steps_per_degree,
+            accel=base.accel if base else 2000,
+            start_speed=base.start_speed if base else 100,
+        )
+        lags = {port: Burst.shutter_lag(port) for port in cameras}
+        # Start far enough back to be at cruise speed when the first angle comes by, and
+        # already turning when the slowest camera's trigger goes out (a shutter lag earlier)
+        ramp = ((profile.max_speed ** 2 - profile.start_speed ** 2) / (2 * profile.accel) / steps_per_degree
+                + speed * max(lags.values()))
+        distance = ramp + (angles[-1] - angles[0]) + ramp
+        total_steps = round(distance * steps_per_degree)
+        print(f"Captura continua: {len(stops)} tomas a {speed:.1f}°/s")
+
+        # Fire time of every stop and camera from the start of the turn, computed before
+        # it starts so nothing slow runs between the timed sleep and the shot
+        times = profile.step_times(total_steps)
+        due = {stop.shot: times[min(round((ramp + stop.angle - angles[0]) * steps_per_degree), total_steps)]
+               for stop in stops}
+        fire_offsets = {port: {shot: at - lags[port] for shot, at in due.items()} for port in cameras}
+        lanes = UsbTopology.lanes(list(cameras)) if gp.BUS_AWARE else {port: port for port in cameras}
+
+        motor.move_to(angles[0] - ramp)
+        spin = motor.move_degs_async(distance, profile=profile)
+        deadline = time.monotonic() + 5
+        while motor.motion_started_at() is None and not spin.done() and time.monotonic() < deadline:
+            time.sleep(0.002)
+        started = motor.motion_started_at() or time.monotonic()
+
+        results: dict[str, list[dict]] = {port: [] for port in cameras}
+
+        def shoot(port: str, index: int) -> None:
+            download_path = Burst._download_paths()[index]
+            for stop in stops:
+                if index not in stop.cameras:
+                    continue
+                shot, target, name = stop.shot, stop.angle, stop.names[index]
+                fire_at = started + fire_offsets[port][shot]
+                wait = fire_at - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                if Executor.cancelled():
+                    return
+                # One attempt: a retry would expose far from the angle. The exposure is estimated
+                # from when the trigger actually went out, after the health ping if there was one
+                triggered = []
+                called = time.monotonic()
+                ok = gp.capture_deferred(port, download_path, name, lane=lanes[port], attempts=1,
+                                         on_trigger=lambda: triggered.append(time.monotonic()))
+                fired = triggered[0] if triggered else called
+                estimated = motor.estimated_angle(fired + lags[port])
+                CaptureMetrics.record("exposure", fired - fire_at, port, shot=shot, burst=True,
+                                      target_angle=target % 360, estimated_angle=round(estimated, 2), ok=ok)
+                results[port].append({
+                    "shot": shot,
+                    "file": name,
+                    "ok": ok,
+                    "target_angle": target % 360,
+                    "estimated_angle": round(estimated, 2),
+                })
+
+        workers = [threading.Thread(target=shoot, args=(port, index), daemon=True) for port, index in cameras.items()]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        motor.wait_moves()
+
+        downloads = gp.wait_downloads()
+        failed = [path for path, ok in downloads.items() if not ok]
+        if failed:
+            print(f"Captura continua: no se pudieron descargar {len(failed)} imágenes: {failed}")
+        return results
@@ -0,0 +1,377 @@
+import os
+import json
+import time
+import threading
+from src.resources.properties import Properties as Props
+from src.camera_controller import GPhoto2 as gp, UsbTopology
+from src.resources.utils.executor_controller import Executor
+
+class Cameras:
+
+    _json_file: str = Props.CAMERAS_CACHE_DIRECTORY
+    _rig_file: str = Props.RIG_PROFILE_DIRECTORY
+    _lock = threading.Lock()
+    _discovered: bool = False
+    _rediscover: bool = False  # a new camera showed up while a job was running
+    _configs: tuple[tuple[str, str], ...] = (
+        ("ISOS_DICT", Props.ISO_CAMERA_CONFIG),
+        ("SHUTTERSPEEDS_DICT", Props.SHUTTERSPEED_CAMERA_CONFIG),
+        ("FORMATS_DICT", Props.FORMAT_CAMERA_CONFIG),
+        ("RESOLUTIONS_DICT", Props.RESOLUTION_CAMERA_CONFIG),
+    )
+
+    @staticmethod
+    def _load_json():
+        """
+        Loads data from cameras cache json file.
+        """
+        try:
+            with open(Cameras._json_file, "r") as file:
+                return json.load(file)
+
+        except (FileNotFoundError, json.JSONDecodeError):
+            os.makedirs(os.path.dirname(Cameras._json_file), exist_ok=True)
+            with open(Cameras._json_file, "w") as file:
+                json.dump({"cameras": {}}, file)
+            return {"cameras": {}}
+
+    @staticmethod
+    def _save_json(data):
+        """
+        Saves cameras cache data in cameras json file.
+        """
+        with open(Cameras._json_file, "w") as file:
+            json.dump(data, file, indent=4)
+
+    @staticmethod
+    def _cache_key(model: str, serial: str) -> str:
+        # Duplicated models come back as "Model(1)"; the choices depend on the model only
+        return f"{model.split('(')[0].strip()}|{serial}"
+
+    @staticmethod
+    def get_cached_choices(model: str, serial: str) -> dict[str, dict[str, str]] | None:
+        """
+        Returns the cached config choices for the given camera, if any.
+        """
+        data = Cameras._load_json()
+        return data.get("cameras", {}).get(Cameras._cache_key(model, serial))
+
+    @staticmethod
+    def cache_choices(model: str, serial: str, choices: dict[str, dict[str, str]]):
+        """
+        Stores the config choices for the given camera.
+        """
+        data = Cameras._load_json()
+        data.setdefault("cameras", {})[Cameras._cache_key(model, serial)] = choices
+        Cameras._save_json(data)
+
+    @staticmethod
+    def _load_rig_profile() -> dict[str, str]:
+        """
+        Loads the rig profile: {slot: camera serial}.
+        """
+        try:
+            with open(Cameras._rig_file, "r") as file:
+                return json.load(file).get("slots", {})
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    @staticmethod
+    def _save_rig_profile(slots: dict[str, str]):
+        """
+        Saves the rig profile.
+        """
+        os.makedirs(os.path.dirname(Cameras._rig_file), exist_ok=True)
+        with open(Cameras._rig_file, "w") as file:
+            json.dump({"slots": slots}, file, indent=4)
+
+    @staticmethod
+    def bind_slots(names: list[str], serials: dict[str, str]) -> list:
+        """
+        Binds camera_1..3 to the cameras whose serials are stored in the rig profile,
+        so slots do not depend on --auto-detect order. A bound slot whose camera is
+        missing stays empty; slots not in the profile yet take the remaining cameras
+        in detection order and are saved to it. If none of the profiled cameras is
+        connected (a different rig) the profile is rebuilt.
+        Returns the new CAMERAS_LIST.
+        """
+        profile = Cameras._load_rig_profile()
+        if profile and not set(profile.values()) & set(serials.values()):
+            print("Ninguna cámara del perfil del rig está conectada, se vuelve a asignar.")
+            profile = {}
+        by_serial = {serial: name for name, serial in serials.items()}
+        slots = [by_serial.get(profile.get(slot)) for slot in Props.CAMERA_SLOTS]
+
+        unbound = [name for name in names if name is not None and name not in slots]
+        for i, name in enumerate(slots):
+            if name is None and unbound and Props.CAMERA_SLOTS[i] not in profile:
+                slots[i] = unbound.pop(0)
+
+        changed = False
+        for slot, name in zip(Props.CAMERA_SLOTS, slots):
+            if name is not None and serials.get(name) and profile.get(slot) != serials[name]:
+                profile[slot] = serials[name]
+                changed = True
+        if changed:
+            Cameras._save_rig_profile(profile)
+
+        for slot, name in zip(Props.CAMERA_SLOTS, slots):
+            print(f"{slot}: {name or 'No disponible'} ({profile.get(slot)})")
+        return slots
+
+    @staticmethod
+    def assign_slot(slot_index: int, name: str) -> list:
+        """
+        Binds a slot to the given camera and stores it in the rig profile.
+        If the camera was in another slot, the two slots are swapped.
+        Returns the new CAMERAS_LIST.
+        """
+        with Cameras._lock:
+            slots = list(Props.CAMERAS_LIST)
+            touched = [slot_index]
+            if name in slots:
+                touched.append(slots.index(name))
+                slots[touched[1]] = slots[slot_index]
+            slots[slot_index] = name
+
+            profile = Cameras._load_rig_profile()
+            for i in touched:
+                serial = Props.CAMERAS_SERIALS.get(slots[i])
+                if serial:
+                    profile[Props.CAMERA_SLOTS[i]] = serial
+                else:
+                    profile.pop(Props.CAMERA_SLOTS[i], None)
+            Cameras._save_rig_profile(profile)
+
+            Props.CAMERAS_LIST = slots
+            return slots
+
+    @staticmethod
+    def discover(refresh: bool = False) -> bool:
+        """
+        Detects connected cameras and loads their config choices into Props.
+        Runs once unless refresh is True. Returns True if at least one camera was found.
+        """
+        with Cameras._lock:
+            if Cameras._discovered and not refresh:
+                return Props.DEFAULT_CAMERA_PORT is not None
+
+            try:
+                cameras = gp.get_cameras()
+            except RuntimeError as e:
+                print(f"No se pudieron detectar las cámaras: {e}")
+                cameras = {None: None}
+
+            Props.CAMERAS_DICT = cameras
+            Props.CAMERAS_LIST = (list(cameras.keys())[:3] + [None] * 3)[:3]
+            Props.DEFAULT_CAMERA_PORT = next(iter(cameras.values()))
+            Cameras._discovered = True
+
+            if Props.DEFAULT_CAMERA_PORT is None:
+                print("No hay cámaras conectadas.")
+                return False
+
+            Cameras.report_usb_topology(cameras)
+
+            # Serials give each camera a stable identity across USB re-enumeration
+            Props.CAMERAS_SERIALS = {
+                name: serial for name, _, serial, _ in gp.inventory(cameras) if serial
+            }
+            Props.CAMERAS_LIST = Cameras.bind_slots(list(cameras.keys()), Props.CAMERAS_SERIALS)
+
+            model = next(iter(cameras.keys()))
+            serial = Props.CAMERAS_SERIALS.get(model)
+            choices = Cameras.get_cached_choices(model, serial) if serial else None
+
+            if choices is None:
+                print(f"Consultando opciones de la cámara {model} ({serial})")
+                choices = {}
+                for _, camera_config in Cameras._configs:
+                    try:
+                        choices[camera_config] = gp.get_config(
+                            camera_port=Props.DEFAULT_CAMERA_PORT,
+                            camera_config=camera_config
+                        )
+                    except RuntimeError as e:
+                        print(f"No se pudo leer {camera_config}: {e}")
+                        choices[camera_config] = {}
+                if serial and all(choices.values()):
+                    Cameras.cache_choices(model, serial, choices)
+            else:
+                print(f"Opciones de la cámara {model} ({serial}) cargadas de caché")
+
+            for prop_name, camera_config in Cameras._configs:
+                setattr(Props, prop_name, choices.get(camera_config, {}))
+
+            return True
+
+    @staticmethod
+    def discover_async(on_done=None) -> threading.Thread:
+        """
+        Runs discover() in a background thread and calls on_done() when finished.
+        """
+        def worker():
+            Cameras.discover()
+            if on_done is not None:
+                try:
+                    on_done()
+                except Exception as e:
+                    print(f"No se pudo actualizar la interfaz con las cámaras: {e}")
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
+    @staticmethod
+    def apply_to_all(configs: dict[str, str]) -> dict[str, bool]:
+        """
+        Applies the given configs to every connected camera in parallel.
+        Returns {camera_name: success}.
+        """
+        ports = {
+            Props.CAMERAS_DICT.get(camera): camera
+            for camera in Props.CAMERAS_LIST
+            if camera is not None and Props.CAMERAS_DICT.get(camera)
+        }
+        results = gp.apply_configs({port: configs for port in ports})
+
+        applied = {}
+        for port, result in results.items():
+            applied[ports[port]] = result.ok
+            if not result.ok:
+                print(f"No se pudo aplicar {result.applied} a la cámara {ports[port]} ({port}): {result.error}")
+        return applied
+
+    @staticmethod
+    def apply_capture_settings() -> dict[str, bool]:
+        """
+        Pushes the current format and resolution to every camera.
+        Only the values that differ from what each camera already holds are sent.
+        """
+        configs = {}
+        if Props.CURRENT_FORMAT in Props.FORMATS_DICT:
+            configs[Props.FORMAT_CAMERA_CONFIG] = Props.FORMATS_DICT[Props.CURRENT_FORMAT]
+        if Props.CURRENT_RESOLUTION in Props.RESOLUTIONS_DICT:
+            configs[Props.RESOLUTION_CAMERA_CONFIG] = Props.RESOLUTIONS_DICT[Props.CURRENT_RESOLUTION]
+        if not configs:
+            return {}
+        return Cameras.apply_to_all(configs)
+
+    @staticmethod
+    def _usb_cameras() -> dict[str, str]:
+        """
+        Lists USB devices exposing a still image (PTP) interface straight from sysfs.
+        Returns {port: sysfs_device}, e.g. {"usb:002,006": "2-1.3"}.
+        """
+        links = UsbTopology.scan(Props.USB_DEVICES_DIRECTORY)
+        return {port: link.device for port, link in links.items() if link.still_image}
+
+    @staticmethod
+    def report_usb_topology(cameras: dict[str, str]) -> dict[str, list[str]]:
+        """
+        Prints where each camera sits in the USB tree and warns about cameras
+        sharing a host controller or running below High-Speed.
+        Returns {controller: [camera names]}.
+        """
+        links = UsbTopology.scan(Props.USB_DEVICES_DIRECTORY)
+        controllers = {}
+        for name, port in cameras.items():
+            link = links.get(port)
+            if name is None or link is None:
+                continue
+            controllers.setdefault(link.controller, []).append(name)
+            hubs = " → ".join(link.hubs) or "directo"
+            print(f"USB: {name} ({port}) en {link.controller}/{link.root_hub}, hubs: {hubs}, velocidad: {link.speed}")
+            if link.speed in ("1.5M", "12M"):
+                print(f"Advertencia: {name} negoció {link.speed}; revisa el cable o el hub.")
+
+        for controller, names in controllers.items():
+            if len(names) > 1:
+                print(f"Advertencia: {', '.join(names)} comparten el controlador USB {controller}; "
+                      f"sus descargas se harán de a una.")
+        return controllers
+
+    @staticmethod
+    def _handle_usb_change(added: set[str], removed: set[str]) -> bool:
+        """
+        Remaps cameras after a USB add/remove. Returns True if Props changed.
+        A camera never seen before needs a full discovery, which rebuilds
+        CAMERAS_DICT; it is postponed until the running job (if any) ends.
+        """
+        changed = False
+        with Cameras._lock:
+            for name, port in list(Props.CAMERAS_DICT.items()):
+                if name is not None and port in removed:
+                    print(f"Cámara desconectada: {name} ({port})")
+                    gp.close_session(port)
+                    Props.CAMERAS_DICT[name] = None
+                    changed = True
+            if Props.DEFAULT_CAMERA_PORT in removed:
+                # The default camera is gone: use the next one still connected
+                Props.DEFAULT_CAMERA_PORT = next((port for port in Props.CAMERAS_DICT.values() if port), None)
+
+            unknown = []
+            for port in added:
+                serial = gp.get_serial_for_port(port)
+                name = next((n for n, s in Props.CAMERAS_SERIALS.items() if serial and s == serial), None)
+                if name is None:
+                    unknown.append(port)
+                    continue
+                old_port = Props.CAMERAS_DICT.get(name)
+                if old_port and old_port != port:
+                    gp.close_session(old_port)
+                print(f"Cámara reconectada: {name} ({old_port} → {port})")
+                Props.CAMERAS_DICT[name] = port
+                if (name == next(iter(Props.CAMERAS_DICT.keys()))
+                        or Props.DEFAULT_CAMERA_PORT is None or Props.DEFAULT_CAMERA_PORT == old_port):
+                    Props.DEFAULT_CAMERA_PORT = port
+                changed = True
+
+        if unknown:
+            print(f"Cámara nueva detectada en {unknown}")
+            Cameras._rediscover = True
+        if Cameras._rediscover:
+            if Executor.is_running():
+                if unknown:
+                    print("Se buscarán las cámaras al terminar la ejecución en curso")
+            else:
+                # A camera we have never seen: fall back to a full discovery
+                print("Buscando cámaras...")
+                Cameras._rediscover = False
+                Cameras.discover(refresh=True)
+                changed = True
+
+        return changed
+
+    @staticmethod
+    def watch(on_change=None, interval: float = None) -> threading.Thread | None:
+        """
+        Polls sysfs for camera add/remove events in a background thread,
+        remaps ports by serial and calls on_change() when cameras change.
+        """
+        interval = interval or Props.HOTPLUG_POLL_INTERVAL
+
+        def worker():
+            Cameras.discover()
+            known = set(Cameras._usb_cameras())
+            while True:
+                time.sleep(interval)
+                current = set(Cameras._usb_cameras())
+                if current == known and not Cameras._rediscover:
+                    continue
+                added, removed = current - known, known - current
+                known = current
+                try:
+                    if Cameras._handle_usb_change(added, removed) and on_change is not None:
+                        on_change()
+                except Exception as e:
+                    print(f"Error procesando cambio de cámaras USB: {e}")
+
+        if not os.path.isdir(Props.USB_DEVICES_DIRECTORY):
+            print("No se encontró sysfs USB, la detección en caliente está desactivada.")
+            return None
+
+        thread = threading.Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
+
@@ -0,0 +1,144 @@
+import queue
+import threading
+import traceback
+from concurrent.futures import CancelledError
+
+class Cancelled(CancelledError):
+    """
+    Raised inside a job by Executor.check() once the operator stopped it.
+    """
+
+class Executor:
+    """
+    Runs one long job at a time (a routine or a preset scan) on a worker thread,
+    so the Flet page stays interactive while the table turns.
+
+    The job reports progress with Executor.post(); the events go through a
+    thread-safe queue to a pump thread, started with the job, that hands them
+    to on_event in order. That thread is neither the worker nor Flet's own
+    event loop: callbacks may only do what Flet allows from a background
+    thread (set control properties and call update()).
+    Executor.cancel() stops the job for real: it calls the job's cancellers
+    (motor moves, gphoto2 processes, listeners, uploads) and makes the next
+    Executor.check() in the job's loops raise Cancelled.
+    Controls that must stay away from the cameras while any job runs (live view)
+    register with Executor.add_hooks.
+    """
+
+    _lock = threading.Lock()
+    _cancel = threading.Event()
+    _events: queue.Queue = queue.Queue()
+    _worker: threading.Thread = None
+    _cancellers: list = []
+    _finalizers: list = []
+    _hooks: list = []  # [(on_start, on_finish)] run around every job
+
+    @staticmethod
+    def is_running() -> bool:
+        return Executor._worker is not None and Executor._worker.is_alive()
+
+    @staticmethod
+    def add_hooks(on_start=None, on_finish=None) -> None:
+        """
+        Registers callbacks run on the worker thread around every job:
+        on_start() before the job begins, on_finish() after its finalizers.
+        """
+        Executor._hooks.append((on_start, on_finish))
+
+    @staticmethod
+    def _call(callbacks, action: str) -> None:
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"No se pudo {action} {getattr(callback, '__qualname__', callback)}: {e}")
+
+    @staticmethod
+    def start(job, on_event, on_done=None, cancellers=(), finalizers=()) -> bool:
+        """
+        Starts job() on the worker thread. Returns False if another job is running.
+        on_event(kind, value) receives the posted events on the job's pump thread.
+        on_done(status) is called there last, with "done", "cancelled" or "failed".
+        cancellers are called, in order, when the job is cancelled.
+        finalizers are called, in order, on the worker thread once the job ended,
+        however it ended; e.g. to undo what the cancellers left blocked.
+        """
+        with Executor._lock:
+            if Executor.is_running():
+                return False
+            Executor._cancel.clear()
+            Executor._cancellers = list(cancellers)
+            Executor._finalizers = list(finalizers)
+            Executor._events = queue.Queue()
+            Executor._worker = threading.Thread(target=Executor._run, args=(job, Executor._events), daemon=True)
+            threading.Thread(target=Executor._pump, args=(Executor._events, on_event, on_done), daemon=True).start()
+            Executor._worker.start()
+        return True
+
+    @staticmethod
+    def _run(job, events: queue.Queue) -> None:
+        status = "done"
+        Executor._call([on_start for on_start, _ in Executor._hooks if on_start], "preparar")
+        try:
+            job()
+        except CancelledError:
+            status = "cancelled"
+            print("Ejecución detenida por el operador")
+        except Exception as e:
+            status = "failed"
+            print(f"La ejecución falló: {e}")
+            traceback.print_exc()
+        if status == "done" and Executor._cancel.is_set():
+            status = "cancelled"
+        Executor._call(Executor._finalizers, "cerrar")
+        Executor._call([on_finish for _, on_finish in Executor._hooks if on_finish], "restaurar")
+        events.put(("finished", status))
+
+    @staticmethod
+    def _pump(events: queue.Queue, on_event, on_done) -> None:
+        # Pump thread of one job (a daemon thread of its own, not Flet's event loop):
+        # hands the job's events to the callbacks in order until it finishes
+        while True:
+            kind, value = events.get()
+            try:
+                if kind == "finished":
+                    if on_done:
+                        on_done(value)
+                    return
+                on_event(kind, value)
+            except Exception as e:
+                print(f"No se pudo actualizar la interfaz ({kind}): {e}")
+
+    @staticmethod
+    def post(kind: str, value=None) -> None:
+        """
+        Queues a progress event for the UI, e.g. post("legend", "Scan: ...") or post("value", 0.5).
+        """
+        Executor._events.put((kind, value))
+
+    @staticmethod
+    def cancelled() -> bool:
+        return Executor._cancel.is_set()
+
+    @staticmethod
+    def check() -> None:
+        """
+        Raises Cancelled if the running job was stopped; call it between units of work.
+        """
+        if Executor._cancel.is_set():
+            raise Cancelled()
+
+    @staticmethod
+    def cancel() -> None:
+        """
+        Stops the running job: flags it and calls its cancellers.
+        """
+        if not Executor.is_running() or Executor._cancel.is_set():
+            return
+        Executor._cancel.set()
+        print("Deteniendo la ejecución...")
+        for canceller in Executor._cancellers:
+            try:
+                canceller()
+            except Exception as e:
+                print(f"No se pudo detener {getattr(canceller, '__qualname__', canceller)}: {e}")
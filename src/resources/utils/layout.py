@@ -32,4 +32,10 @@ class Layout(ft.Row):
         self.controls = [
             self.explorer_control,
             self.workspace_control
-        ]
\ No newline at end of file
+        ]
+
+    def refresh_cameras(self):
+        """
+        Propagates the result of camera discovery to the controls.
+        """
+        self.workspace_control.refresh_cameras()
@@ -4,6 +4,18 @@ from src.resources.utils.credentials_controller import Credentials
 from smb.SMBConnection import SMBConnection
 
 class Save:
+
+    _conn: SMBConnection = None  # connection of the upload in progress
+
+    @staticmethod
+    def abort():
+        """
+        Closes the connection of the upload in progress, so the transfer fails right away.
+        """
+        conn = Save._conn
+        if conn is not None:
+            conn.close()
+
     @staticmethod
     def connect(user: str, password: str, display_name: str, server_ip: str):
         conn = SMBConnection(
@@ -58,11 +70,14 @@ class Save:
         file_path = '/' + split_result[1] if len(split_result) > 1 else '/'
         print(f"File path detectado: {file_path}")
 
-        Save.mkdir_p_remote(conn=conn, resource=resource, ruta_remota=dirname(file_path))
-
-        with open(local_file_path, 'rb') as f:
-            conn.storeFile(resource, file_path, f)
-        print(f"Archivo subido: {local_file_path} → //{Props.USE_IP}{remote_file_path}")
+        Save._conn = conn
+        try:
+            Save.mkdir_p_remote(conn=conn, resource=resource, ruta_remota=dirname(file_path))
 
-        conn.close()
+            with open(local_file_path, 'rb') as f:
+                conn.storeFile(resource, file_path, f)
+            print(f"Archivo subido: {local_file_path} → //{Props.USE_IP}{remote_file_path}")
+        finally:
+            Save._conn = None
+            conn.close()
         print("Conexion cerrada correctamente.")  
\ No newline at end of file
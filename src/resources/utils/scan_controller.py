@@ -0,0 +1,144 @@
+import json
+import time
+from src.resources.properties import Properties as Props
+from src.camera_controller import GPhoto2 as gp
+from src.capture_metrics import CaptureMetrics
+from src.scan_plan import ScanPlan, CompiledPlan, PlanStep
+from src.resources.utils.tether_controller import Tether
+from src.resources.utils.settle_controller import Settle
+from src.resources.utils.executor_controller import Executor
+
+class Scan:
+    """
+    Runs the declarative scan plans of SCAN_PLANS_DIRECTORY: every frequency is a
+    plan of angles, cameras and file names, compiled once into motor moves.
+    """
+
+    _plans: dict[str, ScanPlan] = None
+    _naming: dict[str, list[str]] = {}
+    _compiled: dict[tuple, CompiledPlan] = {}
+
+    @staticmethod
+    def _load_json() -> dict:
+        with open(Props.SCAN_PLANS_DIRECTORY, "r", encoding="utf-8") as file:
+            return json.load(file)
+
+    @staticmethod
+    def plans() -> dict[str, ScanPlan]:
+        """
+        Returns {name: ScanPlan}, read from the plans file the first time.
+        """
+        if Scan._plans is None:
+            data = Scan._load_json()
+            Scan._naming = data.get("naming", {})
+            Scan._plans = {name: ScanPlan.from_dict(name, settings) for name, settings in data["plans"].items()}
+        return Scan._plans
+
+    @staticmethod
+    def compile(name: str, naming: str, start: float = 0.0) -> CompiledPlan:
+        """
+        Compiled plan for a frequency, with the file names of the given naming
+        ("routine" or "preset"), routed from the current table angle `start`.
+        Unknown frequencies fall back to DEFAULT_SCAN_PLAN.
+        """
+        plans = Scan.plans()
+        plan = plans.get(name) or plans[Props.DEFAULT_SCAN_PLAN]
+        start = round(start % 360, 3)
+        key = (plan.name, naming, Props.PRODUCT_ID, Props.CURRENT_FILE_EXTENSION, start)
+        if key not in Scan._compiled:
+            Scan._compiled[key] = plan.compile(Scan._naming[naming], Props.PRODUCT_ID,
+                                               Props.CURRENT_FILE_EXTENSION, start)
+        return Scan._compiled[key]
+
+    @staticmethod
+    def namer(plan: CompiledPlan):
+        """
+        namer(camera_index, shot_number) for tethered mode, where files arrive per camera in shot order.
+        Shots beyond the plan keep a plain numbered name.
+        """
+        return lambda camera_index, shot: (plan.name_for(camera_index, shot)
+                                           or f"{Props.PRODUCT_ID}{shot}{Props.CURRENT_FILE_EXTENSION}")
+
+    @staticmethod
+    def _move(motor, step: PlanStep) -> None:
+        motor.move_degs_async(abs(step.move), step.move >= 0)
+
+    @staticmethod
+    def run(motor, plan: CompiledPlan, on_progress=None) -> list[dict[str, bool]]:
+        """
+        Runs a compiled plan stop and go. At every stop the table settles (the plan's
+        own delay or the preset's settle strategy, see Settle), the cameras of the plan
+        fire and, as soon as every shutter closes, the table starts turning to the next
+        stop while the images download (see motor.wait_moves).
+        on_progress(done, total) is called after every stop.
+        Returns the capture results of every stop with cameras.
+        Raises Cancelled (or CancelledError from the motor) if the run is stopped.
+        """
+        if not plan.steps:
+            return []
+        motor.move_to(plan.start)  # no-op unless the table moved since the plan was compiled
+        Scan._move(motor, plan.steps[0])
+
+        results = []
+        expected = {}  # tethered mode: {port: files expected so far}, only the cameras each stop fires
+        for k, step in enumerate(plan.steps):
+            Executor.check()
+            motor.wait_moves()
+            following = plan.steps[k + 1] if k + 1 < len(plan.steps) else None
+            start_next_move = (lambda: Scan._move(motor, following)) if following else None
+
+            if step.settle:
+                with CaptureMetrics.span("settle", strategy="plan", kind="fixed", delay=step.settle):
+                    time.sleep(step.settle)
+            else:
+                # Tethered cameras are busy listening: no live view to watch
+                Settle.wait(motor, [] if Props.TETHERED_MODE else Scan._ports(step))
+            if step.cameras:
+                CaptureMetrics.set_context(angle=step.shot, degrees=step.angle)
+                results.append(Scan._capture(step, expected, start_next_move))
+            elif start_next_move:
+                start_next_move()
+
+            if on_progress:
+                on_progress(k + 1, len(plan.steps))
+        motor.wait_moves()
+        return results
+
+    @staticmethod
+    def _ports(step: PlanStep) -> list[str]:
+        # Ports of the selected cameras that fire at this stop
+        uses = (Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3)
+        ports = [Props.CAMERAS_DICT.get(Props.CAMERAS_LIST[camera_index])
+                 for camera_index in step.cameras if uses[camera_index]]
+        return [port for port in ports if port]
+
+    @staticmethod
+    def _capture(step: PlanStep, expected: dict[str, int], start_next_move) -> dict[str, bool]:
+        # Fires the selected cameras of this stop; start_next_move runs once every shutter closed
+        if Props.TETHERED_MODE:
+            # Cameras are fired by hardware or remotely; just wait for this stop's files to arrive
+            for port in Scan._ports(step):
+                expected[port] = expected.get(port, 0) + 1
+            results = Tether.wait_for({port: expected[port] for port in Scan._ports(step)})
+            if start_next_move:
+                start_next_move()
+            return results
+
+        jobs = []
+        names = {}
+        uses = (Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3)
+        paths = (Props.CAMERA1_DOWNLOAD_PATH, Props.CAMERA2_DOWNLOAD_PATH, Props.CAMERA3_DOWNLOAD_PATH)
+
+        for camera_index in step.cameras:
+            if not uses[camera_index]:
+                continue
+            port = Props.CAMERAS_DICT[Props.CAMERAS_LIST[camera_index]]
+            names[port] = Props.CAMERAS_LIST[camera_index]
+            jobs.append((port, paths[camera_index], step.names[camera_index]))
+
+        # All cameras of the stop fire at once
+        results = gp.capture_images(jobs, deferred=Props.DEFERRED_DOWNLOAD, on_exposed=start_next_move)
+        for port, ok in results.items():
+            if not ok:
+                print(f"Fallo la captura {step.shot} en la cámara {names.get(port)} ({port})")
+        return results
@@ -0,0 +1,121 @@
+import io
+import time
+from PIL import Image, ImageChops, ImageStat
+from src.resources.properties import Properties as Props
+from src.camera_controller import GPhoto2 as gp
+from src.capture_metrics import CaptureMetrics
+
+class Settle:
+    """
+    Waits for the product to stop wobbling after each move, with the settle
+    strategy of the preset (see Properties.SETTLE_STRATEGIES). Every wait is
+    recorded as a "settle" metric tagged with the strategy actually used.
+    """
+
+    @staticmethod
+    def strategy(name: str = None) -> tuple[str, dict]:
+        """
+        Returns (name, settings) of the given strategy, by default the current one.
+        Unknown names fall back to DEFAULT_SETTLE_STRATEGY.
+        """
+        name = name or Props.CURRENT_SETTLE_STRATEGY
+        if name not in Props.SETTLE_STRATEGIES:
+            print(f"Asentamiento desconocido: {name}, usando {Props.DEFAULT_SETTLE_STRATEGY}")
+            name = Props.DEFAULT_SETTLE_STRATEGY
+        return name, Props.SETTLE_STRATEGIES[name]
+
+    @staticmethod
+    def profile_delay(profile, settings: dict) -> float:
+        """
+        Fixed delay for a motion profile: factor × its braking time, clamped to [min, max].
+        """
+        brake = profile.brake_time() if profile else 0.0
+        return min(settings["max"], max(settings["min"], settings["factor"] * brake))
+
+    @staticmethod
+    def motion_score(previous: Image.Image, current: Image.Image) -> float:
+        """
+        Mean absolute pixel change (0-255) between two grayscale frames of the same size.
+        """
+        return ImageStat.Stat(ImageChops.difference(previous, current)).mean[0]
+
+    @staticmethod
+    def _frame(camera_port: str, size: int):
+        # Live-view frame as a small grayscale image, or None
+        data = gp.capture_preview(camera_port)
+        if not data:
+            return None
+        try:
+            image = Image.open(io.BytesIO(data)).convert("L")
+            image.thumbnail((size, size))
+            return image
+        except OSError:
+            return None
+
+    @staticmethod
+    def wait_image(camera_port: str, settings: dict) -> dict:
+        """
+        Compares consecutive live-view frames until the motion score drops below
+        the threshold or the timeout expires. A missing frame is retried after
+        settings["interval"] seconds; after settings["misses"] in a row it gives up.
+        Returns {settled, score, frames, lost}; frames is 0 if the camera has no
+        live view and lost is True if it stopped sending frames halfway.
+        """
+        deadline = time.monotonic() + settings["timeout"]
+        previous = Settle._frame(camera_port, settings["size"])
+        if previous is None:
+            return {"settled": False, "score": None, "frames": 0, "lost": False}
+        frames, score, misses = 1, None, 0
+        while time.monotonic() < deadline:
+            current = Settle._frame(camera_port, settings["size"])
+            if current is None:
+                misses += 1
+                if misses >= settings["misses"]:
+                    return {"settled": False, "score": round(score, 3) if score is not None else None,
+                            "frames": frames, "lost": True}
+                time.sleep(settings["interval"])
+                continue
+            misses = 0
+            frames += 1
+            if current.size == previous.size:
+                score = Settle.motion_score(previous, current)
+                if score < settings["threshold"]:
+                    return {"settled": True, "score": round(score, 3), "frames": frames, "lost": False}
+            previous = current
+        return {"settled": False, "score": round(score, 3) if score is not None else None,
+                "frames": frames, "lost": False}
+
+    @staticmethod
+    def wait(motor, camera_ports: list[str], name: str = None) -> str:
+        """
+        Waits after a move with the given strategy (default: the current one).
+        camera_ports are the cameras about to fire; the image strategy watches the first.
+        Returns the kind of settle actually used: "none", "image" or "profile".
+        """
+        name, settings = Settle.strategy(name)
+        kind = settings["kind"]
+
+        if kind == "none":
+            CaptureMetrics.record("settle", 0.0, strategy=name, kind=kind, ok=True)
+            return kind
+
+        if kind == "image" and camera_ports:
+            start = time.monotonic()
+            result = Settle.wait_image(camera_ports[0], settings)
+            if result["frames"]:
+                CaptureMetrics.record("settle", time.monotonic() - start, camera_ports[0],
+                                      strategy=name, kind=kind, ok=result["settled"],
+                                      score=result["score"], frames=result["frames"], lost=result["lost"])
+            if result["frames"] and not result["lost"]:
+                if not result["settled"]:
+                    print(f"Asentamiento: la imagen no se estabilizó en {settings['timeout']}s "
+                          f"(movimiento {result['score']})")
+                return kind
+            lost = "se perdió el" if result["lost"] else "sin"
+            print(f"Asentamiento: {lost} live-view en {camera_ports[0]}, usando el retardo del perfil")
+
+        # Fixed delay from the motion profile (also the fallback of the image strategy)
+        delay = Settle.profile_delay(motor.profile, settings)
+        with CaptureMetrics.span("settle", strategy=name, kind="profile", delay=round(delay, 3)):
+            time.sleep(delay)
+        return "profile"
@@ -0,0 +1,158 @@
+import io
+import os
+import json
+import time
+import threading
+from PIL import Image
+from src.resources.properties import Properties as Props
+from src.camera_controller import GPhoto2 as gp
+from src.motor_controller import MotionProfile
+from src.capture_metrics import CaptureMetrics
+from src.scan_plan import CompiledPlan
+from src.resources.utils.executor_controller import Executor
+
+class VideoSweep:
+    """
+    Video-sweep capture: every selected camera records its live-view video while
+    the table makes one timed turn, then the frames nearest to each target angle
+    are extracted into the camera download folders, as if they were stills.
+    """
+
+    @staticmethod
+    def _download_paths() -> tuple[str, str, str]:
+        return Props.CAMERA1_DOWNLOAD_PATH, Props.CAMERA2_DOWNLOAD_PATH, Props.CAMERA3_DOWNLOAD_PATH
+
+    @staticmethod
+    def _cameras() -> dict[str, int]:
+        # {port: camera index 0..2} of the selected, connected cameras
+        uses = (Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3)
+        cameras = {}
+        for index, (name, use) in enumerate(zip(Props.CAMERAS_LIST, uses)):
+            port = Props.CAMERAS_DICT.get(name)
+            if use and port:
+                cameras[port] = index
+        return cameras
+
+    @staticmethod
+    def record(motor) -> dict[str, str]:
+        """
+        Records one video per selected camera during a full turn at SWEEP_SPEED.
+        Each video is written as SWEEP_DIRECTORY/camera_N.mjpg with an index
+        camera_N.json holding the offset, size, time and table angle of every frame.
+        Returns {port: index path}.
+        """
+        cameras = VideoSweep._cameras()
+        if not cameras:
+            return {}
+
+        steps_per_degree = motor.STEPS_PER_REV / 360
+        base = motor.profile
+        profile = MotionProfile(
+            name="sweep",
+            kind="trapezoidal",
+            max_speed=Props.SWEEP_SPEED * steps_per_degree,
+            accel=base.accel if base else 2000,
+            start_speed=base.start_speed if base else 100,
+        )
+        # Ramp up before 0° and down after 360°, so every angle is filmed at constant speed
+        ramp = (profile.max_speed ** 2 - profile.start_speed ** 2) / (2 * profile.accel) / steps_per_degree
+        motor.move_to(-ramp)
+
+        stop = threading.Event()
+        indexes: dict[str, list] = {}
+        videos = {port: os.path.join(Props.SWEEP_DIRECTORY, f"camera_{index + 1}.mjpg") for port, index in cameras.items()}
+
+        def record(port: str) -> None:
+            indexes[port] = gp.record_movie(port, videos[port], stop)
+
+        recorders = [threading.Thread(target=record, args=(port,), daemon=True) for port in cameras]
+        for recorder in recorders:
+            recorder.start()
+        time.sleep(Props.SWEEP_LEAD_IN)  # let the cameras start streaming before the table moves
+        print(f"Barrido en video: una vuelta a {Props.SWEEP_SPEED:.1f}°/s")
+        try:
+            motor.move_degs(360 + 2 * ramp, profile=profile)
+        finally:
+            stop.set()
+            for recorder in recorders:
+                recorder.join()
+
+        paths = {}
+        for port, index in indexes.items():
+            frames = [
+                {"offset": offset, "length": length, "time": stamp,
+                 "angle": round(motor.estimated_angle(stamp - Props.SWEEP_FRAME_LATENCY), 3)}
+                for offset, length, stamp in index
+            ]
+            path = os.path.splitext(videos[port])[0] + ".json"
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"video": videos[port], "port": port, "frames": frames}, f)
+            paths[port] = path
+        return paths
+
+    @staticmethod
+    def extract(index_path: str, download_path: str, targets: list[float], names: list[str]) -> list[dict]:
+        """
+        Writes the frame nearest to each target angle into download_path under the
+        matching name. Frames are read one at a time straight from the video.
+        Returns [{file, target_angle, angle, ok}].
+        """
+        with open(index_path, "r", encoding="utf-8") as f:
+            index = json.load(f)
+        frames = index["frames"]
+        port = index["port"]
+        if not frames:
+            print(f"Barrido en video: no hay frames de {port}")
+            return [{"file": name, "target_angle": target % 360, "angle": None, "ok": False}
+                    for target, name in zip(targets, names)]
+
+        def distance(frame, target):
+            return abs((frame["angle"] - target + 180) % 360 - 180)
+
+        picks = [(min(frames, key=lambda frame: distance(frame, target)), target, name)
+                 for target, name in zip(targets, names)]
+
+        os.makedirs(download_path, exist_ok=True)
+        results = []
+        with open(index["video"], "rb") as video:
+            for frame, target, name in sorted(picks, key=lambda pick: pick[0]["offset"]):
+                with CaptureMetrics.span("extract", port, target_angle=target % 360, angle=frame["angle"]):
+                    video.seek(frame["offset"])
+                    data = video.read(frame["length"])
+                    file_path = os.path.join(download_path, name)
+                    ok = VideoSweep._write_frame(data, file_path)
+                results.append({"file": name, "target_angle": target % 360, "angle": frame["angle"], "ok": ok})
+        return results
+
+    @staticmethod
+    def _write_frame(data: bytes, file_path: str) -> bool:
+        # Frames are JPEG: written as is, or converted if the name asks for another format
+        try:
+            if os.path.splitext(file_path)[1].lower() in (".jpg", ".jpeg"):
+                with open(file_path, "wb") as f:
+                    f.write(data)
+            else:
+                Image.open(io.BytesIO(data)).save(file_path)
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Barrido en video: no se pudo escribir {file_path}: {e}")
+            return False
+
+    @staticmethod
+    def run(motor, plan: CompiledPlan) -> dict[str, list[dict]]:
+        """
+        Records the sweep and extracts, for every camera, the frames at the stops
+        where the compiled plan has it, with the plan's file names.
+        Returns {port: [{file, target_angle, angle, ok}]}.
+        """
+        cameras = VideoSweep._cameras()
+        indexes = VideoSweep.record(motor)
+        results = {}
+        for port, index_path in indexes.items():
+            Executor.check()
+            camera_index = cameras[port]
+            stops = [step for step in plan.steps if camera_index in step.cameras]
+            targets = [stop.angle for stop in stops]
+            names = [stop.names[camera_index] for stop in stops]
+            results[port] = VideoSweep.extract(index_path, VideoSweep._download_paths()[camera_index], targets, names)
+        return results
@@ -0,0 +1,99 @@
+import os
+import shutil
+import threading
+from src.resources.properties import Properties as Props
+from src.camera_controller import TetheredCapture
+from src.capture_metrics import CaptureMetrics
+
+class Tether:
+    """
+    Dispatcher for tethered mode: every file a camera pushes to the host is
+    renamed with the routine naming and moved into that camera's download path.
+    """
+
+    _capture: TetheredCapture = None
+    _cond = threading.Condition()
+    _cameras: dict[str, int] = {}   # {port: camera index 0..2}
+    _counts: dict[str, int] = {}    # {port: files received}
+    _namer = None
+
+    @staticmethod
+    def _download_paths() -> tuple[str, str, str]:
+        return Props.CAMERA1_DOWNLOAD_PATH, Props.CAMERA2_DOWNLOAD_PATH, Props.CAMERA3_DOWNLOAD_PATH
+
+    @staticmethod
+    def start(namer) -> bool:
+        """
+        Starts listening on every selected camera.
+        namer(camera_index, shot_number) returns the file name for each arriving shot.
+        Returns False if no selected camera is connected.
+        """
+        Tether.stop()
+        uses = (Props.CURRENT_USE_CAMERA1, Props.CURRENT_USE_CAMERA2, Props.CURRENT_USE_CAMERA3)
+        cameras = {}
+        for index, (name, use) in enumerate(zip(Props.CAMERAS_LIST, uses)):
+            port = Props.CAMERAS_DICT.get(name)
+            if use and port:
+                cameras[port] = index
+        if not cameras:
+            return False
+
+        with Tether._cond:
+            Tether._cameras = cameras
+            Tether._counts = {port: 0 for port in cameras}
+            Tether._namer = namer
+        Tether._capture = TetheredCapture(on_file=Tether._dispatch)
+        Tether._capture.start(list(cameras))
+        return True
+
+    @staticmethod
+    def _dispatch(camera_port: str, file_path: str) -> None:
+        with Tether._cond:
+            index = Tether._cameras.get(camera_port)
+            if index is None:
+                return
+            shot = Tether._counts[camera_port]
+
+        download_path = Tether._download_paths()[index]
+        destination = os.path.join(download_path, Tether._namer(index, shot))
+        with CaptureMetrics.span("download", camera_port, tethered=True):
+            os.makedirs(download_path, exist_ok=True)
+            shutil.move(file_path, destination)
+        print(f"Tethered: {camera_port} → {destination}")
+
+        with Tether._cond:
+            Tether._counts[camera_port] = shot + 1
+            Tether._cond.notify_all()
+
+    @staticmethod
+    def wait_for(expected: dict[str, int], timeout: float = None) -> dict[str, bool]:
+        """
+        Blocks until every camera of `expected` ({port: files}) has delivered at least
+        that many files, the timeout expires or listening stops. Cameras left out are
+        not waited for, so a stop that fires only some cameras does not wait on the rest.
+        Returns {port: reached} for the cameras of `expected`.
+        """
+        timeout = Props.TETHER_SHOT_TIMEOUT if timeout is None else timeout
+
+        def reached() -> dict[str, bool]:
+            return {port: Tether._counts.get(port, 0) >= files for port, files in expected.items()}
+
+        with Tether._cond:
+            Tether._cond.wait_for(lambda: Tether._capture is None or all(reached().values()), timeout=timeout)
+            results = reached()
+        for port, ok in results.items():
+            if not ok:
+                print(f"Tethered: no llegó la toma {expected[port]} de {port} en {timeout}s")
+        return results
+
+    @staticmethod
+    def stop() -> dict[str, int]:
+        """
+        Stops listening. Returns {port: files received}.
+        """
+        capture, Tether._capture = Tether._capture, None
+        if capture is not None:
+            capture.stop()
+        with Tether._cond:
+            Tether._cond.notify_all()  # wake up wait_for
+            return dict(Tether._counts)
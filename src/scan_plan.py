@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """
+    Una parada del plan compilado: cuánto girar, qué cámaras disparan y con qué nombres.
+    """
+    shot: int                           # número de toma según el orden declarado en el plan
+    angle: float                        # ángulo absoluto de la parada, 0 < angle <= 360
+    move: float                         # grados a girar desde la parada anterior (negativo = hacia atrás)
+    cameras: Tuple[int, ...]            # índices de cámara (0..2) que disparan aquí
+    names: Tuple[Optional[str], ...]    # nombre de archivo por índice de cámara (None si no dispara)
+    settle: float                       # segundos de espera antes de disparar
+
+
+@dataclass(frozen=True)
+class CompiledPlan:
+    """
+    Plan listo para ejecutar: paradas ordenadas, movimientos relativos y nombres resueltos.
+    """
+    name: str
+    steps: Tuple[PlanStep, ...]
+    start: float = 0.0                  # ángulo de la mesa desde el que se compiló
+
+    @property
+    def shots(self) -> int:
+        return sum(1 for step in self.steps if step.cameras)
+
+    def travel(self) -> float:
+        return sum(abs(step.move) for step in self.steps)
+
+    def name_for(self, camera_index: int, shot_number: int) -> Optional[str]:
+        # Nombre de la toma número shot_number (en orden de ejecución) de una cámara
+        steps = [step for step in self.steps if camera_index in step.cameras]
+        return steps[shot_number].names[camera_index] if shot_number < len(steps) else None
+
+
+@dataclass
+class ScanPlan:
+    """
+    Plan de escaneo declarativo (ver src/resources/assets/scan_plans/scan_plans.json):
+
+        angles:         lista de ángulos (0 < a <= 360) o {"step": 5, "count": 72}
+        cameras:        cámaras que disparan en cada ángulo (por defecto las tres)
+        angle_cameras:  {"ángulo": [cámaras]} para cambiarlas en ángulos puntuales
+        letters:        por cámara, {"toma": "letra"} para el campo {letter} del nombre
+        settle:         segundos de espera antes de disparar en cada parada
+        direction:      "shortest" (el menor recorrido alrededor del círculo, empezando
+                        por cualquier toma), "forward" o "backward" (barrido desde la mesa)
+
+    Los ángulos sin cámaras son puntos de paso: su giro se suma al de la parada
+    siguiente. Al final del plan sí se recorren (p.ej. una vuelta completa sin fotos).
+    """
+    name: str
+    angles: List[float]
+    cameras: Tuple[int, ...] = (0, 1, 2)
+    angle_cameras: Dict[float, Tuple[int, ...]] = field(default_factory=dict)
+    letters: List[Dict[int, str]] = field(default_factory=lambda: [{}, {}, {}])
+    settle: float = 0.0
+    direction: str = "shortest"
+
+    DIRECTIONS = ("shortest", "forward", "backward")
+
+    @staticmethod
+    def from_dict(name: str, settings: Dict[str, object]) -> "ScanPlan":
+        angles = settings.get("angles", [])
+        if isinstance(angles, dict):
+            angles = [angles["step"] * (i + 1) for i in range(int(angles["count"]))]
+        direction = settings.get("direction", "shortest")
+        if direction not in ScanPlan.DIRECTIONS:
+            raise ValueError(f"Plan {name}: dirección desconocida {direction}")
+        for angle in angles:
+            if not 0 < float(angle) <= 360:
+                raise ValueError(f"Plan {name}: ángulo fuera de rango {angle}")
+        return ScanPlan(
+            name=name,
+            angles=[float(angle) for angle in angles],
+            cameras=tuple(settings.get("cameras", (0, 1, 2))),
+            angle_cameras={float(angle): tuple(cams) for angle, cams in settings.get("angle_cameras", {}).items()},
+            letters=[{int(shot): letter for shot, letter in table.items()}
+                     for table in settings.get("letters", [{}, {}, {}])],
+            settle=float(settings.get("settle", 0.0)),
+            direction=direction,
+        )
+
+    @staticmethod
+    def _route(angles: List[float], start: float, forward: bool,
+               first: Optional[float] = None) -> List[Tuple[float, float]]:
+        # Ángulos distintos como [(ángulo, giro)] en un sentido. Sin first se barre desde
+        # start (un ángulo en start queda al final, tras la vuelta); con first se llega
+        # a él por el camino más corto y desde ahí se barre el resto del círculo.
+        sign = 1.0 if forward else -1.0
+        origin = start if first is None else first
+
+        def ahead(angle: float) -> float:
+            distance = (sign * (angle - origin)) % 360
+            return distance if distance or first is not None else 360.0
+
+        route: List[Tuple[float, float]] = []
+        done = 0.0
+        for angle in sorted(angles, key=ahead):
+            route.append((angle, sign * (ahead(angle) - done)))
+            done = ahead(angle)
+        if first is not None:
+            route[0] = (first, (first - start + 180) % 360 - 180)
+        return route
+
+    def _order(self, start: float = 0.0) -> List[Tuple[int, float, float]]:
+        # Tomas (número, ángulo, giro desde la parada anterior) en orden de recorrido
+        stops: Dict[float, List[int]] = {}
+        for shot, angle in enumerate(self.angles):
+            stops.setdefault(angle, []).append(shot)
+        if not stops:
+            return []
+        if self.direction == "shortest":
+            # Cada toma como primera, en ambos sentidos: el menor recorrido alrededor del círculo
+            routes = [ScanPlan._route(list(stops), start, forward, first)
+                      for forward in (True, False) for first in stops]
+            route = min(routes, key=lambda route: sum(abs(move) for _, move in route))
+        else:
+            route = ScanPlan._route(list(stops), start, self.direction == "forward")
+        # Las tomas repetidas de un ángulo van seguidas, sin giro entre ellas
+        return [(shot, angle, move if k == 0 else 0.0)
+                for angle, move in route for k, shot in enumerate(stops[angle])]
+
+    def compile(self, templates: List[str], product: str = "", ext: str = "",
+                start: float = 0.0) -> CompiledPlan:
+        """
+        Ordena las paradas para el menor recorrido, une movimientos y resuelve los nombres.
+        templates: un formato por cámara con {product}, {shot}, {letter} y {ext}.
+        start: ángulo actual de la mesa, desde el que se calcula el primer giro.
+        """
+        steps: List[PlanStep] = []
+        pending = 0.0  # giro de puntos de paso aún no ejecutado
+        merged: Dict[float, int] = {}  # ángulo → índice en steps, para unir tomas repetidas
+        shots = self._order(start)
+        for i, (shot, angle, move) in enumerate(shots):
+            cameras = self.angle_cameras.get(angle, self.cameras)
+            last = i == len(shots) - 1
+            if not cameras and not last:
+                pending += move
+                continue
+            if angle in merged and cameras:
+                # Mismo ángulo declarado dos veces: una sola parada con todas las cámaras
+                # (una cámara repetida conserva el nombre de su primera toma)
+                index = merged[angle]
+                previous = steps[index]
+                names = list(previous.names)
+                for camera in cameras:
+                    if names[camera] is None:
+                        names[camera] = self._name(templates, camera, shot, product, ext)
+                steps[index] = PlanStep(previous.shot, angle, previous.move,
+                                        tuple(sorted(set(previous.cameras) | set(cameras))), tuple(names),
+                                        previous.settle)
+                continue
+            names = tuple(self._name(templates, camera, shot, product, ext) if camera in cameras else None
+                          for camera in range(len(templates)))
+            steps.append(PlanStep(shot, angle, move + pending, tuple(cameras), names, self.settle))
+            merged[angle] = len(steps) - 1
+            pending = 0.0
+        return CompiledPlan(self.name, tuple(steps), start)
+
+    def _name(self, templates: List[str], camera: int, shot: int, product: str, ext: str) -> str:
+        letters = self.letters[camera] if camera < len(self.letters) else {}
+        return templates[camera].format(product=product, shot=shot, letter=letters.get(shot, ""), ext=ext)
@@ -0,0 +1,197 @@
+import io
+import os
+import random
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from src.camera_controller import CameraBackend, ConfigResult
+from src.capture_metrics import CaptureMetrics
+
+
+class SimulatedBackend(CameraBackend):
+    """
+    Motor de cámaras simuladas para medir rutinas sin hardware: genera imágenes
+    sintéticas de un producto e inyecta latencias y fallos configurables.
+    """
+    name = "simulated"
+    MODEL = "Simulated Camera"
+
+    CHOICES: Dict[str, Tuple[str, ...]] = {
+        "iso": ("Auto ISO", "100", "200", "400", "800", "1600", "3200", "6400"),
+        "shutterspeed": ("1/4000", "1/1000", "1/250", "1/125", "1/60", "1/30", "1/15", "1/4", "1"),
+        "imagequality": ("Standard", "Fine", "Extra Fine", "RAW", "RAW+JPEG"),
+        "imagesize": ("Large Image", "Medium Image", "Small Image"),
+    }
+    MOVIE_FPS = 30
+    SIZE_SCALES = {"Large Image": 1.0, "Medium Image": 0.5, "Small Image": 0.25}
+    FORMATS = {".png": "PNG", ".jpg": "JPEG", ".jpeg": "JPEG", ".tif": "TIFF", ".tiff": "TIFF"}
+
+    def __init__(self, cameras: int = 3, resolution: Tuple[int, int] = (1920, 1080),
+                 image_format: Optional[str] = None, trigger_latency: float = 0.5,
+                 download_latency: float = 0.5, jitter: float = 0.2, failure_rate: float = 0.0,
+                 download_failure_rate: float = 0.0, tether_interval: float = 2.0,
+                 seed: Optional[int] = None):
+        """
+        :param cameras: Número de cámaras simuladas (puertos "sim:001", "sim:002", ...).
+        :param resolution: Resolución de 'Large Image'; Medium y Small la escalan.
+        :param image_format: Formato PIL forzado ("PNG", "JPEG"...); None → según extensión.
+        :param trigger_latency: Segundos de disparo por captura.
+        :param download_latency: Segundos de descarga por imagen.
+        :param jitter: Variación relativa (0.2 → ±20 %) aplicada a las latencias.
+        :param failure_rate: Probabilidad de que falle un disparo.
+        :param download_failure_rate: Probabilidad de que falle una descarga.
+        :param tether_interval: Segundos entre fotos "disparadas por hardware" en modo tethered.
+        :param seed: Semilla para repetir exactamente una corrida.
+        """
+        self.resolution = resolution
+        self.image_format = image_format
+        self.trigger_latency = trigger_latency
+        self.download_latency = download_latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.download_failure_rate = download_failure_rate
+        self.tether_interval = tether_interval
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._ports = [f"sim:{i:03d}" for i in range(1, cameras + 1)]
+        self._port_locks = {port: threading.Lock() for port in self._ports}
+        self._values = {port: {config: choices[0] for config, choices in self.CHOICES.items()}
+                        for port in self._ports}
+        self._shots = {port: 0 for port in self._ports}
+        self._card: Dict[str, Dict[str, int]] = {port: {} for port in self._ports}
+
+    # ---------- Simulación ----------
+    def _check_port(self, camera_port: str) -> None:
+        if camera_port not in self._port_locks:
+            raise RuntimeError(f"No hay cámara en {camera_port}")
+
+    def _wait(self, latency: float) -> None:
+        with self._lock:
+            factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+        time.sleep(max(0.0, latency * factor))
+
+    def _fails(self, rate: float) -> bool:
+        with self._lock:
+            return self._random.random() < rate
+
+    def _image(self, camera_port: str, shot: int, size: Tuple[int, int]) -> Image.Image:
+        # Producto sintético: fondo claro, cuerpo elíptico con color por cámara y
+        # una marca que gira con cada toma para que las imágenes no se repitan.
+        width, height = size
+        index = self._ports.index(camera_port)
+        image = Image.new("RGB", size, (235, 235, 235))
+        draw = ImageDraw.Draw(image)
+        box = (width * 0.3, height * 0.15, width * 0.7, height * 0.85)
+        color = ((70 + 60 * index) % 256, (130 + 40 * shot) % 256, 180)
+        draw.ellipse(box, fill=color, outline=(40, 40, 40), width=max(1, width // 300))
+        mark_x = width * (0.35 + 0.3 * ((shot * 5) % 360) / 360)
+        draw.rectangle((mark_x, height * 0.45, mark_x + width * 0.03, height * 0.55), fill=(250, 250, 250))
+        draw.text((10, 10), f"{camera_port} #{shot}", fill=(20, 20, 20))
+        return image
+
+    def _write(self, camera_port: str, shot: int, file_path: str) -> None:
+        scale = self.SIZE_SCALES.get(self._values[camera_port]["imagesize"], 1.0)
+        size = (max(1, int(self.resolution[0] * scale)), max(1, int(self.resolution[1] * scale)))
+        image_format = self.image_format or self.FORMATS.get(os.path.splitext(file_path)[1].lower(), "JPEG")
+        self._image(camera_port, shot, size).save(file_path, format=image_format)
+
+    # ---------- CameraBackend ----------
+    def get_cameras(self) -> Dict[str, str]:
+        cams: Dict[str, str] = {}
+        for i, port in enumerate(self._ports):
+            cams[self.MODEL if i == 0 else f"{self.MODEL}({i})"] = port
+        return cams
+
+    def get_serial(self, camera_port: str, timeout: float = 8.0) -> Optional[str]:
+        if camera_port not in self._port_locks:
+            return None
+        return f"SIM{self._ports.index(camera_port) + 1:05d}"
+
+    def get_config(self, camera_port: str, camera_config: str) -> Dict[str, str]:
+        self._check_port(camera_port)
+        if camera_config not in self.CHOICES:
+            raise RuntimeError(f"{camera_config} not found in configuration tree")
+        return {value: str(idx) for idx, value in enumerate(self.CHOICES[camera_config])}
+
+    def set_configs(self, camera_port: str, configs: Dict[str, str]) -> ConfigResult:
+        result = ConfigResult(camera_port=camera_port)
+        if camera_port not in self._port_locks:
+            result.applied = {camera_config: False for camera_config in configs}
+            result.error = f"No hay cámara en {camera_port}"
+            return result
+        for camera_config, config_value in configs.items():
+            choices = self.CHOICES.get(camera_config, ())
+            value = str(config_value)
+            if value.isdigit() and int(value) < len(choices):
+                value = choices[int(value)]
+            result.applied[camera_config] = value in choices
+            if value in choices:
+                self._values[camera_port][camera_config] = value
+            else:
+                result.error = f"{camera_config}={config_value} no es válido"
+        return result
+
+    def ping(self, camera_port: str, timeout: float = 8.0) -> None:
+        return None
+
+    def capture_and_download(self, camera_port: str, file_path: str, timeout: float = 40.0) -> bool:
+        with CaptureMetrics.span("trigger", camera_port):
+            camera_path = self.capture_to_card(camera_port, timeout=timeout)
+        if camera_path is None:
+            return False
+        with CaptureMetrics.span("download", camera_port):
+            return self.download(camera_port, camera_path, file_path, timeout=timeout)
+
+    def capture_to_card(self, camera_port: str, timeout: float = 20.0) -> Optional[str]:
+        self._check_port(camera_port)
+        with self._port_locks[camera_port]:
+            self._wait(self.trigger_latency)
+            if self._fails(self.failure_rate):
+                print(f"[Simulated] Falló el disparo en {camera_port}")
+                return None
+            self._shots[camera_port] += 1
+            shot = self._shots[camera_port]
+            camera_path = f"/store_00010001/DCIM/100MSDCF/DSC{shot:05d}.JPG"
+            self._card[camera_port][camera_path] = shot
+            return camera_path
+
+    def download(self, camera_port: str, camera_path: str, file_path: str, timeout: float = 40.0) -> bool:
+        self._check_port(camera_port)
+        with self._port_locks[camera_port]:
+            shot = self._card[camera_port].get(camera_path)
+            if shot is None:
+                return False
+            self._wait(self.download_latency)
+            if self._fails(self.download_failure_rate):
+                print(f"[Simulated] Falló la descarga de {camera_path} en {camera_port}")
+                return False
+            self._write(camera_port, shot, file_path)
+            del self._card[camera_port][camera_path]
+            return True
+
+    def capture_preview(self, camera_port: str) -> Optional[bytes]:
+        self._check_port(camera_port)
+        buffer = io.BytesIO()
+        self._image(camera_port, self._shots[camera_port], (640, 424)).save(buffer, format="JPEG")
+        return buffer.getvalue()
+
+    def wait_events(self, camera_port: str, staging_dir: str, on_file, stop: threading.Event) -> None:
+        while not stop.wait(self.tether_interval):
+            camera_path = self.capture_to_card(camera_port)
+            if camera_path is None:
+                continue
+            file_path = os.path.join(staging_dir, os.path.basename(camera_path))
+            if self.download(camera_port, camera_path, file_path):
+                on_file(file_path)
+
+    def capture_movie(self, camera_port: str, on_frame, stop: threading.Event) -> None:
+        # Live-view a MOVIE_FPS, como una cámara real
+        self._check_port(camera_port)
+        while not stop.wait(1.0 / self.MOVIE_FPS):
+            on_frame(self.capture_preview(camera_port))
+
+    def close(self, camera_port: Optional[str] = None) -> None:
+        return None
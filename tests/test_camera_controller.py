@@ -0,0 +1,266 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.camera_controller import CameraHealth, CliBackend, GPhoto2Session, UsbTopology
+
+# Stand-in for 'gphoto2 --shell': prompt, optional echo, a few commands, logged to FAKE_LOG
+FAKE_SHELL = r'''
+import os, sys, time
+log = open(os.environ["FAKE_LOG"], "a")
+prompt = "gphoto2: {%s} /> " % os.getcwd()
+def out(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+out(prompt)
+for line in sys.stdin:
+    command = line.strip()
+    log.write(command + "\n")
+    log.flush()
+    if command == "exit":
+        break
+    if os.environ.get("FAKE_ECHO"):
+        out(command + "\n")
+    if command == "die":
+        sys.exit(1)
+    if command == "hang":
+        time.sleep(2)
+    if command.startswith("set-config capturetarget") and os.environ.get("FAKE_NO_TARGET"):
+        out("*** Error (-2: 'Bad parameters') ***\n")
+    elif command == "get-config iso":
+        out("Label: ISO Speed\nCurrent: 100\nChoice: 0 Auto\nChoice: 1 100\n")
+    out(prompt)
+'''
+
+
+@pytest.fixture
+def shell(tmp_path, monkeypatch):
+    """
+    Runs the sessions on the fake shell. Returns (launches, commands): the argv
+    of every Popen call and a function listing the commands the shells received.
+    """
+    script = tmp_path / "fake_gphoto2.py"
+    script.write_text(FAKE_SHELL)
+    log = tmp_path / "commands.log"
+    launches = []
+    popen = subprocess.Popen
+
+    def fake_popen(args, **kwargs):
+        launches.append(args)
+        return popen([sys.executable, str(script)], **kwargs)
+
+    monkeypatch.setattr(subprocess, "Popen", fake_popen)
+    monkeypatch.setenv("FAKE_LOG", str(log))
+    return launches, lambda: log.read_text().split("\n")[:-1] if log.exists() else []
+
+
+@pytest.fixture
+def session():
+    sessions = []
+
+    def open_session(**env):
+        sessions.append(GPhoto2Session("usb:001,005", env))
+        return sessions[-1]
+
+    yield open_session
+    for opened in sessions:
+        opened.close()
+
+
+def test_start_sets_capture_target(shell, session):
+    launches, commands = shell
+    camera = session()
+    camera.start()
+    assert launches == [["gphoto2", "--port", "usb:001,005", "--shell"]]
+    assert camera.is_alive() and os.path.isdir(camera.staging_dir)
+    assert commands() == ["set-config capturetarget=1"]
+
+
+def test_start_survives_bodies_without_capture_target(shell, session):
+    camera = session(FAKE_NO_TARGET="1")
+    camera.start()
+    assert camera.is_alive()
+
+
+def test_execute_strips_prompt(shell, session):
+    camera = session()
+    out = camera.execute("get-config iso")
+    assert out.splitlines() == ["Label: ISO Speed", "Current: 100", "Choice: 0 Auto", "Choice: 1 100"]
+    assert not GPhoto2Session.PROMPT_RX.search(out)
+
+
+def test_execute_strips_echo(shell, session):
+    camera = session(FAKE_ECHO="1")
+    out = camera.execute("get-config iso")
+    assert out.splitlines()[0] == "Label: ISO Speed"
+    assert camera.execute("summary") == ""
+
+
+def test_read_config_caches_value_and_choices(shell, session):
+    camera = session()
+    camera.read_config("iso")
+    assert camera.config_choices["iso"] == {"Auto": "0", "100": "1"}
+    assert camera.has_value("iso", "100") and camera.has_value("iso", "1")
+    assert not camera.has_value("iso", "Auto")
+
+
+def test_dead_shell_is_restarted(shell, session):
+    launches, commands = shell
+    camera = session()
+    camera.execute("summary")
+    with pytest.raises(RuntimeError):
+        camera.execute("die")
+    assert not camera.is_alive() and camera.staging_dir is None
+    camera.execute("summary")
+    assert len(launches) == 2
+    assert commands() == ["set-config capturetarget=1", "summary", "die",
+                          "set-config capturetarget=1", "summary"]
+
+
+def test_hung_command_drops_the_session(shell, session):
+    launches, _ = shell
+    camera = session()
+    with pytest.raises(subprocess.TimeoutExpired):
+        camera.execute("hang", timeout=0.5)
+    assert camera.proc is None
+    camera.execute("summary")
+    assert len(launches) == 2
+
+
+def test_failed_output():
+    assert GPhoto2Session.failed("*** Error (-53: 'Could not claim the USB device') ***")
+    assert not GPhoto2Session.failed("New file is in location /store_00010001/DCIM/100CANON/IMG_0001.JPG")
+
+
+@pytest.fixture
+def health():
+    return CameraHealth("usb:001,005")
+
+
+def record_latencies(health, latencies, kind="capture"):
+    for latency in latencies:
+        health.record_success(latency, kind)
+
+
+def test_health_states(health):
+    assert health.state == CameraHealth.SUSPECT and health.needs_ping()
+    health.record_success(1.0)
+    assert health.state == CameraHealth.HEALTHY and not health.needs_ping()
+    health.record_failure(1.0)
+    assert health.state == CameraHealth.SUSPECT and health.needs_ping()
+    health.record_failure(1.0)
+    health.record_failure(1.0)
+    assert health.state == CameraHealth.FAILED
+    health.record_success(1.0)
+    assert health.state == CameraHealth.HEALTHY and health.consecutive_failures == 0
+
+
+def test_idle_camera_needs_ping(health, monkeypatch):
+    health.record_success(1.0)
+    monkeypatch.setattr(CameraHealth, "IDLE_PING_SECONDS", 0.0)
+    assert health.needs_ping()
+
+
+def test_timeout_keeps_default_without_history(health):
+    record_latencies(health, [1.0] * (CameraHealth.MIN_SAMPLES - 1))
+    assert health.p95() is None
+    assert health.timeout(30.0) == 30.0
+
+
+def test_timeout_follows_p95(health):
+    record_latencies(health, [5.0] * CameraHealth.MIN_SAMPLES)
+    assert health.timeout(30.0) == pytest.approx(5.0 * CameraHealth.TIMEOUT_FACTOR)
+    # Never above the default nor below MIN_TIMEOUT
+    assert health.timeout(12.0) == 12.0
+    other = CameraHealth("usb:001,006")
+    record_latencies(other, [0.5] * CameraHealth.MIN_SAMPLES)
+    assert other.timeout(30.0) == CameraHealth.MIN_TIMEOUT
+
+
+def test_timeout_per_kind(health):
+    record_latencies(health, [6.0] * CameraHealth.MIN_SAMPLES, kind="download")
+    assert health.timeout(30.0) == 30.0
+    assert health.timeout(30.0, kind="download") == pytest.approx(18.0)
+
+
+def test_backoff(health):
+    assert health.backoff(1) == pytest.approx(0.7)
+    assert health.backoff(3) == pytest.approx(2.1)
+    record_latencies(health, [0.4] * CameraHealth.MIN_SAMPLES)
+    assert health.backoff(2) == pytest.approx(0.2 * 2)
+    record_latencies(health, [2.0] * 50)
+    assert health.backoff(2) == pytest.approx(0.5 * 2)
+
+
+def make_device(root, entry, bus, dev, speed="480", ptp=False):
+    path = root / entry
+    path.mkdir(parents=True)
+    (path / "busnum").write_text(f"{bus}\n")
+    (path / "devnum").write_text(f"{dev}\n")
+    (path / "speed").write_text(f"{speed}\n")
+    interface = path / f"{entry}:1.0"
+    interface.mkdir()
+    (interface / "bInterfaceClass").write_text("06\n" if ptp else "09\n")
+
+
+@pytest.fixture
+def sysfs(tmp_path):
+    # Two host controllers: two cameras behind a hub on bus 1, one camera alone on bus 2
+    devices = tmp_path / "devices"
+    for bus, controller in ((1, "0000:00:14.0"), (2, "0000:01:00.0")):
+        hub = tmp_path / "pci" / controller / f"usb{bus}"
+        hub.mkdir(parents=True)
+        devices.mkdir(exist_ok=True)
+        os.symlink(hub, devices / f"usb{bus}")
+    make_device(devices, "1-1", 1, 2)
+    make_device(devices, "1-1.2", 1, 3, ptp=True)
+    make_device(devices, "1-1.3", 1, 4, ptp=True)
+    make_device(devices, "2-1", 2, 2, speed="5000", ptp=True)
+    (devices / "1-1.2:1.0").mkdir()  # interfaces also appear at the top level
+    return str(devices)
+
+
+def test_scan_resolves_links(sysfs):
+    links = UsbTopology.scan(sysfs)
+    assert sorted(links) == ["usb:001,002", "usb:001,003", "usb:001,004", "usb:002,002"]
+
+    camera = links["usb:001,003"]
+    assert camera.device == "1-1.2"
+    assert camera.bus == 1
+    assert camera.speed == "480M"
+    assert camera.root_hub == "usb1"
+    assert camera.controller == "0000:00:14.0"
+    assert camera.hubs == ["1-1"]
+    assert camera.still_image
+    # The hub is not a sibling; the camera on the other controller neither
+    assert camera.siblings == ["usb:001,004"]
+
+    alone = links["usb:002,002"]
+    assert alone.controller == "0000:01:00.0" and alone.speed == "5000M"
+    assert alone.hubs == [] and alone.siblings == []
+    assert not links["usb:001,002"].still_image
+
+
+def test_scan_without_sysfs(tmp_path):
+    assert UsbTopology.scan(str(tmp_path / "missing")) == {}
+
+
+def test_lanes_group_by_controller(sysfs):
+    lanes = UsbTopology.lanes(["usb:001,003", "usb:001,004", "usb:002,002", "ptpip:10.0.0.2"], sysfs)
+    assert lanes == {
+        "usb:001,003": "0000:00:14.0",
+        "usb:001,004": "0000:00:14.0",
+        "usb:002,002": "0000:01:00.0",
+        "ptpip:10.0.0.2": "ptpip:10.0.0.2",
+    }
+
+
+def test_split_frames_keeps_partial_frame():
+    buffer = bytearray(b"xx\xff\xd8one\xff\xd9\xff\xd8tw")
+    assert CliBackend.split_frames(buffer) == [b"\xff\xd8one\xff\xd9"]
+    assert buffer == bytearray(b"\xff\xd8tw")
+    buffer += b"o\xff\xd9"
+    assert CliBackend.split_frames(buffer) == [b"\xff\xd8two\xff\xd9"]
+    assert buffer == bytearray()
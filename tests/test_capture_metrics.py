@@ -0,0 +1,46 @@
+import json
+
+import pytest
+
+from src.capture_metrics import CaptureMetrics
+
+
+def spans(phase, values):
+    return [{"phase": phase, "seconds": value} for value in values]
+
+
+def test_summary_per_phase():
+    summary = CaptureMetrics.summary(spans("trigger", [0.4, 0.1, 0.3, 0.2]) + spans("download", [2.0]))
+    assert summary["trigger"] == {"count": 4, "total": 1.0, "mean": 0.25, "p50": 0.3, "p95": 0.4, "max": 0.4}
+    assert summary["download"] == {"count": 1, "total": 2.0, "mean": 2.0, "p50": 2.0, "p95": 2.0, "max": 2.0}
+
+
+def test_summary_p95_drops_the_slowest_twentieth():
+    values = [float(i) for i in range(1, 101)]
+    summary = CaptureMetrics.summary(spans("motor_move", values))["motor_move"]
+    assert summary["p50"] == 51.0
+    assert summary["p95"] == 96.0
+    assert summary["max"] == 100.0
+
+
+def test_summary_of_nothing():
+    assert CaptureMetrics.summary([]) == {}
+
+
+def test_run_report(tmp_path):
+    CaptureMetrics.start_run("Rutina 1", cameras={"Camara 1": "usb:001,003"})
+    CaptureMetrics.set_context(angle=1, degrees=45.0)
+    with CaptureMetrics.span("trigger", "usb:001,003"):
+        pass
+    with pytest.raises(RuntimeError):
+        with CaptureMetrics.span("download", "usb:001,003"):
+            raise RuntimeError("cable")
+    path = CaptureMetrics.end_run(str(tmp_path))
+
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    assert report["routine"] == "Rutina 1"
+    assert set(report["by_camera"]["Camara 1"]) == {"trigger", "download"}
+    assert [(span["phase"], span["ok"], span["degrees"]) for span in report["spans"]] == [
+        ("trigger", True, 45.0), ("download", False, 45.0)]
+    assert CaptureMetrics.tags()["angle"] is None
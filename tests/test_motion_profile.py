@@ -0,0 +1,88 @@
+import pytest
+
+from src.motor_controller import MotionProfile, StepperMotorController
+
+STEPS_5_DEG = round(5 * StepperMotorController.STEPS_PER_REV / 360)
+BASELINE_5_DEG = STEPS_5_DEG * 2 * 0.001  # original loop: 1 ms high + 1 ms low per step
+
+
+@pytest.fixture
+def props():
+    # The preset profiles live in Properties, which needs the UI dependencies
+    return pytest.importorskip("src.resources.properties").Properties
+
+
+@pytest.fixture
+def profile(props):
+    return lambda name: MotionProfile.from_settings(name, props.MOTION_PROFILES[name])
+
+
+def test_legacy_presets_keep_constant_speed(props, profile):
+    assert props.DEFAULT_MOTION_PROFILE == "constante"
+    assert profile("constante").duration(STEPS_5_DEG) == pytest.approx(BASELINE_5_DEG)
+
+
+def test_light_profile_never_slower_than_baseline(profile):
+    light = profile("ligero")
+    assert light.start_speed >= 500
+    for steps in (1, 10, STEPS_5_DEG, 500, 4000):
+        assert light.duration(steps) <= steps * 2 * 0.001 + 1e-9
+
+
+@pytest.mark.parametrize("name", ["ligero", "pesado", "constante"])
+def test_runs_cover_every_step(name, profile):
+    runs = profile(name).runs(STEPS_5_DEG)
+    assert sum(count for _, count in runs) == STEPS_5_DEG
+    assert all(delay > 0 for delay, _ in runs)
+
+
+@pytest.mark.parametrize("name", ["ligero", "pesado"])
+def test_ramp_is_symmetric_and_bounded(name, profile):
+    moving = profile(name)
+    steps = 2000
+    speeds = [moving.speed_at(step, steps) for step in range(steps)]
+    assert speeds == speeds[::-1]
+    assert speeds[0] == pytest.approx(moving.start_speed, rel=0.01)
+    assert max(speeds) == pytest.approx(moving.max_speed)
+    half = speeds[:steps // 2]
+    assert all(a <= b for a, b in zip(half, half[1:]))
+
+
+def test_elapsed_matches_duration(profile):
+    moving = profile("pesado")
+    steps = 600
+    assert moving.elapsed(0, steps) == 0
+    assert moving.elapsed(steps, steps) == pytest.approx(moving.duration(steps))
+    times = [moving.elapsed(step, steps) for step in range(steps)]
+    assert all(a < b for a, b in zip(times, times[1:]))
+
+
+def test_brake_time(profile):
+    assert profile("constante").brake_time() == 0
+    light = profile("ligero")
+    assert light.brake_time() == pytest.approx((light.max_speed - light.start_speed) / light.accel)
+    heavy = profile("pesado")
+    # Jerk-limited braking takes longer than braking at full deceleration
+    assert heavy.brake_time() > (heavy.max_speed - heavy.start_speed) / heavy.accel
+
+
+@pytest.mark.parametrize("setting", ["max_speed", "accel", "jerk", "start_speed"])
+@pytest.mark.parametrize("value", [0, -1])
+def test_invalid_settings_are_rejected(setting, value):
+    with pytest.raises(ValueError):
+        MotionProfile(kind="s_curve", **{setting: value})
+
+
+def test_unknown_kind_is_rejected():
+    with pytest.raises(ValueError):
+        MotionProfile(kind="linear")
+
+
+@pytest.mark.parametrize("kind", MotionProfile.KINDS)
+def test_step_times_match_elapsed(kind):
+    moving = MotionProfile(kind=kind, max_speed=1000, accel=3000, jerk=20000, start_speed=200)
+    steps = 700
+    times = moving.step_times(steps)
+    assert len(times) == steps + 1
+    for step in (0, 1, 50, 350, 699, 700):
+        assert times[step] == pytest.approx(moving.elapsed(step, steps))
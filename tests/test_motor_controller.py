@@ -0,0 +1,173 @@
+import threading
+from concurrent.futures import CancelledError
+from types import SimpleNamespace
+
+import pytest
+
+from src import motor_controller
+from src.motor_controller import (MotionProfile, PigpioPulseEngine, SimulatedGPIO, SimulatedPulseEngine,
+                                  StepperMotorController)
+
+
+def motor():
+    table = StepperMotorController(10, 8, engine="simulated")
+    table.engine = SimulatedPulseEngine(table.gpio, 8, realtime=False)
+    return table
+
+
+def test_stop_before_play_is_kept():
+    engine = SimulatedPulseEngine(SimulatedGPIO(), 8, realtime=False)
+    engine.stop()
+    assert engine.play([(0.001, 100)]) == 0
+    engine.reset()
+    assert engine.play([(0.001, 100)]) == 100
+
+
+def test_move_degs_accumulates_fractions():
+    table = motor()
+    with table:
+        for _ in range(72):
+            table.move_degs(5)
+    assert table.position == StepperMotorController.STEPS_PER_REV
+    assert table.angle == 0
+
+
+def test_move_to_takes_shortest_path():
+    table = motor()
+    with table:
+        table.move_to(350)
+        assert table.position == round(-10 * StepperMotorController.STEPS_PER_REV / 360)
+        table.move_to(20)
+    assert table.angle == pytest.approx(20, abs=0.1)
+
+
+def test_cancel_between_queue_and_playback_stops_the_move():
+    table = motor()
+    started = threading.Event()
+    release = threading.Event()
+
+    def hold():
+        started.set()
+        release.wait(5)
+
+    with table:
+        table._submit(None, hold)
+        started.wait(5)
+        move = table.move_degs_async(90)
+        # The queued move has not started yet: cancel_moves must still stop it
+        canceller = threading.Thread(target=table.cancel_moves)
+        canceller.start()
+        release.set()
+        canceller.join(5)
+        with pytest.raises(CancelledError):
+            move.result(5)
+    assert table.position == 0
+
+
+def test_cancel_while_the_move_starts_is_not_lost():
+    table = motor()
+    with table:
+        engine = table._pulse_engine()
+        reset = engine.reset
+
+        def cancel_then_reset():
+            # cancel_moves lands after the queued move passed its first generation check,
+            # just before the engine is reset for it
+            with table._moves_lock:
+                table._generation += 1
+            engine.stop()
+            reset()
+
+        engine.reset = cancel_then_reset
+        move = table.move_degs_async(90)
+        with pytest.raises(CancelledError):
+            move.result(5)
+    assert table.position == 0
+
+
+class FakePi:
+    """
+    pigpio daemon stand-in: holds the waves within its pulse limit and counts
+    the steps every wave_chain plays.
+    """
+    MAX_PULSES = 12000
+    connected = True
+
+    def __init__(self):
+        self.waves = {}
+        self.pending = []
+        self.next_id = 0
+        self.steps = 0
+        self.chains = []
+        self.peak = 0
+
+    def wave_get_max_pulses(self):
+        return self.MAX_PULSES
+
+    def wave_get_max_cbs(self):
+        return 2 * self.MAX_PULSES + 1000
+
+    def set_mode(self, pin, mode):
+        pass
+
+    def wave_add_generic(self, pulses):
+        self.pending += pulses
+
+    def wave_create(self):
+        pulses, self.pending = self.pending, []
+        if sum(map(len, self.waves.values())) + len(pulses) > self.MAX_PULSES:
+            raise RuntimeError("No more CBs for waveform")
+        self.next_id += 1
+        self.waves[self.next_id] = pulses
+        self.peak = max(self.peak, sum(map(len, self.waves.values())))
+        return self.next_id
+
+    def wave_delete(self, wave_id):
+        del self.waves[wave_id]
+
+    def wave_chain(self, chain):
+        assert len(chain) <= PigpioPulseEngine.MAX_CHAIN_BYTES
+        self.chains.append(chain)
+        i = 0
+        while i < len(chain):
+            if chain[i] == 255:  # [255, 0, wave, 255, 1, x, y]
+                self.steps += len(self.waves[chain[i + 2]]) // 2 * (chain[i + 5] + 256 * chain[i + 6])
+                i += 7
+            else:
+                self.steps += len(self.waves[chain[i]]) // 2
+                i += 1
+
+    def wave_tx_busy(self):
+        return False
+
+
+@pytest.fixture
+def pigpio_engine(monkeypatch):
+    fake = SimpleNamespace(pi=FakePi, pulse=lambda on, off, delay: (on, off, delay), OUTPUT=1)
+    monkeypatch.setattr(motor_controller, "pigpio", fake)
+    return PigpioPulseEngine(14)
+
+
+def test_pigpio_wave_cache_is_bounded(pigpio_engine):
+    runs = [(0.0005 + i * 0.00001, 100) for i in range(3 * PigpioPulseEngine.MAX_CACHED_WAVES)]
+    for run in runs:
+        assert pigpio_engine.play([run]) == 100
+    assert len(pigpio_engine._waves) == PigpioPulseEngine.MAX_CACHED_WAVES
+    assert len(pigpio_engine.pi.waves) == PigpioPulseEngine.MAX_CACHED_WAVES
+    assert pigpio_engine.pi.steps == 100 * len(runs)
+
+
+def test_pigpio_long_ramp_plays_in_chunks(pigpio_engine):
+    # 8000 ramp steps, one per half period: 16000 pulses, more than the daemon holds
+    runs = [(0.0002 + i * 0.0000001, 1) for i in range(8000)] + [(0.0002, 1000)]
+    assert pigpio_engine.play(runs) == 9000
+    assert pigpio_engine.pi.steps == 9000
+    assert len(pigpio_engine.pi.chains) > 1
+    assert pigpio_engine.pi.peak <= FakePi.MAX_PULSES
+
+
+def test_pigpio_s_curve_move(pigpio_engine):
+    profile = MotionProfile(name="pesado", kind="s_curve", max_speed=600, accel=800, jerk=3000, start_speed=100)
+    runs = profile.runs(20000)
+    assert pigpio_engine.play(runs) == 20000
+    assert pigpio_engine.pi.steps == 20000
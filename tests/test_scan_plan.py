@@ -0,0 +1,129 @@
+import json
+import os
+
+import pytest
+
+from src.scan_plan import ScanPlan
+
+PLANS_FILE = os.path.join(os.path.dirname(__file__), "..", "src", "resources", "assets", "scan_plans", "scan_plans.json")
+TEMPLATES = ["{product}{shot}{letter}{ext}"] * 3
+
+
+def load_plans():
+    with open(PLANS_FILE, "r", encoding="utf-8") as file:
+        data = json.load(file)
+    return data["naming"], {name: ScanPlan.from_dict(name, settings) for name, settings in data["plans"].items()}
+
+
+def baseline_routine_names(shot, prefix):
+    # Per-camera letters of the original RoutinesTabControl.trigger_capture
+    return (
+        f"P{shot}{'' if prefix in ('A', 'F') else prefix}.jpg",
+        f"P{shot}{'A' if prefix == 'A' else ''}.jpg",
+        f"P{shot}{'F' if prefix == 'C' else ''}.jpg",
+    )
+
+
+BASELINE_PREFIXES = {
+    "5 [DEG/SHOT]": (72, {8: "A", 17: "B", 71: "C", 35: "D", 53: "E"}),
+    "45 [DEG/SHOT]": (8, {0: "A", 1: "B", 7: "C", 3: "D", 5: "E"}),
+    "90 [DEG/SHOT]": (4, {0: "B", 3: "C", 1: "D", 2: "E"}),
+}
+
+
+def test_shortest_wraps_through_zero():
+    plan = ScanPlan.from_dict("wrap", {"angles": [350, 10, 20]}).compile(TEMPLATES)
+    assert [step.angle for step in plan.steps] == [350, 10, 20]
+    assert [step.move for step in plan.steps] == [-10, 20, 10]
+    assert plan.travel() == 40
+
+
+def test_shortest_tries_both_directions():
+    plan = ScanPlan.from_dict("back", {"angles": [300, 330]}).compile(TEMPLATES)
+    assert [step.angle for step in plan.steps] == [330, 300]
+    assert plan.travel() == 60
+
+
+def test_route_starts_from_current_angle():
+    plan = ScanPlan.from_dict("wrap", {"angles": [350, 10, 20]}).compile(TEMPLATES, start=15)
+    assert plan.start == 15
+    assert [step.angle for step in plan.steps] == [20, 10, 350]
+    assert [step.move for step in plan.steps] == [5, -10, -20]
+    # Fixed direction plans sweep from the table, not from 0
+    forward = ScanPlan.from_dict("fwd", {"angles": [90, 180, 270, 360], "direction": "forward"})
+    steps = forward.compile(TEMPLATES, start=180).steps
+    assert [step.angle for step in steps] == [270, 360, 90, 180]
+    assert [step.move for step in steps] == [90, 90, 90, 90]
+
+
+def test_full_turn_plans_keep_one_revolution():
+    _, plans = load_plans()
+    for name in ("5 [DEG/SHOT]", "45 [DEG/SHOT]", "90 [DEG/SHOT]", "360 [DEG/SHOT]"):
+        plan = plans[name].compile(TEMPLATES)
+        assert sum(step.move for step in plan.steps) == 360
+        assert all(step.move > 0 for step in plan.steps)
+
+
+def test_shared_stops_are_merged():
+    plan = ScanPlan.from_dict("shared", {
+        "angles": [90, 180, 90],
+        "angle_cameras": {"90": [0]},
+        "letters": [{"2": "X"}, {}, {}],
+    }).compile(TEMPLATES, "P", ".jpg")
+    assert [step.angle for step in plan.steps] == [90, 180]
+    first = plan.steps[0]
+    assert first.cameras == (0,)
+    assert first.names[0] == "P0.jpg"  # the camera keeps the name of its first shot
+    assert plan.shots == 2
+
+
+def test_repeated_angle_is_one_stop():
+    plan = ScanPlan.from_dict("repeat", {"angles": [45, 90, 45]}).compile(TEMPLATES, "P", ".jpg")
+    assert [(step.angle, step.move) for step in plan.steps] == [(45, 45), (90, 45)]
+    assert plan.steps[0].names == ("P0.jpg", "P0.jpg", "P0.jpg")
+
+
+def test_waypoints_fold_into_next_move():
+    plan = ScanPlan.from_dict("waypoints", {
+        "angles": [90, 180, 270],
+        "direction": "forward",
+        "angle_cameras": {"180": []},
+    }).compile(TEMPLATES, "P", ".jpg")
+    assert [step.angle for step in plan.steps] == [90, 270]
+    assert [step.move for step in plan.steps] == [90, 180]
+
+
+def test_trailing_waypoint_is_travelled():
+    _, plans = load_plans()
+    plan = plans["360 [DEG/SHOT]"].compile(TEMPLATES)
+    assert len(plan.steps) == 1
+    assert plan.steps[0].cameras == ()
+    assert plan.steps[0].move == 360
+    assert plan.shots == 0
+
+
+@pytest.mark.parametrize("name", sorted(BASELINE_PREFIXES))
+def test_routine_names_match_baseline(name):
+    naming, plans = load_plans()
+    plan = plans[name].compile(naming["routine"], "P", ".jpg")
+    shots, prefixes = BASELINE_PREFIXES[name]
+    assert [step.shot for step in plan.steps] == list(range(shots))
+    for step in plan.steps:
+        assert step.names == baseline_routine_names(step.shot, prefixes.get(step.shot, ""))
+
+
+@pytest.mark.parametrize("name", sorted(BASELINE_PREFIXES))
+def test_preset_names_match_baseline(name):
+    naming, plans = load_plans()
+    plan = plans[name].compile(naming["preset"], "P", ".jpg")
+    for step in plan.steps:
+        assert step.names == (f"A000{step.shot}.jpg", f"B000{step.shot}.jpg", f"C000{step.shot}.jpg")
+    assert plan.name_for(1, 2) == "B0002.jpg"
+    assert plan.name_for(1, len(plan.steps)) is None
+
+
+def test_invalid_plans_are_rejected():
+    with pytest.raises(ValueError):
+        ScanPlan.from_dict("bad", {"angles": [0]})
+    with pytest.raises(ValueError):
+        ScanPlan.from_dict("bad", {"angles": [90], "direction": "sideways"})